@@ -0,0 +1 @@
+"""Benchmarks for the function app, run against the local storage stand-in."""
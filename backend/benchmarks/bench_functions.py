@@ -0,0 +1,297 @@
+"""
+FUNCTION MICRO-BENCHMARKS
+Time each function's main() in-process against the local storage stand-in
+
+For every catalog size, getmeals, registermeal, submitorder (one case per
+cart size) and notifyorder are invoked directly with constructed
+HttpRequest/QueueMessage objects. Each case reports its latency
+distribution, storage calls per request and peak traced allocations.
+
+Results are compared with baselines.json; a regression exits with status 1.
+Storage call counts are deterministic, so any increase is flagged. Latency
+and memory are flagged when they grow past the tolerances.
+
+    python -m benchmarks.bench_functions                      # from backend/
+    python -m benchmarks.bench_functions --sizes 100 1000000 --carts 1 50
+    python -m benchmarks.bench_functions --update-baseline
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+import azure.functions as func
+
+# Function folders and shared_code live in backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks import seed
+from benchmarks.coldstart import trigger_binding
+from shared_code import localstorage
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000, 1000000]
+DEFAULT_CARTS = [1, 5, 20, 50]
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+SAMPLE_MEALS = 500
+
+FUNCTIONS = {
+    'getmeals': 'getmeal.getmeals',
+    'registermeal': 'registermeal.registermeal',
+    'submitorder': 'submitorder.submitorder',
+    'notifyorder': 'notifyorder.notifyorder'
+}
+
+
+def _http(method, route, params=None, body=None):
+    return func.HttpRequest(
+        method=method,
+        url=f"http://localhost:7071/api/{route}",
+        params=params or {},
+        headers={'Content-Type': 'application/json'},
+        body=json.dumps(body).encode('utf-8') if body is not None else b''
+    )
+
+
+def _cart(rng, meals, lines):
+    area = rng.choice(meals)['area']
+    in_area = [m for m in meals if m['area'] == area] or meals
+    chosen = [rng.choice(in_area) for _ in range(lines)]
+    return area, [{'mealId': m['mealId'], 'quantity': rng.randint(1, 3)} for m in chosen]
+
+
+def _cases(meals, carts, rng):
+    """[(function, cart, build_input)] for one catalog."""
+    cases = [
+        ('getmeals', None, lambda i: _http('GET', 'meals', params={'area': seed.AREAS[i % len(seed.AREAS)]})),
+        ('registermeal', None, lambda i: _http('POST', 'registerMeal', body={
+            'name': f"Benchmark Bowl {i}",
+            'description': 'Registered by the benchmark suite',
+            'price': 11.5,
+            'preparationTime': 15,
+            'deliveryAreas': seed.AREAS[:2],
+            'restaurantName': 'Benchmark Kitchen',
+            'category': 'Main Course'
+        }))
+    ]
+
+    def submit(lines):
+        def build(i):
+            area, cart = _cart(rng, meals, lines)
+            return _http('POST', 'submitOrder', body={
+                'customerName': f"Customer {i % 97}",
+                'deliveryAddress': f"{i} Benchmark Street",
+                'area': area,
+                'phoneNumber': f"555-{i % 97:04d}",
+                'meals': cart
+            })
+        return build
+
+    def notify(lines):
+        def build(i):
+            area, cart = _cart(rng, meals, lines)
+            payload = {
+                'orderId': str(uuid.uuid4()),
+                'orderNumber': f"ORD-BENCH-{i:06d}",
+                'customerName': f"Customer {i % 97}",
+                'area': area,
+                'status': 'Preparing',
+                'orderDate': '2025-01-01T12:00:00',
+                'customerKey': f"{i % 97:032x}",
+                'meals': [dict(line, name=line['mealId'][:8]) for line in cart]
+            }
+            # A fresh message has no dequeue count, so the sketches are updated
+            return func.QueueMessage(id=payload['orderId'], body=json.dumps(payload).encode('utf-8'))
+        return build
+
+    for lines in carts:
+        cases.append(('submitorder', lines, submit(lines)))
+    for lines in carts:
+        cases.append(('notifyorder', lines, notify(lines)))
+    return cases
+
+
+def _invoke(main, binding, request):
+    """
+    Run main() the way the host does, with the trigger passed by its binding
+    name, and report whether it succeeded. An exception is a failure; it is
+    logged (see --verbose) rather than hidden.
+    """
+    try:
+        response = main(**{binding: request})
+    except Exception:
+        logging.exception("%s raised", getattr(main, '__module__', 'main'))
+        return False
+    return response is None or response.status_code < 400
+
+
+def _percentile(ordered, pct):
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def measure(store, main, binding, build_input, min_iterations=3, max_iterations=200, budget=5.0):
+    """Latency, storage calls and allocations of one case."""
+    # Warm-up: imports, SQLite page cache. A failure here fails the case.
+    errors = 0 if _invoke(main, binding, build_input(0)) else 1
+    store.reset_stats()
+
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < max_iterations and (
+            len(latencies) < min_iterations or time.perf_counter() - started < budget):
+        request = build_input(len(latencies) + 1)
+        call_started = time.perf_counter()
+        if not _invoke(main, binding, request):
+            errors += 1
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    calls = store.stats()
+
+    # Allocations are traced on a separate call; tracing slows everything down
+    request = build_input(len(latencies) + 1)
+    tracemalloc.start()
+    if not _invoke(main, binding, request):
+        errors += 1
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    iterations = len(latencies)
+    ordered = sorted(latencies)
+    return {
+        'iterations': iterations,
+        'errors': errors,
+        'latencyMs': {
+            'p50': round(_percentile(ordered, 50), 3),
+            'p90': round(_percentile(ordered, 90), 3),
+            'p99': round(_percentile(ordered, 99), 3),
+            'mean': round(sum(ordered) / iterations, 3),
+            'max': round(ordered[-1], 3)
+        },
+        'storageCallsPerRequest': round(sum(calls.values()) / iterations, 2),
+        'storageCalls': {op: round(count / iterations, 2) for op, count in sorted(calls.items())},
+        'peakKiB': round(peak / 1024, 1),
+        'retainedKiB': round(retained / 1024, 1)
+    }
+
+
+def run(sizes, carts, data_dir=None, budget=5.0, max_iterations=200, seed_value=42):
+    """Benchmark every case for every catalog size; returns {case key: result}."""
+    for name in ('AZURE_NOTIFICATION_HUB_CONNECTION_STRING', 'AZURE_NOTIFICATION_HUB_NAME'):
+        os.environ.pop(name, None)
+    os.environ.setdefault('CUSTOMER_KEY_SECRET', 'benchmark')
+    mains = {name: importlib.import_module(module).main for name, module in FUNCTIONS.items()}
+    bindings = {name: trigger_binding(module) for name, module in FUNCTIONS.items()}
+
+    results = {}
+    for size in sizes:
+        started = time.perf_counter()
+        conn = seed.prepare_catalog(size, data_dir, seed_value)
+        print(f"Catalog of {size:,} meals ready in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        os.environ['AzureStorageConnectionString'] = conn
+        os.environ['AzureWebJobsStorage'] = conn
+        store = localstorage.get_store(conn)
+        rng = random.Random(seed_value)
+        meals = seed.sample_meals(conn, SAMPLE_MEALS, seed_value)
+
+        for function, cart, build_input in _cases(meals, carts, rng):
+            key = f"{function}/{size}" + (f"/cart{cart}" if cart else '')
+            results[key] = dict(measure(store, mains[function], bindings[function], build_input,
+                                        max_iterations=max_iterations, budget=budget),
+                                function=function, catalogSize=size, cartLines=cart)
+            print(_format_row(key, results[key]), file=sys.stderr)
+        localstorage.close_store(conn)
+    return results
+
+
+def compare(results, baseline, latency_tolerance=0.5, memory_tolerance=0.25):
+    """List regressions of `results` against baseline cases with the same key."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if result['errors'] > base.get('errors', 0):
+            regressions.append(f"{key}: {result['errors']} errors (baseline {base.get('errors', 0)})")
+        # Call counts are deterministic; half a call allows for ETag retries
+        if result['storageCallsPerRequest'] > base['storageCallsPerRequest'] + 0.5:
+            regressions.append(f"{key}: {result['storageCallsPerRequest']} storage calls/request "
+                               f"(baseline {base['storageCallsPerRequest']})")
+        p50, base_p50 = result['latencyMs']['p50'], base['latencyMs']['p50']
+        if p50 > base_p50 * (1 + latency_tolerance) and p50 - base_p50 > 1:
+            regressions.append(f"{key}: p50 {p50}ms (baseline {base_p50}ms)")
+        if result['peakKiB'] > base['peakKiB'] * (1 + memory_tolerance) and result['peakKiB'] - base['peakKiB'] > 64:
+            regressions.append(f"{key}: peak {result['peakKiB']}KiB (baseline {base['peakKiB']}KiB)")
+    return regressions
+
+
+def _format_row(key, result):
+    latency = result['latencyMs']
+    return (f"{key:<28} n={result['iterations']:<4} p50={latency['p50']:>9.2f}ms "
+            f"p90={latency['p90']:>9.2f}ms p99={latency['p99']:>9.2f}ms "
+            f"calls={result['storageCallsPerRequest']:>7.2f} peak={result['peakKiB']:>9.1f}KiB"
+            + (f" errors={result['errors']}" if result['errors'] else ''))
+
+
+def _load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get('cases', {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the functions against the local storage stand-in")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Catalog sizes in meals")
+    parser.add_argument('--carts', type=int, nargs='+', default=DEFAULT_CARTS, help="Order sizes in lines")
+    parser.add_argument('--budget', type=float, default=5.0, help="Seconds spent per case (at least 3 calls)")
+    parser.add_argument('--max-iterations', type=int, default=200, help="Calls per case at most")
+    parser.add_argument('--data-dir', help=f"Where seeded catalogs are cached (default {seed.default_data_dir()})")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline file to compare with")
+    parser.add_argument('--update-baseline', action='store_true', help="Record these results as the baseline")
+    parser.add_argument('--latency-tolerance', type=float, default=0.5, help="Allowed relative p50 growth")
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help="Allowed relative peak growth")
+    parser.add_argument('--output', help="Also write the JSON report to this file")
+    parser.add_argument('--verbose', action='store_true', help="Show the functions' log output")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    results = run(args.sizes, args.carts, args.data_dir, args.budget, args.max_iterations)
+    baseline = _load_baseline(args.baseline)
+    regressions = compare(results, baseline, args.latency_tolerance, args.memory_tolerance)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cases': results,
+        'regressions': regressions
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': report['python'], 'platform': report['platform'], 'cases': baseline},
+                      f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline updated: {args.baseline}", file=sys.stderr)
+        return
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+COLD START PROFILER
+Import time per module and time-to-first-response for each function
+
+Every function is loaded in a fresh interpreter (as a new worker would),
+under `python -X importtime`, and called the way the host calls it: with
+the trigger passed by its binding name (main(req=...), main(msg=...)). The child reports how long the module import
+took and how long its first and second invocations took against the local
+storage stand-in, and the import log is split into what loaded at import
+time and what loaded lazily during the first call.
+
+azure.functions (and this module) are imported before timing starts; the
+Functions Python worker has always loaded azure.functions already.
+
+    python -m benchmarks.coldstart                      # from backend/
+    python -m benchmarks.coldstart --functions getmeals submitorder --runs 5 --top 15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_MARK = 'coldstart:import'
+CALL_MARK = 'coldstart:first-call'
+
+FUNCTIONS = {
+    'getmeals': 'getmeal.getmeals',
+    'registermeal': 'registermeal.registermeal',
+    'registermeals': 'registermeals.registermeals',
+    'updatemeal': 'updatemeal.updatemeal',
+    'mealchanges': 'mealchanges.mealchanges',
+    'submitorder': 'submitorder.submitorder',
+    'notifyorder': 'notifyorder.notifyorder',
+    'orderstats': 'orderstats.orderstats',
+    'popularmeals': 'popularmeals.popularmeals',
+    'searchmeals': 'searchmeals.searchmeals',
+    'suggestmeals': 'suggestmeals.suggestmeals',
+    'mealfacets': 'mealfacets.mealfacets',
+    'getrestaurants': 'getrestaurants.getrestaurants',
+    'getorder': 'getorder.getorder',
+    'customerorders': 'customerorders.customerorders',
+    'restaurantorders': 'restaurantorders.restaurantorders',
+    'warmup': 'warmup.warmup'
+}
+
+# Runs inside the child interpreter
+CHILD = r'''
+import json, os, sys, time
+import azure.functions as func
+sys.path.insert(0, {backend!r})
+from benchmarks.coldstart import build_input, trigger_binding
+binding = trigger_binding({module!r})
+print({import_mark!r}, file=sys.stderr, flush=True)
+started = time.perf_counter()
+module = __import__({module!r}, fromlist=['main'])
+imported = time.perf_counter()
+request = build_input({function!r}, json.loads(os.environ['COLDSTART_MEALS']))
+print({call_mark!r}, file=sys.stderr, flush=True)
+call_started = time.perf_counter()
+# By keyword, as the Functions host calls main
+result = module.main(**{{binding: request}})
+first = time.perf_counter()
+since_spawn = time.time() - float(os.environ['COLDSTART_SPAWNED'])
+module.main(**{{binding: build_input({function!r}, json.loads(os.environ['COLDSTART_MEALS']))}})
+second = time.perf_counter()
+print(json.dumps({{
+    'importMs': (imported - started) * 1000,
+    'firstCallMs': (first - call_started) * 1000,
+    'secondCallMs': (second - first) * 1000,
+    'spawnToFirstResponseMs': since_spawn * 1000,
+    'status': getattr(result, 'status_code', None)
+}}))
+'''
+
+
+def trigger_binding(module):
+    """Name of the trigger binding of a function module ('getmeal.getmeals' -> 'req')."""
+    with open(os.path.join(BACKEND_DIR, module.split('.')[0], 'function.json')) as f:
+        bindings = json.load(f)['bindings']
+    return next(binding['name'] for binding in bindings
+                if binding.get('direction') == 'in' and binding['type'].endswith('Trigger'))
+
+
+def build_input(function, meals):
+    """A representative request for `function` (runs in the child)."""
+    import azure.functions as func
+    from datetime import datetime, timedelta
+
+    def http(method, route, params=None, body=None):
+        return func.HttpRequest(method=method, url=f"/api/{route}", params=params or {},
+                                body=json.dumps(body).encode('utf-8') if body is not None else b'')
+
+    area = meals[0]['area'] if meals else 'Central'
+    cart = [{'mealId': meal['mealId'], 'quantity': 1} for meal in meals[:3]]
+    if function == 'getmeals':
+        return http('GET', 'meals', {'area': area})
+    if function == 'registermeal':
+        return http('POST', 'registerMeal', body={
+            'name': 'Cold Start Curry', 'description': 'Registered by the cold start profiler',
+            'price': 9.5, 'preparationTime': 10, 'deliveryAreas': [area], 'restaurantName': 'Cold Kitchen'})
+    if function == 'registermeals':
+        return http('POST', 'registerMeals', body={
+            'restaurantName': 'Cold Kitchen', 'deliveryAreas': [area],
+            'meals': [{'name': f"Cold Start Dish {i}", 'description': 'Registered by the cold start profiler',
+                       'price': 9.5, 'preparationTime': 10} for i in range(10)]})
+    if function == 'updatemeal':
+        return http('POST', 'updateMeal', body={
+            'restaurantId': meals[0]['restaurantId'], 'mealId': meals[0]['mealId'], 'price': 9.5})
+    if function == 'mealchanges':
+        since = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+        return http('GET', 'meals/changes', {'area': area, 'since': since})
+    if function == 'submitorder':
+        return http('POST', 'submitOrder', body={
+            'customerName': 'Cold Start', 'deliveryAddress': '1 Cold Street', 'area': area, 'meals': cart})
+    if function == 'notifyorder':
+        return func.QueueMessage(id='coldstart', body=json.dumps({
+            'orderId': 'coldstart', 'orderNumber': 'ORD-COLD', 'area': area, 'customerKey': '0' * 32,
+            'orderDate': '2025-01-01T12:00:00', 'meals': [dict(line, name='Cold') for line in cart]}).encode('utf-8'))
+    if function == 'orderstats':
+        return http('GET', 'orderStats', {'area': area})
+    if function == 'popularmeals':
+        return http('GET', 'meals/popular', {'area': area})
+    if function == 'searchmeals':
+        return http('GET', 'meals/search', {'area': area, 'q': 'spicy chick'})
+    if function == 'suggestmeals':
+        return http('GET', 'meals/suggest', {'area': area, 'q': 'chi'})
+    if function == 'mealfacets':
+        return http('GET', 'meals/facets', {'area': area, 'vegetarian': 'true'})
+    if function == 'getrestaurants':
+        return http('GET', 'restaurants', {'area': area})
+    if function == 'getorder':
+        return func.HttpRequest(method='GET', url='/api/orders/ORD-20250101-C0FFEE', body=b'',
+                                route_params={'orderNumber': 'ORD-20250101-C0FFEE'})
+    if function == 'customerorders':
+        customer_id = '0' * 32
+        return func.HttpRequest(method='GET', url=f'/api/customers/{customer_id}/orders', body=b'',
+                                route_params={'customerId': customer_id})
+    if function == 'restaurantorders':
+        restaurant_id = '00000000-0000-0000-0000-000000000000'
+        return func.HttpRequest(method='GET', url=f'/api/restaurants/{restaurant_id}/orders', body=b'',
+                                params={'status': 'Pending'}, route_params={'restaurantId': restaurant_id})
+    return http('GET', function)
+
+
+def _parse_importtime(stderr):
+    """{phase: [(module, cumulative ms, self ms, depth)]} from -X importtime output."""
+    phases = {'preload': [], 'import': [], 'firstCall': []}
+    phase = 'preload'
+    for line in stderr.splitlines():
+        if line.strip() == IMPORT_MARK:
+            phase = 'import'
+        elif line.strip() == CALL_MARK:
+            phase = 'firstCall'
+        elif line.startswith('import time:') and '|' in line and 'self [us]' not in line:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            depth = (len(name) - len(name.lstrip(' '))) // 2
+            phases[phase].append((name.strip(), int(cumulative_us) / 1000, int(self_us) / 1000, depth))
+    return phases
+
+
+def _heaviest(entries, top):
+    """Top-level imports of a phase and their direct children, heaviest first."""
+    roots = [entry for entry in entries if entry[3] <= 1]
+    return [{'module': name, 'cumulativeMs': round(cumulative, 1)}
+            for name, cumulative, _, _ in sorted(roots, key=lambda entry: -entry[1])[:top]]
+
+
+def profile(function, conn, meals, top=10):
+    """Run one cold start of `function` in a fresh interpreter."""
+    script = CHILD.format(backend=BACKEND_DIR, module=FUNCTIONS[function], function=function,
+                          import_mark=IMPORT_MARK, call_mark=CALL_MARK)
+    env = dict(os.environ, AzureStorageConnectionString=conn, AzureWebJobsStorage=conn,
+               COLDSTART_MEALS=json.dumps(meals))
+    env.setdefault('CUSTOMER_KEY_SECRET', 'benchmark')
+    for name in ('AZURE_NOTIFICATION_HUB_CONNECTION_STRING', 'AZURE_NOTIFICATION_HUB_NAME'):
+        env.pop(name, None)
+    env['COLDSTART_SPAWNED'] = repr(time.time())
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', script],
+                               capture_output=True, text=True, env=env, cwd=BACKEND_DIR)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{function} failed:\n{completed.stderr[-2000:]}")
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    phases = _parse_importtime(completed.stderr)
+    result['importedModules'] = len(phases['import'])
+    result['heaviestImports'] = _heaviest(phases['import'], top)
+    result['lazyModules'] = len(phases['firstCall'])
+    result['heaviestLazyImports'] = _heaviest(phases['firstCall'], top)
+    return result
+
+
+def _median_run(runs):
+    summary = dict(runs[0])
+    for field in ('importMs', 'firstCallMs', 'secondCallMs', 'spawnToFirstResponseMs'):
+        summary[field] = round(statistics.median(run[field] for run in runs), 1)
+    summary['runs'] = len(runs)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time and first response of each function")
+    parser.add_argument('--functions', nargs='+', choices=sorted(FUNCTIONS), default=list(FUNCTIONS))
+    parser.add_argument('--runs', type=int, default=3, help="Cold starts per function (median is reported)")
+    parser.add_argument('--top', type=int, default=10, help="Heaviest imports listed per phase")
+    parser.add_argument('--catalog-size', type=int, default=1000, help="Meals in the local catalog")
+    parser.add_argument('--data-dir', help="Where seeded catalogs are cached")
+    parser.add_argument('--output', help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    from benchmarks import seed
+    from shared_code import localstorage
+
+    conn = seed.prepare_catalog(args.catalog_size, args.data_dir)
+    meals = seed.sample_meals(conn, 10)
+    localstorage.close_store(conn)
+
+    report = {}
+    for function in args.functions:
+        report[function] = _median_run([profile(function, conn, meals, args.top) for _ in range(args.runs)])
+        result = report[function]
+        print(f"{function:<13} import={result['importMs']:>7.1f}ms first={result['firstCallMs']:>7.1f}ms "
+              f"second={result['secondCallMs']:>6.1f}ms spawn->first={result['spawnToFirstResponseMs']:>7.1f}ms "
+              f"status={result['status']}", file=sys.stderr)
+        for entry in result['heaviestImports'][:3]:
+            print(f"{'':<13}   import    {entry['module']:<40} {entry['cumulativeMs']:>7.1f}ms", file=sys.stderr)
+        for entry in result['heaviestLazyImports'][:3]:
+            print(f"{'':<13}   1st call  {entry['module']:<40} {entry['cumulativeMs']:>7.1f}ms", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
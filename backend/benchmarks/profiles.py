@@ -0,0 +1,112 @@
+"""
+PROFILE REPORT
+Merge captured invocation profiles and print the hot spots
+
+Reads the .prof/.json pairs written by shared_code.profiling from a local
+directory or a blob container, filters them by their tags and prints the
+merged pstats table.
+
+    python -m benchmarks.profiles profiles/ --function getMeals --sort tottime
+    python -m benchmarks.profiles blob:profiles --connection-string "..." --area Central --min-ms 500
+"""
+
+import argparse
+import json
+import os
+import pstats
+import sys
+import tempfile
+
+# Function folders and shared_code live in backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared_code import storage
+
+
+def _local_profiles(directory):
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.endswith('.prof'):
+                path = os.path.join(root, name)
+                tags_path = path[:-len('.prof')] + '.json'
+                tags = {}
+                if os.path.exists(tags_path):
+                    with open(tags_path) as f:
+                        tags = json.load(f)
+                with open(path, 'rb') as f:
+                    yield path, f.read(), tags
+
+
+def _blob_profiles(connection_string, container, prefix=None):
+    container_client = storage.blob_service_from_connection_string(connection_string).get_container_client(container)
+    for blob in container_client.list_blobs(name_starts_with=prefix):
+        if not blob.name.endswith('.prof'):
+            continue
+        data = container_client.get_blob_client(blob.name).download_blob().readall()
+        tags_blob = container_client.get_blob_client(blob.name[:-len('.prof')] + '.json')
+        tags = json.loads(tags_blob.download_blob().readall()) if tags_blob.exists() else {}
+        yield f"{container}/{blob.name}", data, tags
+
+
+def _matches(tags, args):
+    if args.function and tags.get('function', '').lower() != args.function.lower():
+        return False
+    if args.area and tags.get('area') != args.area:
+        return False
+    if args.min_ms and (tags.get('durationMs') or 0) < args.min_ms:
+        return False
+    if args.min_cart and (tags.get('cartLines') or 0) < args.min_cart:
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge captured function profiles and show the hot spots")
+    parser.add_argument('source', help="Directory of profiles, or blob:<container>")
+    parser.add_argument('--connection-string', help="Storage connection string for blob sources "
+                                                     "(default: AzureStorageConnectionString/AzureWebJobsStorage)")
+    parser.add_argument('--function', help="Only profiles of this function, e.g. getMeals")
+    parser.add_argument('--area', help="Only profiles tagged with this delivery area")
+    parser.add_argument('--min-ms', type=float, help="Only invocations at least this slow")
+    parser.add_argument('--min-cart', type=int, help="Only orders with at least this many lines")
+    parser.add_argument('--sort', default='cumulative', help="pstats sort key (cumulative, tottime, ncalls...)")
+    parser.add_argument('--top', type=int, default=30, help="Rows to print")
+    args = parser.parse_args()
+
+    if args.source.startswith('blob:'):
+        connection_string = args.connection_string or storage.get_connection_string()
+        if not connection_string:
+            print("Error: No connection string provided")
+            sys.exit(2)
+        prefix = f"{args.function}/" if args.function else None
+        profiles = _blob_profiles(connection_string, args.source[len('blob:'):] or 'profiles', prefix)
+    else:
+        profiles = _local_profiles(args.source)
+
+    merged = None
+    durations = []
+    with tempfile.TemporaryDirectory() as scratch:
+        for index, (_, data, tags) in enumerate(profiles):
+            if not _matches(tags, args):
+                continue
+            # pstats loads from files; each profile is the marshalled stats dict
+            path = os.path.join(scratch, f"{index}.prof")
+            with open(path, 'wb') as f:
+                f.write(data)
+            if merged is None:
+                merged = pstats.Stats(path)
+            else:
+                merged.add(path)
+            durations.append(tags.get('durationMs') or 0)
+
+        if merged is None:
+            print("No profiles matched")
+            sys.exit(1)
+
+        durations.sort()
+        print(f"{len(durations)} invocations, median {durations[len(durations) // 2]:.1f} ms, "
+              f"slowest {durations[-1]:.1f} ms")
+        merged.strip_dirs().sort_stats(args.sort).print_stats(args.top)
+
+
+if __name__ == "__main__":
+    main()
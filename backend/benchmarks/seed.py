@@ -0,0 +1,140 @@
+"""
+BENCHMARK CATALOGS
+Seed the local storage stand-in with synthetic restaurants and meals
+
+Catalogs are deterministic for a given size and seed, and are built once
+per size into a cached SQLite file; each benchmark run works on a fresh
+copy of it so runs do not see each other's orders.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import uuid
+
+from shared_code import localstorage, menu, storage
+
+AREAS = ['Central', 'North', 'South']
+MEALS_PER_RESTAURANT = 20
+SEED_TABLE = 'BenchmarkSeed'
+# Bump when the seeded tables change so cached catalogs are rebuilt
+CATALOG_FORMAT = 2
+
+CATEGORIES = ['Main Course', 'Appetizer', 'Dessert', 'Beverage', 'Side']
+MEAL_NAMES = ['Burger', 'Pizza', 'Tacos', 'Pasta', 'Curry', 'Salad', 'Sushi', 'Wings',
+              'Noodles', 'Burrito', 'Ramen', 'Falafel', 'Steak', 'Soup', 'Cake']
+CUISINES = ['American', 'Italian', 'Mexican', 'Indian', 'Japanese', 'Chinese', 'Thai']
+
+
+def default_data_dir():
+    return os.path.join(tempfile.gettempdir(), 'foodexpress-benchmarks')
+
+
+def connection_string(path):
+    return f"{localstorage.CONNECTION_PREFIX};Path={path}"
+
+
+def _stable_id(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _restaurant(rng, area, index):
+    return {
+        'PartitionKey': area,
+        'RowKey': _stable_id(rng),
+        'Name': f"{rng.choice(CUISINES)} Kitchen {index}",
+        'CuisineType': rng.choice(CUISINES),
+        'DeliveryFee': round(rng.uniform(0, 4.99), 2),
+        'Rating': round(rng.uniform(3.5, 5.0), 1),
+        'IsActive': True,
+        'CreatedDate': '2025-01-01T00:00:00'
+    }
+
+
+def _meal(rng, restaurant, index):
+    name = f"{rng.choice(MEAL_NAMES)} {index}"
+    return {
+        'PartitionKey': restaurant['RowKey'],
+        'RowKey': _stable_id(rng),
+        'Name': name,
+        'Description': f"House {name.lower()} made fresh to order",
+        'Price': round(rng.uniform(4.99, 29.99), 2),
+        'PreparationTime': rng.randint(5, 45),
+        'Category': rng.choice(CATEGORIES),
+        'IsAvailable': rng.random() > 0.05,
+        'IsVegetarian': rng.random() < 0.3,
+        'Calories': rng.randint(300, 1200),
+        'CreatedDate': '2025-01-01T00:00:00',
+        'RestaurantId': restaurant['RowKey'],
+        'RestaurantName': restaurant['Name'],
+        'DeliveryArea': restaurant['PartitionKey']
+    }
+
+
+def _seed(conn, meal_count, seed):
+    rng = random.Random(seed)
+    table_service = storage.table_service_from_connection_string(conn)
+    restaurants_table = table_service.get_table_client('Restaurants')
+    meals_table = table_service.get_table_client('Meals')
+
+    restaurant_count = max(len(AREAS), -(-meal_count // MEALS_PER_RESTAURANT))
+    restaurants = [_restaurant(rng, AREAS[i % len(AREAS)], i) for i in range(restaurant_count)]
+    for area in AREAS:
+        batch = [r for r in restaurants if r['PartitionKey'] == area]
+        for start in range(0, len(batch), localstorage.MAX_BATCH_SIZE):
+            restaurants_table.submit_transaction(
+                [('upsert', r) for r in batch[start:start + localstorage.MAX_BATCH_SIZE]])
+
+    # Meals are spread evenly; each restaurant's meals are one transaction
+    created = 0
+    for index, restaurant in enumerate(restaurants):
+        count = meal_count // restaurant_count + (1 if index < meal_count % restaurant_count else 0)
+        if count:
+            meals_table.submit_transaction(
+                [('upsert', _meal(rng, restaurant, created + i)) for i in range(count)])
+            created += count
+
+    menu.rebuild_area_model(table_service, meals_table.list_entities())
+    table_service.get_table_client(SEED_TABLE).upsert_entity(
+        {'PartitionKey': 'catalog', 'RowKey': str(meal_count), 'Seed': seed, 'Restaurants': restaurant_count})
+
+
+def sample_meals(conn, limit, seed=0):
+    """A reproducible sample of available meal ids, their restaurants and areas."""
+    table_service = storage.table_service_from_connection_string(conn)
+    meals_table = table_service.get_table_client('Meals')
+    page = next(meals_table.query_entities(
+        "IsAvailable eq true", select=['PartitionKey', 'RowKey', 'DeliveryArea'], results_per_page=limit).by_page())
+    meals = [{'mealId': m['RowKey'], 'restaurantId': m['PartitionKey'], 'area': m['DeliveryArea']} for m in page]
+    random.Random(seed).shuffle(meals)
+    return meals
+
+
+def prepare_catalog(meal_count, data_dir=None, seed=42):
+    """
+    Return the connection string of a fresh working copy of the catalog.
+
+    The seeded catalog for `meal_count` is built on first use and cached
+    in `data_dir`.
+    """
+    data_dir = data_dir or default_data_dir()
+    os.makedirs(data_dir, exist_ok=True)
+    seed_path = os.path.join(data_dir, f"catalog-v{CATALOG_FORMAT}-{meal_count}-{seed}.sqlite")
+    work_path = os.path.join(data_dir, f"work-{meal_count}-{seed}.sqlite")
+
+    if not os.path.exists(seed_path):
+        building = seed_path + '.building'
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(building + suffix):
+                os.remove(building + suffix)
+        _seed(connection_string(building), meal_count, seed)
+        localstorage.close_store(connection_string(building))
+        os.replace(building, seed_path)
+
+    localstorage.close_store(connection_string(work_path))
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(work_path + suffix):
+            os.remove(work_path + suffix)
+    shutil.copyfile(seed_path, work_path)
+    return connection_string(work_path)
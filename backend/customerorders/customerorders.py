@@ -0,0 +1,67 @@
+import logging
+import azure.functions as func
+import os
+import re
+
+from shared_code import customers, orders, profiling, responses, storage, timing
+
+MAX_LIMIT = 50
+CUSTOMER_ID = re.compile(r'^[0-9a-f]{32}$')
+
+@profiling.profiled('customerOrders')
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function: A customer's past orders, newest first
+    GET /api/customers/{customerId}/orders?limit=20&cursor=...
+    customerId is the customerId returned by POST /api/submitOrder. Each page is
+    one range read of the customer's OrdersByCustomer partition; pass
+    nextCursor back as cursor for the next page.
+    """
+    logging.info('Python HTTP trigger function processed a request.')
+
+    # Handle CORS preflight
+    if req.method == "OPTIONS":
+        return responses.preflight()
+
+    timer = timing.RequestTimer('customerOrders')
+    try:
+        customer_id = (req.route_params.get('customerId') or '').strip().lower()
+        cursor = req.params.get('cursor') or None
+        try:
+            limit = min(max(int(req.params.get('limit', 20)), 1), MAX_LIMIT)
+        except ValueError:
+            limit = None
+
+        if not CUSTOMER_ID.match(customer_id) or limit is None:
+            return responses.json_response(
+                req, {"error": "Please provide a customer id and a numeric 'limit'"}, 400, timer)
+
+        # Without the key secret no order is indexed by customer
+        if not customers.is_configured():
+            return responses.error_response(req, "Order history is not configured", 503, timer)
+
+        # Get connection string from environment
+        connection_string = os.getenv('AzureStorageConnectionString')
+        if not connection_string:
+            connection_string = os.getenv('AzureWebJobsStorage')
+
+        # Connect to Table Storage
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+
+        with timer.span('history'):
+            history, next_cursor = orders.customer_orders(table_service, customer_id, limit, cursor)
+        timer.tag(count=len(history))
+
+        return responses.json_response(req, {
+            'status': 'success',
+            'customerId': customer_id,
+            'count': len(history),
+            'orders': history,
+            'nextCursor': next_cursor,
+            'hasMore': next_cursor is not None
+        }, 200, timer, headers={"Cache-Control": "no-store"})
+
+    except Exception as e:
+        logging.error(f"Error in customerOrders function: {str(e)}")
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
@@ -3,21 +3,25 @@ COMPLETE AZURE BLOB STORAGE IMAGE SOLUTION
 Uploads food images to Azure Blob Storage and updates meal records
 """
 
-from azure.storage.blob import BlobServiceClient
-from azure.data.tables import TableServiceClient
+from azure.data.tables import UpdateMode
 import requests
 import random
 import time
 import json
 from datetime import datetime
 import os
+import sys
+
+# Make the function app's shared_code package importable from this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared_code import menu, storage
 
 class AzureBlobImageManager:
     def __init__(self, connection_string):
         """Initialize Azure Blob and Table storage clients"""
         self.connection_string = connection_string
-        self.blob_service = BlobServiceClient.from_connection_string(connection_string)
-        self.table_service = TableServiceClient.from_connection_string(connection_string)
+        self.blob_service = storage.blob_service_from_connection_string(connection_string)
+        self.table_service = storage.table_service_from_connection_string(connection_string)
         
         # Food categories with specific Unsplash image URLs
         self.category_images = {
@@ -215,6 +219,7 @@ class AzureBlobImageManager:
         
         processed_count = 0
         skipped_count = 0
+        updated_meals = []
         
         for i, meal in enumerate(meals_to_process, 1):
             meal_name = meal.get('Name', f"Meal_{meal['RowKey'][:8]}")
@@ -247,8 +252,10 @@ class AzureBlobImageManager:
                 meal['ImageUrl'] = blob_url
                 meal['ImageBlobPath'] = blob_name
                 meal['ImageUploadDate'] = datetime.utcnow().isoformat()
+                meal['ModifiedDate'] = menu.timestamp()
                 
                 meals_client.update_entity(meal)
+                updated_meals.append(meal)
                 processed_count += 1
                 print(f"   ✅ Updated meal record with blob URL")
             else:
@@ -258,6 +265,8 @@ class AzureBlobImageManager:
             # Small delay to be nice to servers
             time.sleep(0.2)
         
+        self.publish_meals(updated_meals)
+        
         print(f"\n" + "=" * 60)
         print(f"📊 PROCESSING COMPLETE")
         print(f"✅ Successfully processed: {processed_count} meals")
@@ -265,6 +274,67 @@ class AzureBlobImageManager:
         
         return processed_count
     
+    def publish_meals(self, meals):
+        """Copy updated meals into the area menus and their change logs"""
+        if not meals:
+            return
+        if menu.publish_or_fall_back(self.table_service, meals) is None:
+            print("⚠️  Area menus could not be updated; their areas are served from Meals "
+                  "until rebuild_menus.py is run")
+        else:
+            print(f"📰 Published {len(meals)} meals to the area menus")
+    
+    def repair_broken_images(self, report_path='broken_images.json'):
+        """Re-upload images for the meals listed in a verify_images.py report"""
+        print("\n🛠️ Repairing broken meal images...")
+        print("=" * 60)
+        
+        with open(report_path) as f:
+            broken = json.load(f)
+        
+        meals_client = self.table_service.get_table_client('Meals')
+        repaired_count = 0
+        failed_count = 0
+        repaired_meals = []
+        
+        for entry in broken:
+            print(f"\n❌ {entry['url'][:60]}... ({entry.get('status') or entry.get('error')})")
+            
+            for meal in entry['meals']:
+                meal_name = meal.get('Name') or f"Meal_{meal['RowKey'][:8]}"
+                category = meal.get('Category', 'Main Course')
+                
+                image_url = self.get_image_for_meal(meal_name, category)
+                blob_name = f"meals/{category.lower().replace(' ', '-')}/{meal['RowKey']}.jpg"
+                
+                blob_url = self.download_and_upload_image(
+                    image_url=image_url,
+                    container_name='meal-images',
+                    blob_name=blob_name
+                )
+                
+                if blob_url:
+                    meals_client.update_entity({
+                        'PartitionKey': meal['PartitionKey'],
+                        'RowKey': meal['RowKey'],
+                        'ImageUrl': blob_url,
+                        'ImageBlobPath': blob_name,
+                        'ImageUploadDate': datetime.utcnow().isoformat(),
+                        'ModifiedDate': menu.timestamp()
+                    }, mode=UpdateMode.MERGE)
+                    repaired_meals.append(meals_client.get_entity(meal['PartitionKey'], meal['RowKey']))
+                    repaired_count += 1
+                else:
+                    failed_count += 1
+        
+        self.publish_meals(repaired_meals)
+        
+        print(f"\n" + "=" * 60)
+        print(f"✅ Repaired: {repaired_count} meals")
+        print(f"❌ Failed: {failed_count} meals")
+        
+        return repaired_count
+    
     def verify_blob_storage(self):
         """Verify blob storage contents"""
         print("\n🔍 Verifying Blob Storage...")
@@ -373,11 +443,15 @@ def main():
         print("\n📋 Choose processing mode:")
         print("1. Process ALL meals (may take a few minutes)")
         print("2. Process SAMPLE of 20 meals (for testing)")
+        print("3. Repair broken images from a verify_images.py report")
         
-        choice = input("\nSelect option (1 or 2): ").strip()
+        choice = input("\nSelect option (1, 2 or 3): ").strip()
         
         if choice == '2':
             processed = manager.process_meals(sample_size=20)
+        elif choice == '3':
+            report_path = input("Report file [broken_images.json]: ").strip() or 'broken_images.json'
+            processed = manager.repair_broken_images(report_path)
         else:
             processed = manager.process_meals()
         
@@ -4,19 +4,23 @@ Simple script to create tables and populate with realistic data
 """
 
 import os
-from azure.data.tables import TableServiceClient
+import sys
 from azure.core.exceptions import ResourceExistsError
 from faker import Faker
 import uuid
 import random
 from datetime import datetime
 
+# Make the function app's shared_code package importable from this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared_code import menu, restaurants, storage
+
 class AzureTableSetup:
     def __init__(self, connection_string):
         """Initialize with your Azure Storage connection string"""
         print("🔧 Initializing Azure Table setup...")
         self.connection_string = connection_string
-        self.table_service = TableServiceClient.from_connection_string(connection_string)
+        self.table_service = storage.table_service_from_connection_string(connection_string)
         self.fake = Faker()
         
         # Define 3 delivery areas (minimum requirement)
@@ -70,7 +74,7 @@ class AzureTableSetup:
     def create_tables(self):
         """Create the necessary tables in Azure Table Storage"""
         print("\n📊 CREATING TABLES...")
-        tables = ['Restaurants', 'Meals', 'Orders']
+        tables = ['Restaurants', 'RestaurantIndex', 'Meals', 'MealsByArea', 'MealChanges', 'CatalogVersions', 'Orders', 'OrderNumberIndex', 'OrdersByCustomer', 'OrdersByRestaurant', 'OrderStats', 'MealSketches']
         
         for table_name in tables:
             try:
@@ -199,7 +203,13 @@ class AzureTableSetup:
             
             print(f"   Added {len(restaurants_in_area)} restaurants with meals")
         
-        # Step 4: Print summary
+        # Step 4: Build each area's menu in the MealsByArea read model
+        area_rows = menu.rebuild_area_model(self.table_service, meals_client.list_entities())
+        print(f"\n🗺️  Published {area_rows} area menu rows")
+        indexed = restaurants.rebuild_index(self.table_service, restaurants_client.list_entities())
+        print(f"🔎 Indexed {indexed} restaurants")
+        
+        # Step 5: Print summary
         print("\n" + "=" * 50)
         print("📊 DATA SEEDING COMPLETE")
         print("=" * 50)
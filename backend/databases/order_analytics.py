@@ -0,0 +1,391 @@
+"""
+ORDER ANALYTICS
+Vectorized order statistics over the Orders table using pandas/NumPy
+
+pandas is a dependency of these maintenance scripts only, installed from
+environment.yml; the function app's requirements.txt does not carry it.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Make the function app's shared_code package importable from this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared_code import storage
+
+# Only the columns the metrics need are pulled from Table Storage
+ORDER_COLUMNS = [
+    'RowKey', 'Area', 'TotalCost', 'TotalPreparationTime',
+    'EstimatedDeliveryTime', 'OrderDate', 'Status', 'Meals'
+]
+
+PERCENTILES = [50, 90, 95, 99]
+
+
+def load_orders(entities, chunk_size=100000):
+    """
+    Load streamed order entities into column arrays.
+
+    Returns (orders, lines): one row per order and one row per exploded
+    `Meals` line item. Entities are consumed in chunks so the raw dicts
+    never have to be held in memory all at once.
+    """
+    order_chunks = []
+    line_chunks = []
+    offset = 0
+
+    columns = _new_columns()
+    for entity in entities:
+        _append_order(columns, entity, offset + len(columns['area']))
+        if len(columns['area']) >= chunk_size:
+            orders, lines = _columns_to_frames(columns)
+            order_chunks.append(orders)
+            line_chunks.append(lines)
+            offset += len(orders)
+            columns = _new_columns()
+
+    orders, lines = _columns_to_frames(columns)
+    order_chunks.append(orders)
+    line_chunks.append(lines)
+
+    orders = pd.concat(order_chunks, ignore_index=True)
+    lines = pd.concat(line_chunks, ignore_index=True)
+    return orders, lines
+
+
+def _new_columns():
+    return {
+        'order_id': [], 'area': [], 'total_cost': [], 'prep_time': [],
+        'eta': [], 'order_date': [], 'status': [], 'unreadable_lines': [],
+        'line_order': [], 'line_meal_id': [], 'line_name': [],
+        'line_restaurant': [], 'line_quantity': [], 'line_price': []
+    }
+
+
+def _append_order(columns, order, index):
+    """Append one order entity (and its line items) to the column lists."""
+    columns['order_id'].append(order.get('RowKey', ''))
+    columns['area'].append(order.get('Area', 'Unknown'))
+    columns['total_cost'].append(order.get('TotalCost', 0) or 0)
+    columns['prep_time'].append(order.get('TotalPreparationTime', 0) or 0)
+    columns['eta'].append(order.get('EstimatedDeliveryTime', 0) or 0)
+    columns['order_date'].append(order.get('OrderDate', ''))
+    columns['status'].append(order.get('Status', 'Unknown'))
+
+    try:
+        meals = json.loads(order.get('Meals', '[]'))
+    except (TypeError, json.JSONDecodeError):
+        meals = []
+    if not isinstance(meals, list):
+        meals = [meals]
+
+    # Lines that are not objects or carry no numeric quantity/price are
+    # skipped and counted, as verify_integrity reports them
+    unreadable = 0
+    for meal in meals:
+        if not isinstance(meal, dict):
+            unreadable += 1
+            continue
+        try:
+            quantity = int(meal.get('quantity', 1) or 0)
+            price = float(meal.get('price', 0) or 0)
+        except (TypeError, ValueError):
+            unreadable += 1
+            continue
+        columns['line_order'].append(index)
+        columns['line_meal_id'].append(meal.get('mealId', ''))
+        columns['line_name'].append(meal.get('name', 'Unknown'))
+        columns['line_restaurant'].append(meal.get('restaurantName', 'Unknown'))
+        columns['line_quantity'].append(quantity)
+        columns['line_price'].append(price)
+    columns['unreadable_lines'].append(unreadable)
+
+
+def _columns_to_frames(columns):
+    orders = pd.DataFrame({
+        'order_id': columns['order_id'],
+        'area': pd.Categorical(columns['area']),
+        'total_cost': np.asarray(columns['total_cost'], dtype=np.float64),
+        'prep_time': np.asarray(columns['prep_time'], dtype=np.float64),
+        'eta': np.asarray(columns['eta'], dtype=np.float64),
+        'order_date': pd.to_datetime(columns['order_date'], format='ISO8601', errors='coerce'),
+        'status': pd.Categorical(columns['status']),
+        'unreadable_lines': np.asarray(columns['unreadable_lines'], dtype=np.int64)
+    })
+    lines = pd.DataFrame({
+        'order': np.asarray(columns['line_order'], dtype=np.int64),
+        'meal_id': columns['line_meal_id'],
+        'name': columns['line_name'],
+        'restaurant': columns['line_restaurant'],
+        'quantity': np.asarray(columns['line_quantity'], dtype=np.int64),
+        'price': np.asarray(columns['line_price'], dtype=np.float64)
+    })
+    return orders, lines
+
+
+def compute_metrics(orders, lines, top_n=10):
+    """
+    Compute the fixed order metric set from the loaded column arrays.
+    Every aggregate is a groupby/bincount over whole columns.
+    """
+    order_count = len(orders)
+    total_revenue = float(orders['total_cost'].sum())
+
+    metrics = {
+        'orderCount': order_count,
+        'totalRevenue': round(total_revenue, 2),
+        'averageOrderValue': round(total_revenue / order_count, 2) if order_count else 0.0,
+        'byArea': _group_counts(orders, 'area'),
+        'byStatus': orders['status'].value_counts(sort=False).sort_index().astype(int).to_dict(),
+        'byDay': {},
+        'byHour': {},
+        'firstOrder': None,
+        'latestOrder': None,
+        'prepTimePercentiles': _percentiles(orders['prep_time']),
+        'etaPercentiles': _percentiles(orders['eta']),
+        'topMeals': [],
+        'topRestaurants': [],
+        'averageBasketSize': 0.0,
+        'averageLinesPerOrder': 0.0,
+        'unreadableLines': int(orders['unreadable_lines'].sum())
+    }
+
+    dated = orders[orders['order_date'].notna()]
+    if len(dated):
+        days = dated['order_date'].dt.strftime('%Y-%m-%d')
+        metrics['byDay'] = _group_counts(dated.assign(day=days), 'day')
+
+        hours = dated['order_date'].dt.hour.to_numpy()
+        hour_counts = np.bincount(hours, minlength=24)
+        hour_revenue = np.bincount(hours, weights=dated['total_cost'].to_numpy(), minlength=24)
+        metrics['byHour'] = {
+            f"{hour:02d}": {'orders': int(hour_counts[hour]), 'revenue': round(float(hour_revenue[hour]), 2)}
+            for hour in np.flatnonzero(hour_counts)
+        }
+        metrics['firstOrder'] = dated['order_date'].min().isoformat()
+        metrics['latestOrder'] = dated['order_date'].max().isoformat()
+
+    if len(lines):
+        lines = lines.assign(revenue=lines['quantity'] * lines['price'])
+
+        meals = lines.groupby('meal_id', sort=False).agg(
+            name=('name', 'first'),
+            quantity=('quantity', 'sum'),
+            revenue=('revenue', 'sum')
+        )
+        metrics['topMeals'] = _top_rows(meals, top_n, 'mealId')
+
+        restaurants = lines.groupby('restaurant', sort=False).agg(
+            quantity=('quantity', 'sum'),
+            revenue=('revenue', 'sum')
+        )
+        metrics['topRestaurants'] = _top_rows(restaurants, top_n, 'restaurantName')
+
+        if order_count:
+            items = np.bincount(lines['order'].to_numpy(), weights=lines['quantity'].to_numpy(),
+                                minlength=order_count)
+            line_counts = np.bincount(lines['order'].to_numpy(), minlength=order_count)
+            metrics['averageBasketSize'] = round(float(items.mean()), 2)
+            metrics['averageLinesPerOrder'] = round(float(line_counts.mean()), 2)
+
+    return metrics
+
+
+def _group_counts(frame, column):
+    grouped = frame.groupby(column, observed=True, sort=True)['total_cost'].agg(['size', 'sum'])
+    return {
+        str(key): {'orders': int(row['size']), 'revenue': round(float(row['sum']), 2)}
+        for key, row in grouped.iterrows()
+    }
+
+
+def _percentiles(series):
+    values = series.to_numpy()
+    if not len(values):
+        return {f"p{p}": 0.0 for p in PERCENTILES}
+    results = np.percentile(values, PERCENTILES)
+    return {f"p{p}": round(float(v), 1) for p, v in zip(PERCENTILES, results)}
+
+
+def _top_rows(grouped, top_n, key_name):
+    top = grouped.nlargest(top_n, 'quantity')
+    rows = []
+    for key, row in top.iterrows():
+        item = {key_name: key}
+        if 'name' in row:
+            item['name'] = row['name']
+        item['quantity'] = int(row['quantity'])
+        item['revenue'] = round(float(row['revenue']), 2)
+        rows.append(item)
+    return rows
+
+
+def print_metrics(metrics, include_summary=True):
+    """
+    Print the metric set in the same layout as the order viewer.
+    `include_summary=False` skips the area/status/revenue totals that the
+    OrderStats rollup already provides.
+    """
+    if include_summary:
+        print(f"\nOrders by Area:")
+        for area, values in metrics['byArea'].items():
+            print(f"   {area}: {values['orders']} order(s), ${values['revenue']:.2f}")
+
+        print(f"\nOrders by Status:")
+        for status, count in metrics['byStatus'].items():
+            print(f"   {status}: {count} order(s)")
+
+        print(f"\nTotal Revenue: ${metrics['totalRevenue']:.2f}")
+        print(f"Average Order Value: ${metrics['averageOrderValue']:.2f}")
+
+    print(f"\nAverage Basket Size: {metrics['averageBasketSize']:.2f} item(s)")
+    if metrics['unreadableLines']:
+        print(f"Skipped {metrics['unreadableLines']} unreadable line item(s)")
+
+    prep = metrics['prepTimePercentiles']
+    eta = metrics['etaPercentiles']
+    print(f"\nPreparation Time (min): " + ", ".join(f"{k} {v}" for k, v in prep.items()))
+    print(f"Estimated Delivery (min): " + ", ".join(f"{k} {v}" for k, v in eta.items()))
+
+    if metrics['byDay']:
+        print(f"\nOrders by Day:")
+        for day, values in metrics['byDay'].items():
+            print(f"   {day}: {values['orders']} order(s), ${values['revenue']:.2f}")
+
+    if metrics['byHour']:
+        print(f"\nOrders by Hour:")
+        for hour, values in metrics['byHour'].items():
+            print(f"   {hour}:00  {values['orders']} order(s), ${values['revenue']:.2f}")
+
+    if metrics['topMeals']:
+        print(f"\nTop Meals:")
+        for i, meal in enumerate(metrics['topMeals'], 1):
+            print(f"   {i}. {meal['name']} - {meal['quantity']} sold, ${meal['revenue']:.2f}")
+
+    if metrics['topRestaurants']:
+        print(f"\nTop Restaurants:")
+        for i, restaurant in enumerate(metrics['topRestaurants'], 1):
+            print(f"   {i}. {restaurant['restaurantName']} - {restaurant['quantity']} item(s), "
+                  f"${restaurant['revenue']:.2f}")
+
+    if include_summary and metrics['firstOrder']:
+        print(f"\nDate Range:")
+        print(f"   First Order: {metrics['firstOrder']}")
+        print(f"   Latest Order: {metrics['latestOrder']}")
+
+
+def synthetic_orders(count, seed=42):
+    """Generate order entities shaped like the ones submitorder writes."""
+    rng = random.Random(seed)
+    areas = ['Central', 'North', 'South', 'East', 'West']
+    statuses = ['Pending', 'Preparing', 'Delivered']
+    restaurants = [f"Restaurant {i}" for i in range(40)]
+    meals = [(str(uuid.UUID(int=rng.getrandbits(128))), f"Meal {i}", round(rng.uniform(5, 25), 2),
+              rng.choice([10, 15, 20, 25, 30]), restaurants[i % len(restaurants)]) for i in range(250)]
+    start = datetime(2025, 1, 1)
+
+    for _ in range(count):
+        lines = []
+        for meal_id, name, price, prep, restaurant in rng.sample(meals, rng.randint(1, 4)):
+            lines.append({
+                'mealId': meal_id,
+                'name': name,
+                'price': price,
+                'quantity': rng.randint(1, 3),
+                'preparationTime': prep,
+                'restaurantName': restaurant
+            })
+        total_prep = sum(line['preparationTime'] * line['quantity'] for line in lines)
+        yield {
+            'RowKey': str(uuid.UUID(int=rng.getrandbits(128))),
+            'Area': rng.choice(areas),
+            'TotalCost': sum(line['price'] * line['quantity'] for line in lines),
+            'TotalPreparationTime': total_prep,
+            'EstimatedDeliveryTime': total_prep + 30,
+            'OrderDate': (start + timedelta(seconds=rng.randint(0, 90 * 86400))).isoformat(),
+            'Status': rng.choice(statuses),
+            'Meals': json.dumps(lines)
+        }
+
+
+def _loop_statistics(orders):
+    """The per-order dict loop the order viewer used to run, kept for comparison."""
+    area_counts = {}
+    total_revenue = 0
+    statuses = {}
+    for order in orders:
+        area = order.get('Area', 'Unknown')
+        area_counts[area] = area_counts.get(area, 0) + 1
+        total_revenue += order.get('TotalCost', 0)
+        status = order.get('Status', 'Unknown')
+        statuses[status] = statuses.get(status, 0) + 1
+    return area_counts, total_revenue, statuses
+
+
+def benchmark(sizes):
+    """Time loading and metric computation on synthetic orders of each size."""
+    print("ORDER ANALYTICS BENCHMARK")
+    print("=" * 70)
+    print(f"{'orders':>10} {'generate':>10} {'load':>10} {'metrics':>10} {'loop*':>10}")
+
+    for size in sizes:
+        started = time.perf_counter()
+        entities = list(synthetic_orders(size))
+        generated = time.perf_counter()
+
+        orders, lines = load_orders(entities)
+        loaded = time.perf_counter()
+
+        compute_metrics(orders, lines)
+        computed = time.perf_counter()
+
+        _loop_statistics(entities)
+        looped = time.perf_counter()
+
+        print(f"{size:>10} {generated - started:>9.2f}s {loaded - generated:>9.2f}s "
+              f"{computed - loaded:>9.2f}s {looped - computed:>9.2f}s")
+
+    print("-" * 70)
+    print("* loop = legacy area/status/revenue dict loop (subset of the metrics)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized order analytics")
+    parser.add_argument('--benchmark', nargs='*', type=int, metavar='N',
+                        help="Run on synthetic data of the given sizes instead of the Orders table")
+    parser.add_argument('--json', action='store_true', help="Print the metrics as JSON")
+    args = parser.parse_args()
+
+    if args.benchmark is not None:
+        benchmark(args.benchmark or [10000, 100000, 1000000])
+        return
+
+    connection_string = input("Connection string: ").strip()
+    if not connection_string:
+        print("Error: No connection string provided")
+        return
+
+    table_service = storage.table_service_from_connection_string(connection_string)
+    orders_table = table_service.get_table_client('Orders')
+    orders, lines = load_orders(orders_table.list_entities(select=ORDER_COLUMNS))
+    metrics = compute_metrics(orders, lines)
+
+    if args.json:
+        print(json.dumps(metrics, indent=2))
+    else:
+        print("ORDER STATISTICS")
+        print("=" * 70)
+        print_metrics(metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+REBUILD AREA MENUS
+Backfill the MealsByArea read model and the RestaurantIndex table
+
+Meals registered before the read model existed are only in Meals. This
+scans Meals once (partition ranges in parallel), rewrites every area's
+MealsByArea partition and marks the areas complete, after which getMeals
+serves them from the read model. Every restaurant in Restaurants is also
+indexed by id and name. Safe to re-run at any time:
+
+    python rebuild_menus.py --connection-string "..."
+
+With --prune it instead only removes MealChanges entries older than
+MENU_CHANGE_RETENTION_DAYS (default 7) from every area in
+CatalogVersions. Run it daily with the function app's setting, since
+mealChanges answers from the log for exactly that long:
+
+    python rebuild_menus.py --prune
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from table_scan import get_connection_string, key_range_filters, parallel_scan, partition_filters
+
+# Make the function app's shared_code package importable from this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared_code import menu, restaurants, storage
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the MealsByArea read model and the restaurant index")
+    parser.add_argument('--connection-string',
+                        help="Storage connection string (default: AzureStorageConnectionString, "
+                             "AzureWebJobsStorage or AZURE_STORAGE_CONNECTION_STRING)")
+    parser.add_argument('--workers', type=int, default=16, help="Concurrent partition range queries")
+    parser.add_argument('--prune', action='store_true',
+                        help="Only prune change log entries older than MENU_CHANGE_RETENTION_DAYS")
+    args = parser.parse_args()
+
+    connection_string = get_connection_string(args.connection_string)
+    if not connection_string:
+        print("Error: No connection string provided")
+        sys.exit(2)
+
+    started = time.perf_counter()
+    table_service = storage.table_service_from_connection_string(connection_string)
+    if args.prune:
+        pruned = {area: menu.prune_changes(table_service, area) for area in menu.list_areas(table_service)}
+        print(json.dumps({
+            'retentionDays': menu.CHANGE_RETENTION_DAYS,
+            'prunedChanges': pruned,
+            'elapsedSeconds': round(time.perf_counter() - started, 3)
+        }, indent=2))
+        return
+
+    meals_table = table_service.get_table_client(menu.MEALS_TABLE)
+    meals = [meal for part in parallel_scan(meals_table, key_range_filters(), list, workers=args.workers)
+             for meal in part]
+    rows = menu.rebuild_area_model(table_service, meals)
+
+    # Restaurants are partitioned by area; the published areas split the scan
+    restaurants_table = table_service.get_table_client(restaurants.RESTAURANTS_TABLE)
+    restaurant_count = sum(restaurants.rebuild_index(table_service, part) for part in parallel_scan(
+        restaurants_table, partition_filters(menu.list_areas(table_service)), list, workers=args.workers))
+
+    print(json.dumps({
+        'meals': len(meals),
+        'areaRows': rows,
+        'restaurants': restaurant_count,
+        'elapsedSeconds': round(time.perf_counter() - started, 3)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
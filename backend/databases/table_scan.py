@@ -0,0 +1,57 @@
+"""
+PARALLEL TABLE SCANS
+Split a table scan into PartitionKey ranges and run them concurrently
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Boundaries for lowercase uuid partition keys (Meals are keyed by restaurant id)
+HEX_BOUNDARIES = list('123456789abcdef')
+
+
+def get_connection_string(cli_value=None):
+    """Connection string from the command line or the usual environment variables."""
+    return (cli_value
+            or os.getenv('AzureStorageConnectionString')
+            or os.getenv('AzureWebJobsStorage')
+            or os.getenv('AZURE_STORAGE_CONNECTION_STRING'))
+
+
+def key_range_filters(boundaries=HEX_BOUNDARIES):
+    """
+    OData filters that together cover every PartitionKey exactly once.
+    ['1', '2'] -> PK < '1', '1' <= PK < '2', PK >= '2'
+    """
+    filters = [f"PartitionKey lt '{boundaries[0]}'"]
+    for low, high in zip(boundaries, boundaries[1:]):
+        filters.append(f"PartitionKey ge '{low}' and PartitionKey lt '{high}'")
+    filters.append(f"PartitionKey ge '{boundaries[-1]}'")
+    return filters
+
+
+def partition_filters(partition_keys):
+    """
+    One equality filter per known partition plus one for everything else,
+    e.g. area-partitioned tables where most rows sit in a few known areas.
+    """
+    filters = [f"PartitionKey eq '{key}'" for key in partition_keys]
+    filters.append(" and ".join(f"PartitionKey ne '{key}'" for key in partition_keys))
+    return filters
+
+
+def parallel_scan(table_client, filters, consume, select=None, workers=16):
+    """
+    Run one query per filter concurrently and hand each result stream to
+    `consume(entities)`. Returns the consumers' results in filter order.
+    Each range is consumed as it streams in, so no worker holds its rows.
+    """
+    def run(query_filter):
+        if query_filter:
+            entities = table_client.query_entities(query_filter, select=select)
+        else:
+            entities = table_client.list_entities(select=select)
+        return consume(entities)
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(filters))) as executor:
+        return list(executor.map(run, filters))
@@ -1,115 +1,185 @@
 """
 QUICK VERIFICATION SCRIPT
-Run this to check your data without clicking in Azure Portal
+Check the seeded catalog without clicking in Azure Portal
+
+Scans Restaurants and Meals once each, with the partition ranges read in
+parallel and only the needed columns selected, and prints a JSON report.
+Exits with status 1 when a requirement is not met, so it can gate CI:
+
+    python verify_data.py --connection-string "..." > report.json
 """
 
-from azure.data.tables import TableServiceClient
-
-def verify_data():
-    print("🔍 QUICK DATA VERIFICATION")
-    print("=" * 50)
-    
-    # Get your connection string
-    print("\n📋 Step 1: Enter your connection string")
-    print("(From Azure Portal → Storage Account → Access Keys)")
-    connection_string = input("Connection string: ").strip()
-    
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+from table_scan import get_connection_string, key_range_filters, parallel_scan, partition_filters
+
+# Make the function app's shared_code package importable from this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared_code import storage
+
+AREAS = ['Central', 'North', 'South']
+MIN_RESTAURANTS = 30
+MIN_MEALS = 150
+MIN_RESTAURANTS_PER_AREA = 10
+SAMPLE_SIZE = 5
+
+RESTAURANT_COLUMNS = ['PartitionKey', 'RowKey', 'Name', 'CuisineType', 'IsActive']
+MEAL_COLUMNS = ['PartitionKey', 'Name', 'Price', 'Category', 'IsAvailable', 'IsVegetarian',
+                'DeliveryArea', 'RestaurantName']
+
+
+def _count_restaurants(entities):
+    counts = {'total': 0, 'active': 0, 'byArea': Counter(), 'byCuisine': Counter(), 'samples': {}}
+    for restaurant in entities:
+        area = restaurant.get('PartitionKey', 'Unknown')
+        counts['total'] += 1
+        if restaurant.get('IsActive', False):
+            counts['active'] += 1
+            counts['byArea'][area] += 1
+            counts['byCuisine'][restaurant.get('CuisineType', 'Unknown')] += 1
+        counts['samples'].setdefault(area, restaurant.get('Name', 'No name'))
+    return counts
+
+
+def _count_meals(entities):
+    counts = {'total': 0, 'available': 0, 'vegetarian': 0, 'byCategory': Counter(),
+              'byArea': Counter(), 'restaurants': set(), 'samples': []}
+    for meal in entities:
+        counts['total'] += 1
+        if not meal.get('IsAvailable', False):
+            continue
+        counts['available'] += 1
+        counts['byCategory'][meal.get('Category', 'Unknown')] += 1
+        counts['byArea'][meal.get('DeliveryArea', 'Unknown')] += 1
+        counts['restaurants'].add(meal.get('PartitionKey'))
+        if meal.get('IsVegetarian', False):
+            counts['vegetarian'] += 1
+        if len(counts['samples']) < SAMPLE_SIZE:
+            counts['samples'].append({
+                'name': meal.get('Name', 'No name'),
+                'price': float(meal.get('Price', 0)),
+                'restaurant': meal.get('RestaurantName', 'Unknown'),
+                'area': meal.get('DeliveryArea', 'Unknown')
+            })
+    return counts
+
+
+def _combine(partials, set_keys=(), list_keys=(), dict_keys=()):
+    combined = {}
+    for partial in partials:
+        for key, value in partial.items():
+            if key in set_keys:
+                combined.setdefault(key, set()).update(value)
+            elif key in list_keys:
+                combined.setdefault(key, []).extend(value)
+            elif key in dict_keys:
+                for inner, inner_value in value.items():
+                    combined.setdefault(key, {}).setdefault(inner, inner_value)
+            elif isinstance(value, Counter):
+                combined.setdefault(key, Counter()).update(value)
+            else:
+                combined[key] = combined.get(key, 0) + value
+    return combined
+
+
+def verify_data(connection_string, areas=AREAS, workers=16):
+    """Scan the catalog once and return the verification report."""
+    started = time.perf_counter()
+
+    table_service = storage.table_service_from_connection_string(connection_string)
+    restaurants_client = table_service.get_table_client('Restaurants')
+    meals_client = table_service.get_table_client('Meals')
+
+    restaurants = _combine(
+        parallel_scan(restaurants_client, partition_filters(areas), _count_restaurants,
+                      select=RESTAURANT_COLUMNS, workers=workers),
+        dict_keys=('samples',)
+    )
+    meals = _combine(
+        parallel_scan(meals_client, key_range_filters(), _count_meals,
+                      select=MEAL_COLUMNS, workers=workers),
+        set_keys=('restaurants',), list_keys=('samples',)
+    )
+
+    restaurants_by_area = restaurants.get('byArea', Counter())
+    checks = {
+        'minRestaurants': {
+            'required': MIN_RESTAURANTS,
+            'actual': restaurants.get('active', 0),
+            'passed': restaurants.get('active', 0) >= MIN_RESTAURANTS
+        },
+        'minMeals': {
+            'required': MIN_MEALS,
+            'actual': meals.get('available', 0),
+            'passed': meals.get('available', 0) >= MIN_MEALS
+        }
+    }
+    for area in areas:
+        checks[f"minRestaurants:{area}"] = {
+            'required': MIN_RESTAURANTS_PER_AREA,
+            'actual': restaurants_by_area.get(area, 0),
+            'passed': restaurants_by_area.get(area, 0) >= MIN_RESTAURANTS_PER_AREA
+        }
+
+    return {
+        'passed': all(check['passed'] for check in checks.values()),
+        'checks': checks,
+        'restaurants': {
+            'total': restaurants.get('total', 0),
+            'active': restaurants.get('active', 0),
+            'byArea': dict(sorted(restaurants_by_area.items())),
+            'byCuisine': dict(restaurants.get('byCuisine', Counter()).most_common()),
+            'samples': restaurants.get('samples', {})
+        },
+        'meals': {
+            'total': meals.get('total', 0),
+            'available': meals.get('available', 0),
+            'vegetarian': meals.get('vegetarian', 0),
+            'restaurantsWithMeals': len(meals.get('restaurants', set())),
+            'byCategory': dict(meals.get('byCategory', Counter()).most_common()),
+            'byArea': dict(sorted(meals.get('byArea', Counter()).items())),
+            'samples': meals.get('samples', [])[:SAMPLE_SIZE]
+        },
+        'elapsedSeconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify the seeded restaurant and meal catalog")
+    parser.add_argument('--connection-string',
+                        help="Storage connection string (default: AzureStorageConnectionString, "
+                             "AzureWebJobsStorage or AZURE_STORAGE_CONNECTION_STRING)")
+    parser.add_argument('--areas', default=','.join(AREAS),
+                        help="Comma-separated delivery areas that need 10+ restaurants")
+    parser.add_argument('--workers', type=int, default=16, help="Concurrent partition range queries")
+    parser.add_argument('--output', help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    connection_string = get_connection_string(args.connection_string)
     if not connection_string:
-        print("❌ No connection string provided")
-        return
-    
+        print(json.dumps({'passed': False, 'error': 'No connection string provided'}))
+        sys.exit(2)
+
     try:
-        # Connect to tables
-        table_service = TableServiceClient.from_connection_string(connection_string)
-        
-        # Get table clients
-        restaurants_client = table_service.get_table_client('Restaurants')
-        meals_client = table_service.get_table_client('Meals')
-        
-        print("\n✅ Connection successful!")
-        
-        # Count restaurants by area
-        print("\n📊 RESTAURANT COUNT BY AREA:")
-        areas = ['Central', 'North', 'South']
-        
-        for area in areas:
-            query = f"PartitionKey eq '{area}'"
-            restaurants = list(restaurants_client.query_entities(query))
-            print(f"  {area}: {len(restaurants)} restaurants")
-            
-            # Show first restaurant in each area
-            if restaurants:
-                first_restaurant = restaurants[0]
-                print(f"    Sample: {first_restaurant.get('Name', 'No name')}")
-        
-        # Count total restaurants
-        all_restaurants = list(restaurants_client.query_entities("IsActive eq true"))
-        print(f"\n📈 TOTAL RESTAURANTS: {len(all_restaurants)}")
-        
-        # Count meals
-        print("\n🍛 MEAL COUNT:")
-        all_meals = list(meals_client.query_entities("IsAvailable eq true"))
-        print(f"  Total Meals: {len(all_meals)}")
-        
-        # Count by category
-        categories = {}
-        for meal in all_meals[:100]:  # Check first 100 meals
-            cat = meal.get('Category', 'Unknown')
-            categories[cat] = categories.get(cat, 0) + 1
-        
-        print("\n📋 MEAL CATEGORIES:")
-        for cat, count in categories.items():
-            print(f"  {cat}: {count} meals")
-        
-        # Show sample meals
-        print("\n🎯 SAMPLE MEALS (first 5):")
-        for i, meal in enumerate(all_meals[:5]):
-            print(f"  {i+1}. {meal.get('Name', 'No name')}")
-            print(f"     Price: ${meal.get('Price', 0):.2f}")
-            print(f"     Restaurant: {meal.get('RestaurantName', 'Unknown')[:30]}...")
-            print(f"     Area: {meal.get('DeliveryArea', 'Unknown')}")
-            print()
-        
-        # Verify requirements
-        print("\n" + "=" * 50)
-        print("✅ REQUIREMENTS VERIFICATION:")
-        
-        total_restaurants = len(all_restaurants)
-        if total_restaurants >= 30:
-            print(f"✓ At least 30 restaurants: {total_restaurants}")
-        else:
-            print(f"✗ Need 30 restaurants, have: {total_restaurants}")
-        
-        total_meals = len(all_meals)
-        if total_meals >= 150:
-            print(f"✓ At least 150 meals: {total_meals}")
-        else:
-            print(f"✗ Need 150 meals, have: {total_meals}")
-        
-        # Check each area has at least 10 restaurants
-        print("\n📍 AREA DISTRIBUTION CHECK:")
-        for area in areas:
-            query = f"PartitionKey eq '{area}'"
-            count = len(list(restaurants_client.query_entities(query)))
-            if count >= 10:
-                print(f"✓ {area}: {count} restaurants (meets 10+ requirement)")
-            else:
-                print(f"✗ {area}: {count} restaurants (needs 10+)")
-        
-        print("\n" + "=" * 50)
-        print("🎉 VERIFICATION COMPLETE!")
-        
-        if total_restaurants >= 30 and total_meals >= 150:
-            print("✅ ALL REQUIREMENTS MET!")
-        else:
-            print("⚠️  Some requirements not met. Run the seeding script again.")
-        
+        report = verify_data(connection_string, [a.strip() for a in args.areas.split(',') if a.strip()],
+                             args.workers)
     except Exception as e:
-        print(f"\n❌ ERROR: {e}")
-        print("\n💡 TROUBLESHOOTING:")
-        print("1. Check connection string format")
-        print("2. Ensure Table Storage is enabled")
-        print("3. Try regenerating access keys")
+        print(json.dumps({'passed': False, 'error': str(e)}))
+        sys.exit(2)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+    sys.exit(0 if report['passed'] else 1)
+
 
 if __name__ == "__main__":
-    verify_data()
\ No newline at end of file
+    main()
@@ -0,0 +1,185 @@
+"""
+IMAGE LINK HEALTH SCAN
+Check every meal ImageUrl concurrently and list the broken ones
+
+Meals are streamed once (parallel partition ranges, projected columns)
+and grouped by ImageUrl, so each distinct URL is probed exactly once.
+Probes run on a bounded thread pool; every thread reuses a pooled
+keep-alive session. Broken links are written to a JSON file that
+blobl.py can use to re-upload the images:
+
+    python verify_images.py --connection-string "..." --broken-out broken_images.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from table_scan import get_connection_string, key_range_filters, parallel_scan
+
+# Make the function app's shared_code package importable from this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared_code import storage
+
+MEAL_COLUMNS = ['PartitionKey', 'RowKey', 'Name', 'Category', 'ImageUrl', 'ImageBlobPath']
+DEFAULT_CONCURRENCY = 32
+DEFAULT_TIMEOUT = 5
+
+_local = threading.local()
+
+
+def _session(concurrency):
+    """One pooled session per worker thread."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=concurrency, max_retries=1)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _local.session = session
+    return session
+
+
+def _source(url):
+    if 'blob.core.windows.net' in url:
+        return 'blob'
+    if 'unsplash.com' in url:
+        return 'unsplash'
+    return 'external'
+
+
+def probe(url, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+    """HEAD the URL (falling back to a streamed GET) and describe the result."""
+    result = {'url': url, 'source': _source(url), 'status': None, 'contentType': None,
+              'size': None, 'elapsedMs': None, 'error': None}
+    started = time.perf_counter()
+    try:
+        session = _session(concurrency)
+        response = session.head(url, timeout=timeout, allow_redirects=True)
+        if response.status_code in (403, 405, 501):
+            # Some hosts refuse HEAD; read just the headers of a GET
+            response = session.get(url, timeout=timeout, allow_redirects=True, stream=True)
+            response.close()
+        result['status'] = response.status_code
+        result['contentType'] = response.headers.get('content-type')
+        length = response.headers.get('content-length')
+        result['size'] = int(length) if length and length.isdigit() else None
+    except requests.RequestException as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['elapsedMs'] = round((time.perf_counter() - started) * 1000, 1)
+    result['broken'] = (
+        result['error'] is not None
+        or result['status'] >= 400
+        or not (result['contentType'] or '').startswith('image/')
+    )
+    return result
+
+
+def _collect_urls(entities):
+    urls = defaultdict(list)
+    scanned = 0
+    without_image = 0
+    for meal in entities:
+        scanned += 1
+        url = (meal.get('ImageUrl') or '').strip()
+        if not url:
+            without_image += 1
+            continue
+        urls[url].append({
+            'PartitionKey': meal['PartitionKey'],
+            'RowKey': meal['RowKey'],
+            'Name': meal.get('Name', ''),
+            'Category': meal.get('Category', 'Main Course')
+        })
+    return urls, scanned, without_image
+
+
+def scan_images(connection_string, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+    """Return (report, broken) where broken lists each bad URL with its meals."""
+    started = time.perf_counter()
+
+    table_service = storage.table_service_from_connection_string(connection_string)
+    meals_client = table_service.get_table_client('Meals')
+
+    urls = defaultdict(list)
+    meal_count = 0
+    without_image = 0
+    for partial, scanned, missing in parallel_scan(meals_client, key_range_filters(), _collect_urls,
+                                                   select=MEAL_COLUMNS):
+        for url, meals in partial.items():
+            urls[url].extend(meals)
+        meal_count += scanned
+        without_image += missing
+    listed = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda url: probe(url, concurrency, timeout), urls))
+
+    broken = [dict(result, meals=urls[result['url']]) for result in results if result['broken']]
+    statuses = Counter(str(result['status'] or 'error') for result in results)
+    content_types = Counter(result['contentType'] or 'unknown' for result in results)
+    sources = Counter(result['source'] for result in results)
+    latencies = sorted(result['elapsedMs'] for result in results)
+
+    report = {
+        'passed': not broken,
+        'meals': meal_count,
+        'mealsWithoutImage': without_image,
+        'mealsWithImage': meal_count - without_image,
+        'distinctUrls': len(urls),
+        'brokenUrls': len(broken),
+        'mealsWithBrokenImage': sum(len(entry['meals']) for entry in broken),
+        'bySource': dict(sources),
+        'byStatus': dict(statuses),
+        'byContentType': dict(content_types.most_common()),
+        'totalBytes': sum(result['size'] or 0 for result in results),
+        'probeLatencyMs': {
+            'p50': latencies[len(latencies) // 2] if latencies else 0,
+            'max': latencies[-1] if latencies else 0
+        },
+        'listSeconds': round(listed - started, 3),
+        'probeSeconds': round(time.perf_counter() - listed, 3)
+    }
+    return report, broken
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check every meal ImageUrl for broken links")
+    parser.add_argument('--connection-string',
+                        help="Storage connection string (default: AzureStorageConnectionString, "
+                             "AzureWebJobsStorage or AZURE_STORAGE_CONNECTION_STRING)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Concurrent probes")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Per-probe timeout in seconds")
+    parser.add_argument('--broken-out', default='broken_images.json',
+                        help="Where to write the broken links for blobl.py to repair")
+    args = parser.parse_args()
+
+    connection_string = get_connection_string(args.connection_string)
+    if not connection_string:
+        print(json.dumps({'passed': False, 'error': 'No connection string provided'}))
+        sys.exit(2)
+
+    try:
+        report, broken = scan_images(connection_string, args.concurrency, args.timeout)
+    except Exception as e:
+        print(json.dumps({'passed': False, 'error': str(e)}))
+        sys.exit(2)
+
+    with open(args.broken_out, 'w') as f:
+        json.dump(broken, f, indent=2)
+    report['brokenReport'] = args.broken_out
+
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report['passed'] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+CROSS-TABLE INTEGRITY CHECK
+Find drift in the fields that Meals and Orders copy from other tables
+
+- Meals copy RestaurantName/RestaurantId (and DeliveryArea for seeded
+  meals) from their restaurant; orphaned meals have no restaurant at all.
+- Orders copy meal names and prices into their Meals JSON and may
+  reference meals that no longer exist.
+
+Each table is streamed once (parallel partition ranges, projected
+columns). Only compact key indexes are kept in memory: restaurant id ->
+(name, area) and meal id (16 packed uuid bytes) -> (name, price).
+With --repair, drifted meal fields are fixed with batched MERGE upserts,
+one transaction per 100 meals of a restaurant partition. Repaired (and,
+with --disable-orphans, disabled) meals are then re-read and published
+to MealsByArea, so the menus and their change logs see the fix.
+
+    python verify_integrity.py --connection-string "..." [--repair] [--disable-orphans]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from azure.data.tables import UpdateMode
+
+from table_scan import get_connection_string, key_range_filters, parallel_scan, partition_filters
+
+# Make the function app's shared_code package importable from this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared_code import menu, storage
+
+AREAS = ['Central', 'North', 'South']
+BATCH_SIZE = 100
+SAMPLE_SIZE = 10
+PRICE_TOLERANCE = 0.005
+
+RESTAURANT_COLUMNS = ['PartitionKey', 'RowKey', 'Name']
+MEAL_COLUMNS = ['PartitionKey', 'RowKey', 'Name', 'Price', 'RestaurantName', 'RestaurantId',
+                'DeliveryArea', 'DeliveryAreas', 'IsAvailable']
+ORDER_COLUMNS = ['PartitionKey', 'RowKey', 'OrderNumber', 'Meals']
+
+
+def _pack_id(value):
+    """uuid strings become 16 bytes; anything else is kept (interned) as-is."""
+    try:
+        return uuid.UUID(value).bytes
+    except (AttributeError, TypeError, ValueError):
+        return sys.intern(str(value))
+
+
+class BatchWriter:
+    """Collect entity patches per partition and flush them as transactions."""
+
+    def __init__(self, table_client, enabled):
+        self.table_client = table_client
+        self.enabled = enabled
+        self.pending = defaultdict(list)
+        self.lock = threading.Lock()
+        self.written_keys = []
+        self.failed = 0
+
+    @property
+    def written(self):
+        return len(self.written_keys)
+
+    def add(self, patch):
+        if not self.enabled:
+            return
+        with self.lock:
+            batch = self.pending[patch['PartitionKey']]
+            batch.append(patch)
+            if len(batch) < BATCH_SIZE:
+                return
+            del self.pending[patch['PartitionKey']]
+        self._submit(batch)
+
+    def flush(self):
+        with self.lock:
+            batches = list(self.pending.values())
+            self.pending.clear()
+        for batch in batches:
+            self._submit(batch)
+
+    def _submit(self, batch):
+        operations = [('upsert', patch, {'mode': UpdateMode.MERGE}) for patch in batch]
+        try:
+            self.table_client.submit_transaction(operations)
+            with self.lock:
+                self.written_keys.extend((patch['PartitionKey'], patch['RowKey']) for patch in batch)
+        except Exception as e:
+            print(f"Repair batch for {batch[0]['PartitionKey']} failed: {e}", file=sys.stderr)
+            with self.lock:
+                self.failed += len(batch)
+
+
+class Findings:
+    """Thread-safe issue counters with a few samples of each kind."""
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.samples = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def add(self, kind, sample):
+        with self.lock:
+            self.counts[kind] += 1
+            if len(self.samples[kind]) < SAMPLE_SIZE:
+                self.samples[kind].append(sample)
+
+    def as_dict(self):
+        return {kind: {'count': self.counts[kind], 'samples': self.samples[kind]}
+                for kind in sorted(self.counts)}
+
+
+def _index_restaurants(entities):
+    index = {}
+    for restaurant in entities:
+        index[_pack_id(restaurant['RowKey'])] = (
+            sys.intern(restaurant.get('Name', '')),
+            sys.intern(restaurant.get('PartitionKey', ''))
+        )
+    return index
+
+
+def publish_repairs(table_service, meals_client, keys, moved, workers=16):
+    """
+    Re-read repaired meals and publish them to their areas' menus, a
+    chunk at a time. Returns how many were published; a chunk that fails
+    leaves its areas served from Meals until rebuild_menus.py is run.
+    """
+    published = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(keys), menu.BATCH_SIZE * 10):
+            chunk = keys[start:start + menu.BATCH_SIZE * 10]
+            meals = list(pool.map(lambda key: meals_client.get_entity(*key), chunk))
+            removed = [(moved[key], key[1]) for key in chunk if key in moved]
+            if menu.publish_or_fall_back(table_service, meals, removed, workers) is None:
+                print(f"Publishing {len(chunk)} repaired meals failed; their areas are served from Meals "
+                      f"until rebuild_menus.py is run", file=sys.stderr)
+            else:
+                published += len(chunk)
+    return published
+
+
+def check_integrity(connection_string, areas=AREAS, repair=False, disable_orphans=False, workers=16):
+    """Stream Restaurants, Meals and Orders and return the integrity report."""
+    started = time.perf_counter()
+
+    table_service = storage.table_service_from_connection_string(connection_string)
+    restaurants_client = table_service.get_table_client('Restaurants')
+    meals_client = table_service.get_table_client('Meals')
+    orders_client = table_service.get_table_client('Orders')
+
+    findings = Findings()
+    writer = BatchWriter(meals_client, repair or disable_orphans)
+    moved = {}  # (PartitionKey, RowKey) -> DeliveryArea before the repair
+
+    # 1. Restaurants -> id index
+    restaurants = {}
+    for partial in parallel_scan(restaurants_client, partition_filters(areas), _index_restaurants,
+                                 select=RESTAURANT_COLUMNS, workers=workers):
+        restaurants.update(partial)
+
+    # 2. Meals -> check against restaurants, build meal index
+    def check_meals(entities):
+        index = {}
+        scanned = 0
+        for meal in entities:
+            scanned += 1
+            meal_key = {'PartitionKey': meal['PartitionKey'], 'RowKey': meal['RowKey']}
+            index[_pack_id(meal['RowKey'])] = (sys.intern(meal.get('Name', '')), float(meal.get('Price', 0)))
+
+            restaurant = restaurants.get(_pack_id(meal['PartitionKey']))
+            if restaurant is None:
+                findings.add('orphanedMeals', dict(meal_key, name=meal.get('Name')))
+                if disable_orphans and meal.get('IsAvailable', False):
+                    writer.add(dict(meal_key, IsAvailable=False, ModifiedDate=menu.timestamp()))
+                continue
+
+            restaurant_name, restaurant_area = restaurant
+            patch = {}
+            if meal.get('RestaurantName') != restaurant_name:
+                patch['RestaurantName'] = restaurant_name
+            if meal.get('RestaurantId') != meal['PartitionKey']:
+                patch['RestaurantId'] = meal['PartitionKey']
+            # Seeded meals copy the restaurant's area; registered meals pick
+            # their primary area from their own DeliveryAreas list
+            delivery_areas = [a for a in (meal.get('DeliveryAreas') or '').split(',') if a]
+            if delivery_areas:
+                if meal.get('DeliveryArea') not in delivery_areas:
+                    patch['DeliveryArea'] = delivery_areas[0]
+            elif meal.get('DeliveryArea') != restaurant_area:
+                patch['DeliveryArea'] = restaurant_area
+
+            if patch:
+                findings.add('mealDrift', dict(meal_key, fields={
+                    field: {'stored': meal.get(field), 'expected': value} for field, value in patch.items()
+                }))
+                if repair:
+                    # A seeded meal moved to another area leaves a tombstone in its old one
+                    if 'DeliveryArea' in patch and not delivery_areas and meal.get('DeliveryArea'):
+                        moved[(meal['PartitionKey'], meal['RowKey'])] = meal['DeliveryArea']
+                    writer.add(dict(meal_key, ModifiedDate=menu.timestamp(), **patch))
+        return index, scanned
+
+    meals = {}
+    meal_count = 0
+    for partial, scanned in parallel_scan(meals_client, key_range_filters(), check_meals,
+                                          select=MEAL_COLUMNS, workers=workers):
+        meals.update(partial)
+        meal_count += scanned
+    writer.flush()
+    published = publish_repairs(table_service, meals_client, writer.written_keys, moved, workers)
+
+    # 3. Orders -> check line items against the meal index
+    def check_orders(entities):
+        scanned = 0
+        for order in entities:
+            scanned += 1
+            order_ref = {'PartitionKey': order['PartitionKey'], 'RowKey': order['RowKey'],
+                         'orderNumber': order.get('OrderNumber')}
+            try:
+                lines = json.loads(order.get('Meals', '[]'))
+            except (TypeError, ValueError):
+                findings.add('unreadableOrderMeals', order_ref)
+                continue
+            if not isinstance(lines, list):
+                findings.add('unreadableOrderMeals', order_ref)
+                continue
+
+            for line in lines:
+                if not isinstance(line, dict):
+                    findings.add('unreadableOrderLines', dict(order_ref, line=repr(line)[:100]))
+                    continue
+                meal = meals.get(_pack_id(line.get('mealId')))
+                if meal is None:
+                    findings.add('ordersWithMissingMeals', dict(order_ref, mealId=line.get('mealId')))
+                    continue
+                name, price = meal
+                if line.get('name') != name:
+                    findings.add('orderNameDrift', dict(order_ref, mealId=line.get('mealId'),
+                                                        stored=line.get('name'), current=name))
+                try:
+                    stored_price = float(line.get('price', 0))
+                except (TypeError, ValueError):
+                    findings.add('unreadableOrderPrices', dict(order_ref, mealId=line.get('mealId'),
+                                                               stored=line.get('price')))
+                    continue
+                if abs(stored_price - price) > PRICE_TOLERANCE:
+                    findings.add('orderPriceDrift', dict(order_ref, mealId=line.get('mealId'),
+                                                         stored=line.get('price'), current=price))
+        return scanned
+
+    order_count = sum(parallel_scan(orders_client, partition_filters(areas), check_orders,
+                                    select=ORDER_COLUMNS, workers=workers))
+
+    issues = findings.as_dict()
+    # Order lines are a snapshot taken at checkout, so name/price drift is informational
+    blocking = ('orphanedMeals', 'mealDrift', 'ordersWithMissingMeals', 'unreadableOrderMeals',
+                'unreadableOrderLines')
+    return {
+        'passed': not any(kind in issues for kind in blocking),
+        'scanned': {'restaurants': len(restaurants), 'meals': meal_count, 'orders': order_count},
+        'issues': issues,
+        'repair': {
+            'enabled': repair or disable_orphans,
+            'written': writer.written,
+            'failed': writer.failed,
+            'published': published
+        },
+        'elapsedSeconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check denormalized fields across Restaurants, Meals and Orders")
+    parser.add_argument('--connection-string',
+                        help="Storage connection string (default: AzureStorageConnectionString, "
+                             "AzureWebJobsStorage or AZURE_STORAGE_CONNECTION_STRING)")
+    parser.add_argument('--areas', default=','.join(AREAS), help="Comma-separated known delivery areas")
+    parser.add_argument('--repair', action='store_true',
+                        help="Rewrite drifted RestaurantName/RestaurantId/DeliveryArea on meals")
+    parser.add_argument('--disable-orphans', action='store_true',
+                        help="Mark meals whose restaurant no longer exists as unavailable")
+    parser.add_argument('--workers', type=int, default=16, help="Concurrent partition range queries")
+    parser.add_argument('--output', help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    connection_string = get_connection_string(args.connection_string)
+    if not connection_string:
+        print(json.dumps({'passed': False, 'error': 'No connection string provided'}))
+        sys.exit(2)
+
+    try:
+        report = check_integrity(connection_string,
+                                 [a.strip() for a in args.areas.split(',') if a.strip()],
+                                 args.repair, args.disable_orphans, args.workers)
+    except Exception as e:
+        print(json.dumps({'passed': False, 'error': str(e)}))
+        sys.exit(2)
+
+    output = json.dumps(report, indent=2, default=str)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+    sys.exit(0 if report['passed'] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,17 @@
 View orders stored in Azure Table Storage.
 """
 
-from azure.data.tables import TableServiceClient
 import json
+import os
+import sys
 from datetime import datetime
 
+from order_analytics import load_orders, compute_metrics, print_metrics
+
+# Make the function app's shared_code package importable from this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared_code import order_stats, orders, responses, storage
+
 def view_orders():
     print("ORDER VIEWER")
     print("=" * 70)
@@ -19,7 +26,7 @@ def view_orders():
         return
     
     try:
-        table_service = TableServiceClient.from_connection_string(connection_string)
+        table_service = storage.table_service_from_connection_string(connection_string)
         orders_table = table_service.get_table_client('Orders')
         
         print("\nConnection successful!")
@@ -81,37 +88,14 @@ def view_orders():
         print("ORDER STATISTICS")
         print("=" * 70)
         
-        area_counts = {}
-        total_revenue = 0
-        statuses = {}
-        
-        for order in orders:
-            area = order.get('Area', 'Unknown')
-            area_counts[area] = area_counts.get(area, 0) + 1
-            total_revenue += order.get('TotalCost', 0)
-            status = order.get('Status', 'Unknown')
-            statuses[status] = statuses.get(status, 0) + 1
-        
-        print(f"\nOrders by Area:")
-        for area, count in sorted(area_counts.items()):
-            print(f"   {area}: {count} order(s)")
-        
-        print(f"\nOrders by Status:")
-        for status, count in sorted(statuses.items()):
-            print(f"   {status}: {count} order(s)")
+        print_statistics(table_service)
         
-        print(f"\nTotal Revenue: ${total_revenue:.2f}")
-        
-        avg_order = total_revenue / len(orders) if orders else 0
-        print(f"Average Order Value: ${avg_order:.2f}")
+        print(f"\n" + "=" * 70)
+        print("ORDER ANALYTICS")
+        print("=" * 70)
         
-        if orders:
-            dates = [order.get('OrderDate', '') for order in orders if order.get('OrderDate')]
-            if dates:
-                dates.sort()
-                print(f"\nDate Range:")
-                print(f"   First Order: {dates[0]}")
-                print(f"   Latest Order: {dates[-1]}")
+        order_frame, line_frame = load_orders(orders)
+        print_metrics(compute_metrics(order_frame, line_frame), include_summary=False)
         
         print("\n" + "=" * 70)
         
@@ -123,9 +107,34 @@ def view_orders():
         print("3. Verify Orders table exists")
         print("4. Try regenerating access keys in Azure Portal")
 
-def export_orders_to_file():
-    """Export orders to a JSON file."""
-    print("\nEXPORT ORDERS TO FILE")
+def print_statistics(table_service):
+    """Print order statistics from the OrderStats rollup (no Orders scan)."""
+    stats_table = table_service.get_table_client(order_stats.STATS_TABLE)
+    stats = order_stats.query_stats(stats_table)
+    totals = stats['totals']
+    
+    if not totals['orderCount']:
+        print("\nNo statistics in the rollup yet.")
+        print("Use 'Rebuild statistics rollup' to backfill existing orders.")
+        return
+    
+    print(f"\nOrders by Area:")
+    for area, values in stats['byArea'].items():
+        print(f"   {area}: {values['orderCount']} order(s), ${values['revenue']:.2f}")
+    
+    print(f"\nTotal Revenue: ${totals['revenue']:.2f}")
+    print(f"Average Order Value: ${totals['averageOrderValue']:.2f}")
+    print(f"Average Preparation Time: {totals['averagePreparationTime']} minutes")
+    print(f"Average Estimated Delivery: {totals['averageDeliveryTime']} minutes")
+    
+    days = list(stats['byDay'])
+    print(f"\nDate Range:")
+    print(f"   First Day: {days[0]}")
+    print(f"   Latest Day: {days[-1]}")
+
+def view_statistics():
+    """Show the statistics dashboard straight from the rollup."""
+    print("ORDER STATISTICS")
     print("=" * 70)
     
     connection_string = input("Connection string: ").strip()
@@ -135,40 +144,131 @@ def export_orders_to_file():
         return
     
     try:
-        table_service = TableServiceClient.from_connection_string(connection_string)
+        table_service = storage.table_service_from_connection_string(connection_string)
+        print_statistics(table_service)
+        print("\n" + "=" * 70)
+        
+    except Exception as e:
+        print(f"\nError: {e}")
+
+def rebuild_statistics():
+    """Backfill the OrderStats rollup from a full scan of Orders."""
+    print("\nREBUILD STATISTICS ROLLUP")
+    print("=" * 70)
+    
+    connection_string = input("Connection string: ").strip()
+    
+    if not connection_string:
+        print("Error: No connection string provided")
+        return
+    
+    try:
+        table_service = storage.table_service_from_connection_string(connection_string)
+        table_service.create_table_if_not_exists(order_stats.STATS_TABLE)
         orders_table = table_service.get_table_client('Orders')
+        stats_table = table_service.get_table_client(order_stats.STATS_TABLE)
         
-        orders = list(orders_table.list_entities())
+        rows = order_stats.rebuild_from_orders(stats_table, orders_table.list_entities())
+        print(f"\nRebuilt {rows} statistics row(s)")
         
-        if not orders:
-            print("No orders to export")
+    except Exception as e:
+        print(f"\nError: {e}")
+
+def find_order():
+    """Look an order up by its order number (two point reads, no scan)."""
+    print("\nFIND ORDER")
+    print("=" * 70)
+    
+    connection_string = input("Connection string: ").strip()
+    order_number = orders.normalize_number(input("Order number (ORD-YYYYMMDD-XXXXXX): "))
+    
+    if not connection_string or not order_number:
+        print("Error: A connection string and a valid order number are required")
+        return
+    
+    try:
+        table_service = storage.table_service_from_connection_string(connection_string)
+        order = orders.get_by_number(table_service, order_number)
+        if not order:
+            print(f"\nOrder {order_number} not found")
             return
+        print(json.dumps(order, indent=2, default=str))
+        
+    except Exception as e:
+        print(f"\nError: {e}")
+
+def rebuild_order_indexes():
+    """Backfill the order lookup indexes from a full scan of Orders."""
+    print("\nREBUILD ORDER INDEXES")
+    print("=" * 70)
+    
+    connection_string = input("Connection string: ").strip()
+    
+    if not connection_string:
+        print("Error: No connection string provided")
+        return
+    
+    try:
+        table_service = storage.table_service_from_connection_string(connection_string)
+        orders_table = table_service.get_table_client(orders.ORDERS_TABLE)
         
-        orders_data = []
-        for order in orders:
-            order_dict = {
-                'orderNumber': order.get('OrderNumber'),
-                'orderId': order.get('RowKey'),
-                'customerName': order.get('CustomerName'),
-                'phone': order.get('Phone'),
-                'area': order.get('Area'),
-                'address': order.get('DeliveryAddress'),
-                'specialInstructions': order.get('SpecialInstructions'),
-                'totalCost': order.get('TotalCost'),
-                'prepTime': order.get('TotalPreparationTime'),
-                'deliveryTime': order.get('EstimatedDeliveryTime'),
-                'orderDate': order.get('OrderDate'),
-                'status': order.get('Status'),
-                'meals': json.loads(order.get('Meals', '[]')),
-                'restaurantIds': order.get('RestaurantIds')
-            }
-            orders_data.append(order_dict)
+        count = orders.rebuild_indexes(table_service, orders_table.list_entities())
+        print(f"\nIndexed {count} order(s)")
         
+    except Exception as e:
+        print(f"\nError: {e}")
+
+def export_order(order):
+    """An Orders entity as an export record."""
+    return {
+        'orderNumber': order.get('OrderNumber'),
+        'orderId': order.get('RowKey'),
+        'customerName': order.get('CustomerName'),
+        'phone': order.get('Phone'),
+        'area': order.get('Area'),
+        'address': order.get('DeliveryAddress'),
+        'specialInstructions': order.get('SpecialInstructions'),
+        'totalCost': order.get('TotalCost'),
+        'prepTime': order.get('TotalPreparationTime'),
+        'deliveryTime': order.get('EstimatedDeliveryTime'),
+        'orderDate': order.get('OrderDate'),
+        'status': order.get('Status'),
+        'meals': json.loads(order.get('Meals', '[]')),
+        'restaurantIds': order.get('RestaurantIds')
+    }
+
+def export_orders_to_file():
+    """Export orders to a JSON file."""
+    print("\nEXPORT ORDERS TO FILE")
+    print("=" * 70)
+    
+    connection_string = input("Connection string: ").strip()
+    
+    if not connection_string:
+        print("Error: No connection string provided")
+        return
+    
+    try:
+        table_service = storage.table_service_from_connection_string(connection_string)
+        orders_table = table_service.get_table_client('Orders')
+        
+        # One order per line, written as the scan pages in, so the export
+        # never holds more than a page of orders in memory
         filename = f"orders_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        count = 0
         with open(filename, 'w') as f:
-            json.dump(orders_data, f, indent=2)
+            f.write('[')
+            for order in orders_table.list_entities():
+                f.write((',\n  ' if count else '\n  ') + responses.dumps(export_order(order)))
+                count += 1
+            f.write('\n]\n')
+        
+        if not count:
+            os.remove(filename)
+            print("No orders to export")
+            return
         
-        print(f"\nExported {len(orders)} orders to: {filename}")
+        print(f"\nExported {count} orders to: {filename}")
         
     except Exception as e:
         print(f"\nError: {e}")
@@ -178,8 +278,12 @@ if __name__ == "__main__":
     print("1. View orders in terminal")
     print("2. Export orders to JSON file")
     print("3. Both")
+    print("4. View order statistics only")
+    print("5. Rebuild statistics rollup")
+    print("6. Find an order by order number")
+    print("7. Rebuild order indexes")
     
-    choice = input("\nEnter choice (1-3): ").strip()
+    choice = input("\nEnter choice (1-7): ").strip()
     
     if choice == "1":
         view_orders()
@@ -189,6 +293,14 @@ if __name__ == "__main__":
         view_orders()
         print("\n")
         export_orders_to_file()
+    elif choice == "4":
+        view_statistics()
+    elif choice == "5":
+        rebuild_statistics()
+    elif choice == "6":
+        find_order()
+    elif choice == "7":
+        rebuild_order_indexes()
     else:
         print("Invalid choice")
 
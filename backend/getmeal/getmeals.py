@@ -1,107 +1,130 @@
 import logging
-import json
 import azure.functions as func
-from azure.data.tables import TableServiceClient
 import os
+from concurrent.futures import ThreadPoolExecutor
 
+from shared_code import meal_index, menu, menu_snapshots, profiling, responses, storage, timing
+
+MAX_AREAS = 10
+
+@profiling.profiled('getMeals')
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     Azure Function: Get meals by delivery area
     GET /api/meals?area=Central
+    GET /api/meals?areas=Central,North   (each meal once, grouped by area)
+    Optional filters: category=Dessert,Beverage&vegetarian=true&minPrice=5&maxPrice=15
+                      &maxPrepTime=20&maxCalories=600&sort=price|-price|preparationTime|calories|name
+
+    An unfiltered area menu is sent as the pre-compressed snapshot of its
+    catalog version when the client accepts gzip or br and the menusnapshots
+    job has rendered it; its watermark is then sent in the X-Menu-Watermark
+    header, as the snapshot may be older than the change log keeps. Other
+    responses are compressed as they are serialized.
     """
     logging.info('Python HTTP trigger function processed a request.')
-    
+
     # Handle CORS preflight
     if req.method == "OPTIONS":
-        return func.HttpResponse(
-            status_code=200,
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type"
-            }
-        )
-    
+        return responses.preflight()
+
+    timer = timing.RequestTimer('getMeals')
     try:
-        # Get query parameter
+        # Get query parameters
         area = req.params.get('area')
-        if not area:
-            return func.HttpResponse(
-                json.dumps({"error": "Please provide an 'area' parameter"}),
-                status_code=400,
-                mimetype="application/json",
-                headers={
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "GET, OPTIONS",
-                    "Access-Control-Allow-Headers": "Content-Type"
-                }
-            )
-        
+        areas = list(dict.fromkeys(name.strip() for name in (req.params.get('areas') or '').split(',')
+                                   if name.strip()))
+        if (not area and not areas) or len(areas) > MAX_AREAS:
+            return responses.json_response(
+                req, {"error": f"Please provide an 'area' parameter or up to {MAX_AREAS} 'areas'"}, 400, timer)
+
+        try:
+            filters, applied = meal_index.parse_filters(req.params)
+        except ValueError as invalid:
+            return responses.json_response(req, {"error": str(invalid)}, 400, timer)
+
         # Get connection string from environment
         connection_string = os.getenv('AzureStorageConnectionString')
         if not connection_string:
             connection_string = os.getenv('AzureWebJobsStorage')
-        
+
+        timer.tag(area=area or ','.join(areas))
+
         # Connect to Table Storage
-        table_service = TableServiceClient.from_connection_string(connection_string)
-        meals_table = table_service.get_table_client('Meals')
-        
-        # Query meals for the specified area
-        # Note: We're querying by DeliveryArea property
-        query_filter = f"DeliveryArea eq '{area}' and IsAvailable eq true"
-        entities = meals_table.query_entities(query_filter)
-        
-        # Format the response
-        meals = []
-        for entity in entities:
-            meal_data = {
-                'id': entity['RowKey'],
-                'name': entity.get('Name', 'Unknown'),
-                'description': entity.get('Description', ''),
-                'price': float(entity.get('Price', 0)),
-                'preparationTime': int(entity.get('PreparationTime', 0)),
-                'category': entity.get('Category', 'Main Course'),
-                'restaurantId': entity.get('PartitionKey', ''),
-                'restaurantName': entity.get('RestaurantName', 'Unknown Restaurant'),
-                'area': entity.get('DeliveryArea', area),
-                'isVegetarian': entity.get('IsVegetarian', False),
-                'calories': entity.get('Calories', 0),
-                'imageUrl': entity.get('ImageUrl', '')
-            }
-            
-            # Add blob path if exists
-            if 'ImageBlobPath' in entity:
-                meal_data['imageBlobPath'] = entity['ImageBlobPath']
-            
-            meals.append(meal_data)
-        
-        # Return response
-        return func.HttpResponse(
-            json.dumps({
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+
+        # Changes logged after this point are picked up by GET /api/meals/changes
+        watermark = menu.timestamp()
+
+        if areas:
+            # Each area is its own partition and index: check or load them concurrently
+            with ThreadPoolExecutor(max_workers=len(areas)) as pool:
+                indexes = list(pool.map(lambda name: meal_index.get_index(table_service, name, timer)[0], areas))
+            timer.tag(areaCount=len(areas))
+
+            with timer.span('filter'):
+                meals, groups = meal_index.merge_areas(indexes, filters)
+
+            return responses.json_response(req, responses.json_chunks({
                 'status': 'success',
-                'area': area,
+                'areas': groups,
                 'count': len(meals),
-                'meals': meals
-            }, default=str),
-            status_code=200,
-            mimetype="application/json",
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Content-Type": "application/json"
-            }
-        )
-        
+                'watermark': watermark,
+                'filters': applied
+            }, 'meals', meals), timer=timer)
+
+        version = None
+        encodings = responses.accepted_encodings(req.headers.get('Accept-Encoding'), menu_snapshots.ENCODINGS)
+        if not filters and encodings:
+            with timer.span('version'):
+                version = menu.get_version(table_service.get_table_client(menu.VERSIONS_TABLE), area)
+            snapshot = None
+            if version:
+                try:
+                    with timer.span('snapshot'):
+                        snapshot = menu_snapshots.get(storage.blob_service_from_connection_string(connection_string),
+                                                      area, version['Version'], encodings)
+                except Exception as error:
+                    logging.warning(f"Menu snapshot of {area} unavailable, assembling it live: {error}")
+            if snapshot:
+                timer.tag(source='snapshot', encoding=snapshot.encoding)
+                not_modified = snapshot.etag in (req.headers.get('If-None-Match') or '')
+                status_code = 304 if not_modified else 200
+                return func.HttpResponse(
+                    b'' if not_modified else snapshot.data,
+                    status_code=status_code,
+                    headers=timer.finish(status_code, dict(responses.CORS_HEADERS, **{
+                        "Content-Type": "application/json",
+                        "Content-Encoding": snapshot.encoding,
+                        "ETag": snapshot.etag,
+                        # Taken before the version was read, like the live body's
+                        menu_snapshots.WATERMARK_HEADER: watermark,
+                        "Access-Control-Expose-Headers": f"ETag, {menu_snapshots.WATERMARK_HEADER}",
+                        "Cache-Control": "no-cache",
+                        "Vary": "Accept-Encoding"
+                    }))
+                )
+
+        # The area's menu as an in-memory index, loaded from the MealsByArea
+        # read model (or a scan of Meals) once per catalog version
+        index, built = meal_index.get_index(table_service, area, timer, version=version)
+        timer.tag(source=index.source, indexBuilt=built)
+
+        with timer.span('filter'):
+            rows = index.select(**filters)
+
+        # Meals are serialized once, when the index is built
+        return responses.json_response(req, responses.json_chunks({
+            'status': 'success',
+            'area': area,
+            'count': len(rows),
+            'total': index.size,
+            'watermark': watermark,
+            'version': index.version,
+            'filters': applied
+        }, 'meals', index.json_rows(rows)), timer=timer)
+
     except Exception as e:
         logging.error(f"Error in getMeals function: {str(e)}")
-        return func.HttpResponse(
-            json.dumps({
-                'status': 'error',
-                'message': f"Server error: {str(e)}"
-            }),
-            status_code=500,
-            mimetype="application/json",
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Content-Type": "application/json"
-            }
-        )
\ No newline at end of file
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
@@ -0,0 +1,48 @@
+import logging
+import azure.functions as func
+import os
+
+from shared_code import orders, profiling, responses, storage, timing
+
+@profiling.profiled('getOrder')
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function: Track an order by its order number
+    GET /api/orders/ORD-20250131-3F2A9C
+    Served from the OrderNumberIndex with two point reads, or from this
+    worker's memory for a few seconds after the last lookup.
+    """
+    logging.info('Python HTTP trigger function processed a request.')
+
+    # Handle CORS preflight
+    if req.method == "OPTIONS":
+        return responses.preflight()
+
+    timer = timing.RequestTimer('getOrder')
+    try:
+        order_number = orders.normalize_number(req.route_params.get('orderNumber'))
+        if not order_number:
+            return responses.json_response(
+                req, {"error": "Please provide an order number like ORD-20250131-3F2A9C"}, 400, timer)
+
+        # Get connection string from environment
+        connection_string = os.getenv('AzureStorageConnectionString')
+        if not connection_string:
+            connection_string = os.getenv('AzureWebJobsStorage')
+
+        # Connect to Table Storage
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+
+        with timer.span('order_lookup'):
+            order = orders.get_by_number(table_service, order_number)
+        if not order:
+            return responses.error_response(req, f"Order {order_number} not found", 404, timer)
+        timer.tag(area=order['area'])
+
+        return responses.json_response(req, {'status': 'success', 'order': order}, 200, timer,
+                                       headers={"Cache-Control": "no-store"})
+
+    except Exception as e:
+        logging.error(f"Error in getOrder function: {str(e)}")
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
@@ -0,0 +1,95 @@
+import logging
+import azure.functions as func
+import os
+
+from shared_code import meal_index, profiling, responses, restaurants, storage, timing
+
+MAX_LIMIT = 50
+
+@profiling.profiled('getRestaurants')
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function: An area's storefront, restaurants with their menus embedded
+    GET /api/restaurants?area=Central&limit=20&offset=0
+    Accepts the same filters as GET /api/meals; restaurants without a
+    matching meal are left out. Pages are of restaurants, best rated first.
+    """
+    logging.info('Python HTTP trigger function processed a request.')
+
+    # Handle CORS preflight
+    if req.method == "OPTIONS":
+        return responses.preflight()
+
+    timer = timing.RequestTimer('getRestaurants')
+    try:
+        # Get query parameters
+        area = req.params.get('area')
+        try:
+            limit = min(max(int(req.params.get('limit', 20)), 1), MAX_LIMIT)
+            offset = max(int(req.params.get('offset', 0)), 0)
+        except ValueError:
+            limit = None
+        try:
+            filters, applied = meal_index.parse_filters(req.params)
+            error = None
+        except ValueError as invalid:
+            error = str(invalid)
+
+        if not area or limit is None or error:
+            return responses.json_response(
+                req, {"error": error or "Please provide an 'area' parameter and numeric 'limit'/'offset'"}, 400, timer)
+
+        # Get connection string from environment
+        connection_string = os.getenv('AzureStorageConnectionString')
+        if not connection_string:
+            connection_string = os.getenv('AzureWebJobsStorage')
+
+        timer.tag(area=area)
+
+        # Connect to Table Storage
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+
+        # The area's menu, and its restaurants from their partition (both cached per worker)
+        index, built = meal_index.get_index(table_service, area, timer, max_age=meal_index.MAX_AGE)
+        with timer.span('restaurants'):
+            listed = restaurants.area_restaurants(table_service, area)
+        timer.tag(indexBuilt=built)
+
+        # Join on restaurant id. A restaurant delivering here from another
+        # area's partition is listed after the local ones, by its menu name.
+        with timer.span('join'):
+            menus = index.restaurant_menus(index.select(**filters) if filters else None)
+            names = index.restaurant_names
+            visiting = sorted((restaurant_id for restaurant_id in menus if restaurant_id not in listed),
+                              key=lambda restaurant_id: names[index.restaurants[restaurant_id]])
+            storefront = [restaurant_id for restaurant_id in listed if restaurant_id in menus] + visiting
+            page = storefront[offset:offset + limit]
+
+        # Return response; meals are serialized once, when the index is built
+        with timer.span('serialize'):
+            entries = []
+            for restaurant_id in page:
+                restaurant = listed.get(restaurant_id) or {
+                    'restaurantId': restaurant_id,
+                    'name': names[index.restaurants[restaurant_id]]
+                }
+                rows = menus[restaurant_id]
+                head = responses.dumps(dict(restaurant, mealCount=len(rows)))
+                entries.append(f"{head[:-1]}, \"meals\": {index.meals_json(rows)}}}")
+            head = responses.dumps({
+                'status': 'success',
+                'area': area,
+                'count': len(page),
+                'total': len(storefront),
+                'offset': offset,
+                'nextOffset': offset + limit if offset + limit < len(storefront) else None,
+                'version': index.version,
+                'filters': applied
+            })
+            body = f"{head[:-1]}, \"restaurants\": [{','.join(entries)}]}}"
+        return responses.json_response(req, body, 200, timer)
+
+    except Exception as e:
+        logging.error(f"Error in getRestaurants function: {str(e)}")
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
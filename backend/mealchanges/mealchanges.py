@@ -0,0 +1,112 @@
+import logging
+import azure.functions as func
+import os
+from datetime import datetime, timedelta
+
+from shared_code import menu, profiling, responses, storage, timing
+
+MAX_CHANGES = 1000
+
+# Re-read this much of the log before `since`, so a write that committed
+# shortly after a reader passed its timestamp is not missed. Clients merge
+# by meal id, so seeing a change twice is harmless.
+OVERLAP_SECONDS = 30
+
+@profiling.profiled('mealChanges')
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function: Menu changes in an area since a watermark
+    GET /api/meals/changes?area=Central&since=2025-01-31T12:00:00.000000
+
+    `since` is the watermark of the previous getMeals or changes response.
+    """
+    logging.info('Python HTTP trigger function processed a request.')
+
+    # Handle CORS preflight
+    if req.method == "OPTIONS":
+        return responses.preflight()
+
+    timer = timing.RequestTimer('mealChanges')
+    try:
+        # Get query parameters
+        area = req.params.get('area')
+        since = req.params.get('since')
+        try:
+            # A watermark is a timestamp, or '<timestamp>_<mealId>' while paging
+            since_date = datetime.fromisoformat(since.split('_')[0]).replace(tzinfo=None) if since else None
+        except ValueError:
+            since_date = None
+
+        if not area or since_date is None:
+            return responses.json_response(
+                req, {"error": "Please provide an 'area' and an ISO 'since' watermark"}, 400, timer)
+
+        # Get connection string from environment
+        connection_string = os.getenv('AzureStorageConnectionString')
+        if not connection_string:
+            connection_string = os.getenv('AzureWebJobsStorage')
+
+        timer.tag(area=area)
+
+        # Connect to Table Storage
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+
+        now = datetime.utcnow()
+        with timer.span('version'):
+            version = menu.get_version(table_service.get_table_client(menu.VERSIONS_TABLE), area)
+
+        # The log cannot answer for watermarks it does not cover: the area is
+        # not in the read model yet, was rebuilt since, or the log was pruned
+        reset_date = (version or {}).get('ResetDate')
+        if (not version or not version.get('Complete')
+                or (reset_date and since < reset_date)
+                or since_date < now - timedelta(days=menu.CHANGE_RETENTION_DAYS)):
+            timer.tag(reset=True)
+            body = {
+                'status': 'success',
+                'area': area,
+                'reset': True,
+                'message': 'Changes are not available for this watermark; reload the full menu'
+            }
+        else:
+            if '_' in since:
+                read_from = since
+            else:
+                read_from = menu.timestamp(since_date - timedelta(seconds=OVERLAP_SECONDS))
+            with timer.span('query'):
+                changes, last_key, has_more = menu.read_changes(table_service, area, read_from, MAX_CHANGES)
+
+            with timer.span('format'):
+                meals = []
+                removed = []
+                for change in changes:
+                    if change.get('Removed') or not change.get('IsAvailable', True):
+                        removed.append(change['MealId'])
+                    else:
+                        meals.append(menu.format_meal(change, area))
+
+            # Paging continues exactly after the last entry read; otherwise from now
+            watermark = last_key if has_more else menu.timestamp(now)
+            timer.tag(changes=len(changes))
+            body = {
+                'status': 'success',
+                'area': area,
+                'reset': False,
+                'since': since,
+                'watermark': watermark,
+                'hasMore': has_more,
+                'version': version.get('Version'),
+                'count': len(meals) + len(removed),
+                'meals': meals,
+                'removed': removed
+            }
+
+        # Return response
+        with timer.span('serialize'):
+            payload = responses.dumps(body)
+        return responses.json_response(req, payload, 200, timer, headers={"Cache-Control": "no-store"})
+
+    except Exception as e:
+        logging.error(f"Error in mealChanges function: {str(e)}")
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
@@ -0,0 +1,69 @@
+import logging
+import azure.functions as func
+import os
+
+from shared_code import meal_index, profiling, responses, storage, timing
+
+@profiling.profiled('mealFacets')
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function: Meal counts for the menu filter chips of an area
+    GET /api/meals/facets?area=Central
+    Accepts the same filters as GET /api/meals; each facet is then counted
+    under every filter but its own.
+    """
+    logging.info('Python HTTP trigger function processed a request.')
+
+    # Handle CORS preflight
+    if req.method == "OPTIONS":
+        return responses.preflight()
+
+    timer = timing.RequestTimer('mealFacets')
+    try:
+        # Get query parameters
+        area = req.params.get('area')
+        try:
+            filters, applied = meal_index.parse_filters(req.params)
+            error = None
+        except ValueError as invalid:
+            error = str(invalid)
+
+        if not area or error:
+            return responses.json_response(
+                req, {"error": error or "Please provide an 'area' parameter"}, 400, timer)
+
+        # Get connection string from environment
+        connection_string = os.getenv('AzureStorageConnectionString')
+        if not connection_string:
+            connection_string = os.getenv('AzureWebJobsStorage')
+
+        timer.tag(area=area)
+
+        # Connect to Table Storage
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+
+        # A warm worker answers from memory without touching storage
+        index, built = meal_index.get_index(table_service, area, timer, max_age=meal_index.MAX_AGE)
+        timer.tag(indexBuilt=built)
+
+        with timer.span('facets'):
+            facets = index.facets(**filters)
+            count = len(index.select(**filters)) if filters else index.size
+
+        # Return response
+        with timer.span('serialize'):
+            body = responses.dumps({
+                'status': 'success',
+                'area': area,
+                'count': count,
+                'total': index.size,
+                'version': index.version,
+                'filters': applied,
+                'facets': facets
+            })
+        return responses.json_response(req, body, 200, timer)
+
+    except Exception as e:
+        logging.error(f"Error in mealFacets function: {str(e)}")
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
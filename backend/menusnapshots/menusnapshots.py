@@ -0,0 +1,43 @@
+import logging
+
+import azure.functions as func
+
+from shared_code import meal_index, menu_snapshots, profiling, storage, timing
+
+
+@profiling.profiled('menuSnapshots')
+def main(mytimer: func.TimerRequest) -> None:
+    """
+    Timer-triggered Azure Function (every 5 minutes, and when the host
+    starts) that renders the compressed menu snapshot of every area whose
+    current catalog version has none yet.
+
+    Running on host start also pre-warms the instance after a deploy or
+    scale-out: each area's menu index and snapshot are left in memory.
+    """
+    timer = timing.RequestTimer('menuSnapshots')
+    if mytimer.past_due:
+        logging.info("menuSnapshots is running late")
+
+    connection_string = storage.get_connection_string()
+    table_service = storage.table_service_from_connection_string(connection_string)
+    blob_service = storage.blob_service_from_connection_string(connection_string)
+    menu_snapshots.ensure_container(blob_service)
+
+    rendered = {}
+    failed = []
+    for area in meal_index.known_areas(table_service, timer):
+        try:
+            index, _ = meal_index.get_index(table_service, area, timer)
+            if not index.version:
+                continue
+            with timer.span('snapshot'):
+                uploaded = menu_snapshots.publish(blob_service, index)
+            if uploaded:
+                rendered[area] = uploaded
+        except Exception as error:
+            logging.error("Failed to render the menu snapshot of %s: %s", area, error)
+            failed.append(area)
+
+    timer.tag(rendered=sorted(rendered), failed=failed)
+    timer.finish('failed' if failed else 'completed')
@@ -5,10 +5,12 @@ import json
 import logging
 import os
 import time
+from datetime import datetime
 from urllib.parse import quote_plus
 
 import azure.functions as func
-import requests
+
+from shared_code import profiling, sketches, storage, timing
 
 
 def _parse_notification_hub_connection(conn_str: str):
@@ -55,6 +57,9 @@ def _send_notification(order_payload: dict) -> None:
         logging.warning("Notification Hub settings missing; skipping notification send.")
         return
 
+    # Imported here: without Notification Hub settings the worker never needs it
+    import requests
+
     endpoint, key_name, key_value = _parse_notification_hub_connection(connection)
     target_uri, sas_token = _build_sas_token(endpoint, hub_name, key_name, key_value)
     url = f"{target_uri}/?api-version=2015-01"
@@ -81,19 +86,59 @@ def _send_notification(order_payload: dict) -> None:
     logging.info("Notification sent for order %s", order_payload.get("orderNumber"))
 
 
+def _update_sketches(order_payload: dict) -> None:
+    """
+    Fold the order into its area's popular-meals and distinct-customer sketches.
+    """
+    area = order_payload.get("area")
+    meals = order_payload.get("meals")
+    if not area or not meals:
+        # Messages queued before line items were included carry nothing to count
+        return
+
+    connection_string = os.getenv('AzureStorageConnectionString') or os.getenv('AzureWebJobsStorage')
+    table_service = storage.table_service_from_connection_string(connection_string)
+    sketch_table = table_service.get_table_client(sketches.SKETCH_TABLE)
+
+    order_date = None
+    if order_payload.get("orderDate"):
+        order_date = datetime.fromisoformat(order_payload["orderDate"])
+
+    sketches.record_order(sketch_table, area, meals, order_payload.get("customerKey"), order_date,
+                          order_payload.get("orderId"))
+
+
+@profiling.profiled('notifyOrder')
 def main(msg: func.QueueMessage) -> None:
     """
     Queue-triggered Azure Function that sends a notification 15 seconds after order placement.
     """
+    timer = timing.RequestTimer('notifyOrder')
     try:
         order_payload = json.loads(msg.get_body().decode('utf-8'))
     except Exception as parse_error:
         logging.error("Failed to parse queue message: %s", parse_error)
         return
 
+    timer.tag(area=order_payload.get("area"), cartLines=len(order_payload.get("meals") or []),
+              dequeueCount=msg.dequeue_count)
+
+    # Before the notification, so a failure is retried with the message; a
+    # retry does not count an order the sketches already hold
+    try:
+        with timer.span('sketch_update'):
+            _update_sketches(order_payload)
+    except Exception as sketch_error:
+        logging.error("Failed to update meal sketches: %s", sketch_error)
+        timer.finish('failed')
+        raise
+
     try:
-        _send_notification(order_payload)
+        with timer.span('notification_send'):
+            _send_notification(order_payload)
     except Exception as notify_error:
         logging.error("Failed to send notification: %s", notify_error)
+        timer.finish('failed')
         # Raising ensures the message is retried or moved to the poison queue.
         raise notify_error
+    timer.finish('completed')
@@ -0,0 +1,45 @@
+import logging
+import azure.functions as func
+import os
+
+from shared_code import order_stats, profiling, responses, storage, timing
+
+@profiling.profiled('orderStats')
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function: Get order statistics from the OrderStats rollup
+    GET /api/orderStats?area=Central&from=2025-01-01&to=2025-01-31
+    """
+    logging.info('Python HTTP trigger function processed a request.')
+
+    # Handle CORS preflight
+    if req.method == "OPTIONS":
+        return responses.preflight()
+
+    timer = timing.RequestTimer('orderStats')
+    try:
+        # All parameters are optional; no area means every area
+        area = req.params.get('area')
+        start_day = req.params.get('from')
+        end_day = req.params.get('to')
+
+        # Get connection string from environment
+        connection_string = os.getenv('AzureStorageConnectionString')
+        if not connection_string:
+            connection_string = os.getenv('AzureWebJobsStorage')
+
+        timer.tag(area=area)
+
+        # Connect to Table Storage
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+            stats_table = table_service.get_table_client(order_stats.STATS_TABLE)
+
+        with timer.span('query'):
+            stats = order_stats.query_stats(stats_table, area, start_day, end_day)
+
+        return responses.json_response(req, dict(stats, status='success'), 200, timer)
+
+    except Exception as e:
+        logging.error(f"Error in orderStats function: {str(e)}")
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
@@ -0,0 +1,56 @@
+import logging
+import azure.functions as func
+import os
+
+from shared_code import profiling, responses, sketches, storage, timing
+
+MAX_DAYS = 30
+MAX_LIMIT = 50
+
+@profiling.profiled('popularMeals')
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function: Popular meals and distinct customers in an area
+    GET /api/meals/popular?area=Central&days=7&limit=10
+    """
+    logging.info('Python HTTP trigger function processed a request.')
+
+    # Handle CORS preflight
+    if req.method == "OPTIONS":
+        return responses.preflight()
+
+    timer = timing.RequestTimer('popularMeals')
+    try:
+        # Get query parameters
+        area = req.params.get('area')
+        try:
+            days = min(max(int(req.params.get('days', 7)), 1), MAX_DAYS)
+            limit = min(max(int(req.params.get('limit', 10)), 1), MAX_LIMIT)
+        except ValueError:
+            days = limit = None
+
+        if not area or days is None:
+            return responses.json_response(
+                req, {"error": "Please provide an 'area' parameter and numeric 'days'/'limit'"}, 400, timer)
+
+        # Get connection string from environment
+        connection_string = os.getenv('AzureStorageConnectionString')
+        if not connection_string:
+            connection_string = os.getenv('AzureWebJobsStorage')
+
+        timer.tag(area=area, days=days)
+
+        # Connect to Table Storage
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+            sketch_table = table_service.get_table_client(sketches.SKETCH_TABLE)
+
+        # At most `days` fixed-size rows are read, regardless of order volume
+        with timer.span('query'):
+            popular = sketches.popular_meals(sketch_table, area, days, limit)
+
+        return responses.json_response(req, dict(popular, status='success'), 200, timer)
+
+    except Exception as e:
+        logging.error(f"Error in popularMeals function: {str(e)}")
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
@@ -1,11 +1,10 @@
 import logging
-import json
 import azure.functions as func
-from azure.data.tables import TableServiceClient
-from datetime import datetime
-import uuid
 import os
 
+from shared_code import menu, profiling, responses, restaurants, storage, timing
+
+@profiling.profiled('registerMeal')
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     Azure Function: Register a new meal
@@ -15,39 +14,18 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     
     # Handle CORS preflight
     if req.method == "OPTIONS":
-        return func.HttpResponse(
-            status_code=200,
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "POST, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type"
-            }
-        )
+        return responses.preflight("POST, OPTIONS")
     
+    timer = timing.RequestTimer('registerMeal')
     try:
         # Parse request body
         req_body = req.get_json()
         
-        # Validate required fields
-        required_fields = ['name', 'description', 'price', 'preparationTime', 'deliveryAreas', 'restaurantName']
-        missing_fields = []
-        for field in required_fields:
-            if field not in req_body:
-                missing_fields.append(field)
+        # Validate required fields and values
+        errors = menu.validate_meal(req_body)
         
-        if missing_fields:
-            return func.HttpResponse(
-                json.dumps({
-                    'status': 'error',
-                    'message': f"Missing required fields: {', '.join(missing_fields)}"
-                }),
-                status_code=400,
-                mimetype="application/json",
-                headers={
-                    "Access-Control-Allow-Origin": "*",
-                    "Content-Type": "application/json"
-                }
-            )
+        if errors:
+            return responses.error_response(req, '; '.join(errors), 400, timer)
         
         # Get connection string
         connection_string = os.getenv('AzureStorageConnectionString')
@@ -55,91 +33,57 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             connection_string = os.getenv('AzureWebJobsStorage')
         
         # Connect to Table Storage
-        table_service = TableServiceClient.from_connection_string(connection_string)
-        meals_table = table_service.get_table_client('Meals')
-        restaurants_table = table_service.get_table_client('Restaurants')
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+            meals_table = table_service.get_table_client(menu.MEALS_TABLE)
         
-        # Generate a unique restaurant ID if not provided
-        # In a real app, you'd get this from authentication
-        restaurant_id = req_body.get('restaurantId', str(uuid.uuid4()))
-        
-        # Create or get restaurant
-        try:
-            restaurant = restaurants_table.get_entity(
-                partition_key=req_body.get('area', 'Central'),
-                row_key=restaurant_id
+        # Resolve the restaurant with one point read of the restaurant index,
+        # reusing the restaurant with this name when no id is given
+        with timer.span('restaurant_lookup'):
+            restaurant = restaurants.resolve(
+                table_service,
+                req_body.get('restaurantId'),
+                req_body['restaurantName'],
+                req_body.get('area') or menu.parse_delivery_areas(req_body['deliveryAreas'])[0]
             )
-            restaurant_name = restaurant.get('Name', req_body['restaurantName'])
-        except:
-            # Restaurant doesn't exist, create a simple entry
-            restaurant_name = req_body['restaurantName']
-        
-        # Parse delivery areas
-        if isinstance(req_body['deliveryAreas'], list):
-            delivery_areas = ','.join(req_body['deliveryAreas'])
-            primary_area = req_body['deliveryAreas'][0]
-        else:
-            delivery_areas = req_body['deliveryAreas']
-            primary_area = delivery_areas.split(',')[0] if ',' in delivery_areas else delivery_areas
+        if restaurant is None:
+            return responses.error_response(
+                req, f"Unknown restaurant {req_body['restaurantId']}", 404, timer)
+        restaurant_id = restaurant['restaurantId']
+        restaurant_name = restaurant['name'] or req_body['restaurantName']
         
         # Create meal entity
-        meal_id = str(uuid.uuid4())
-        meal_entity = {
-            'PartitionKey': restaurant_id,  # Restaurant ID as partition key
-            'RowKey': meal_id,
-            'Name': req_body['name'],
-            'Description': req_body['description'],
-            'Price': float(req_body['price']),
-            'PreparationTime': int(req_body['preparationTime']),
-            'Category': req_body.get('category', 'Main Course'),
-            'IsAvailable': req_body.get('isAvailable', True),
-            'IsVegetarian': req_body.get('isVegetarian', False),
-            'Calories': req_body.get('calories', 0),
-            'DeliveryAreas': delivery_areas,
-            'DeliveryArea': primary_area,  # Primary area for querying
-            'RestaurantName': restaurant_name,
-            'RestaurantId': restaurant_id,
-            'CreatedDate': datetime.utcnow().isoformat(),
-            'ImageUrl': req_body.get('imageUrl', ''),
-            'ImageBlobPath': req_body.get('imageBlobPath', '')
-        }
+        meal_entity = menu.build_meal_entity(req_body, restaurant_id, restaurant_name)
+        meal_id = meal_entity['RowKey']
         
         # Insert into table
-        meals_table.create_entity(meal_entity)
+        with timer.span('meal_insert'):
+            meals_table.create_entity(meal_entity)
+        
+        # Copy the meal into each delivery area's menu; if that fails the
+        # areas are served from Meals until the read model is rebuilt
+        try:
+            with timer.span('area_publish'):
+                menu.publish_or_fall_back(table_service, [meal_entity])
+        except Exception as publish_error:
+            logging.error(f"Failed to publish meal {meal_id} or mark its areas incomplete: {publish_error}")
+            return responses.error_response(
+                req, f"Meal {meal_id} was saved but could not be added to the area menus", 503, timer)
         
         # Return success response
-        return func.HttpResponse(
-            json.dumps({
-                'status': 'success',
-                'message': 'Meal registered successfully',
-                'mealId': meal_id,
-                'restaurantId': restaurant_id,
-                'data': {
-                    'id': meal_id,
-                    'name': meal_entity['Name'],
-                    'price': meal_entity['Price'],
-                    'category': meal_entity['Category']
-                }
-            }),
-            status_code=201,
-            mimetype="application/json",
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Content-Type": "application/json"
+        return responses.json_response(req, {
+            'status': 'success',
+            'message': 'Meal registered successfully',
+            'mealId': meal_id,
+            'restaurantId': restaurant_id,
+            'data': {
+                'id': meal_id,
+                'name': meal_entity['Name'],
+                'price': meal_entity['Price'],
+                'category': meal_entity['Category']
             }
-        )
+        }, 201, timer)
         
     except Exception as e:
         logging.error(f"Error in registerMeal function: {str(e)}")
-        return func.HttpResponse(
-            json.dumps({
-                'status': 'error',
-                'message': f"Server error: {str(e)}"
-            }),
-            status_code=500,
-            mimetype="application/json",
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Content-Type": "application/json"
-            }
-        )
\ No newline at end of file
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
\ No newline at end of file
@@ -0,0 +1,132 @@
+import logging
+import azure.functions as func
+import os
+
+from shared_code import menu, profiling, responses, restaurants, storage, timing
+
+MAX_MEALS = 500
+
+# Restaurant-level fields every meal of the menu inherits unless it sets its own
+INHERITED_FIELDS = ['restaurantName', 'deliveryAreas', 'category', 'isAvailable']
+
+@profiling.profiled('registerMeals')
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function: Register a restaurant's whole menu in one call
+    POST /api/registerMeals
+    Body: { restaurantId, restaurantName, area, deliveryAreas, meals: [ { name, ... }, ... ] }
+    """
+    logging.info('Python HTTP trigger function processed a request.')
+
+    # Handle CORS preflight
+    if req.method == "OPTIONS":
+        return responses.preflight("POST, OPTIONS")
+
+    timer = timing.RequestTimer('registerMeals')
+    try:
+        # Parse request body
+        req_body = req.get_json()
+        items = req_body.get('meals') if isinstance(req_body, dict) else None
+
+        if not isinstance(items, list) or len(items) == 0 or len(items) > MAX_MEALS:
+            return responses.error_response(
+                req, f"Meals must be an array of 1 to {MAX_MEALS} meals", 400, timer)
+
+        # Validate every meal before writing any of them
+        defaults = {field: req_body[field] for field in INHERITED_FIELDS if field in req_body}
+        items = [dict(defaults, **item) if isinstance(item, dict) else item for item in items]
+        invalid = []
+        for index, item in enumerate(items):
+            errors = menu.validate_meal(item)
+            if errors:
+                invalid.append({'index': index, 'status': 'invalid', 'errors': errors})
+
+        # The menu is registered under one restaurant, so every meal must name the same one
+        if not invalid:
+            names = {restaurants.normalize_name(item['restaurantName']) for item in items}
+            if len(names) > 1:
+                return responses.error_response(
+                    req, "All meals must belong to the same restaurant; register each restaurant's menu separately",
+                    400, timer)
+
+        timer.tag(mealCount=len(items))
+
+        if invalid:
+            return responses.json_response(req, {
+                'status': 'error',
+                'message': f"{len(invalid)} of {len(items)} meals are invalid; nothing was registered",
+                'results': invalid
+            }, 400, timer)
+
+        # Get connection string
+        connection_string = os.getenv('AzureStorageConnectionString')
+        if not connection_string:
+            connection_string = os.getenv('AzureWebJobsStorage')
+
+        # Connect to Table Storage
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+            meals_table = table_service.get_table_client(menu.MEALS_TABLE)
+
+        # The whole menu belongs to one restaurant, so it shares one partition
+        with timer.span('restaurant_lookup'):
+            restaurant = restaurants.resolve(
+                table_service,
+                req_body.get('restaurantId'),
+                items[0]['restaurantName'],
+                req_body.get('area') or menu.parse_delivery_areas(items[0]['deliveryAreas'])[0]
+            )
+        if restaurant is None:
+            return responses.error_response(
+                req, f"Unknown restaurant {req_body['restaurantId']}", 404, timer)
+        restaurant_id = restaurant['restaurantId']
+        restaurant_name = restaurant['name'] or items[0]['restaurantName']
+
+        meals = [menu.build_meal_entity(item, restaurant_id, restaurant_name)
+                 for item in items]
+
+        # Insert in transactions of up to 100 meals
+        with timer.span('meal_batches'):
+            errors = menu.write_meals(meals_table, meals)
+        created = [meal for meal in meals if errors[meal['RowKey']] is None]
+
+        # Copy the new meals into each delivery area's menu; if that fails the
+        # areas are served from Meals until the read model is rebuilt
+        if created:
+            try:
+                with timer.span('area_publish'):
+                    menu.publish_or_fall_back(table_service, created)
+            except Exception as publish_error:
+                logging.error(f"Failed to publish meals or mark their areas incomplete: {publish_error}")
+                return responses.error_response(
+                    req, f"{len(created)} meals were saved but could not be added to the area menus", 503, timer)
+
+        results = []
+        for index, meal in enumerate(meals):
+            error = errors[meal['RowKey']]
+            if error is None:
+                results.append({'index': index, 'status': 'created', 'mealId': meal['RowKey'], 'name': meal['Name']})
+            else:
+                results.append({'index': index, 'status': 'failed', 'name': meal['Name'], 'message': error})
+
+        if len(created) == len(meals):
+            status_code = 201
+        elif created:
+            status_code = 207
+        else:
+            status_code = 500
+        timer.tag(created=len(created))
+
+        # Return per-meal results
+        return responses.json_response(req, {
+            'status': 'success' if status_code == 201 else 'partial' if status_code == 207 else 'error',
+            'message': f"Registered {len(created)} of {len(meals)} meals",
+            'restaurantId': restaurant_id,
+            'created': len(created),
+            'failed': len(meals) - len(created),
+            'results': results
+        }, status_code, timer)
+
+    except Exception as e:
+        logging.error(f"Error in registerMeals function: {str(e)}")
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
@@ -0,0 +1,73 @@
+import logging
+import azure.functions as func
+import os
+from datetime import datetime, timedelta
+
+from shared_code import orders, profiling, responses, storage, timing
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+DEFAULT_WINDOW = timedelta(hours=12)  # orders shown when no 'since' is given
+
+@profiling.profiled('restaurantOrders')
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function: A restaurant's incoming orders, for kitchen tablets
+    GET /api/restaurants/{restaurantId}/orders?status=Pending&since=...
+    Each order holds only this restaurant's line items and prep time.
+    'since' is an ISO time or the cursor of the previous response. Polling
+    with the cursor returns the orders placed since, plus those of the last
+    orders.POLL_OVERLAP_SECONDS before it again (merge by orderId), so an
+    order indexed late is not skipped. Each poll is one range read of the
+    restaurant's OrdersByRestaurant partition.
+    """
+    logging.info('Python HTTP trigger function processed a request.')
+
+    # Handle CORS preflight
+    if req.method == "OPTIONS":
+        return responses.preflight()
+
+    timer = timing.RequestTimer('restaurantOrders')
+    try:
+        restaurant_id = (req.route_params.get('restaurantId') or '').strip()
+        status = (req.params.get('status') or '').strip() or None
+        since = req.params.get('since')
+        if since:
+            start = orders.since_key(since)
+        else:
+            start = (orders.time_key((datetime.utcnow() - DEFAULT_WINDOW).isoformat()), False)
+        try:
+            limit = min(max(int(req.params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            limit = None
+
+        if not restaurant_id or start is None or limit is None:
+            return responses.json_response(
+                req, {"error": "Please provide a restaurant id, an ISO time or cursor as 'since' "
+                               "and a numeric 'limit'"}, 400, timer)
+
+        # Get connection string from environment
+        connection_string = os.getenv('AzureStorageConnectionString')
+        if not connection_string:
+            connection_string = os.getenv('AzureWebJobsStorage')
+
+        # Connect to Table Storage
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+
+        with timer.span('kitchen_orders'):
+            queue, cursor, more = orders.restaurant_orders(table_service, restaurant_id, start, limit, status)
+        timer.tag(count=len(queue))
+
+        return responses.json_response(req, {
+            'status': 'success',
+            'restaurantId': restaurant_id,
+            'count': len(queue),
+            'orders': queue,
+            'cursor': cursor,
+            'hasMore': more
+        }, 200, timer, headers={"Cache-Control": "no-store"})
+
+    except Exception as e:
+        logging.error(f"Error in restaurantOrders function: {str(e)}")
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
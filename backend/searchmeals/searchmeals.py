@@ -0,0 +1,84 @@
+import logging
+import azure.functions as func
+import os
+
+from shared_code import meal_index, meal_search, profiling, responses, storage, timing
+
+MAX_LIMIT = 100
+
+@profiling.profiled('searchMeals')
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function: Full-text meal search in an area, best matches first
+    GET /api/meals/search?area=Central&q=spicy chick&limit=20
+    Accepts the same filters as GET /api/meals (category, vegetarian, ...).
+    """
+    logging.info('Python HTTP trigger function processed a request.')
+
+    # Handle CORS preflight
+    if req.method == "OPTIONS":
+        return responses.preflight()
+
+    timer = timing.RequestTimer('searchMeals')
+    try:
+        # Get query parameters
+        area = req.params.get('area')
+        query = (req.params.get('q') or '').strip()
+        try:
+            limit = min(max(int(req.params.get('limit', 20)), 1), MAX_LIMIT)
+        except ValueError:
+            limit = None
+        try:
+            filters, applied = meal_index.parse_filters(req.params)
+            error = None
+        except ValueError as invalid:
+            error = str(invalid)
+
+        if not area or not query or limit is None or error:
+            return responses.json_response(
+                req, {"error": error or "Please provide 'area' and 'q' parameters and a numeric 'limit'"}, 400, timer)
+
+        # Get connection string from environment
+        connection_string = os.getenv('AzureStorageConnectionString')
+        if not connection_string:
+            connection_string = os.getenv('AzureWebJobsStorage')
+
+        timer.tag(area=area)
+
+        # Connect to Table Storage
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+
+        # A warm worker answers from memory without touching storage
+        index, built = meal_index.get_index(table_service, area, timer, max_age=meal_index.MAX_AGE)
+        with timer.span('search_index'):
+            search_index = meal_search.for_index(index)
+        timer.tag(indexBuilt=built)
+
+        # Relevance decides the order, so a requested sort is ignored
+        filters.pop('sort', None)
+        applied.pop('sort', None)
+        with timer.span('search'):
+            rows = index.select(**filters) if filters else None
+            rows, scores, matches = search_index.search(query, limit, rows)
+        timer.tag(matches=matches)
+
+        # Return response
+        with timer.span('serialize'):
+            head = responses.dumps({
+                'status': 'success',
+                'area': area,
+                'query': query,
+                'count': len(rows),
+                'matches': matches,
+                'version': index.version,
+                'filters': applied
+            })
+            meals = ','.join(f'{index.rows[row][:-1]}, "score": {score:.4f}}}'
+                             for row, score in zip(rows.tolist(), scores.tolist()))
+            body = f"{head[:-1]}, \"meals\": [{meals}]}}"
+        return responses.json_response(req, body, 200, timer)
+
+    except Exception as e:
+        logging.error(f"Error in searchMeals function: {str(e)}")
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
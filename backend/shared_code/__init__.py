@@ -0,0 +1,3 @@
+"""
+Shared helpers imported by the Azure Functions in this app
+"""
@@ -0,0 +1,34 @@
+"""
+CUSTOMER KEYS
+Orders only carry a free-text name and phone number, so customers are
+identified by their normalized phone number, keyed with an HMAC under the
+CUSTOMER_KEY_SECRET app setting: the key is stable, URL/key safe, holds
+no PII and cannot be recomputed from a phone number without the secret.
+Names are not unique, so orders without a phone number get no key (and
+no order history), as does every order while the secret is not set.
+"""
+
+import hashlib
+import hmac
+import os
+import re
+
+
+def normalize_phone(phone):
+    """Keep digits only: '+1 (555) 012-3' -> '15550123'"""
+    return re.sub(r'\D', '', phone or '')
+
+
+def is_configured():
+    """Whether CUSTOMER_KEY_SECRET is set, i.e. whether orders are indexed by customer."""
+    return bool(os.getenv('CUSTOMER_KEY_SECRET'))
+
+
+def customer_key(phone):
+    """The customer key of a phone number, or '' without a phone number or a secret."""
+    normalized = normalize_phone(phone)
+    secret = os.getenv('CUSTOMER_KEY_SECRET')
+    if not normalized or not secret:
+        return ''
+    return hmac.new(secret.encode('utf-8'), f"phone:{normalized}".encode('utf-8'),
+                    hashlib.sha256).hexdigest()[:32]
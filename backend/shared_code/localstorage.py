@@ -0,0 +1,898 @@
+"""
+LOCAL STORAGE STAND-IN
+SQLite-backed replacement for the Azure Table, Queue and Blob clients
+
+Implements the subset of the SDK client APIs this app uses, so functions
+and scripts can run, be profiled and be load-tested without an Azure
+account. It is selected by a connection string such as
+
+    UseLocalStorage=true;Path=/tmp/foodexpress.db;LatencyMs=5;LatencyJitterMs=2;ThrottleRate=0.01
+
+- Path: SQLite file shared by every process using it (default ':memory:',
+  shared by every client in the current process)
+- LatencyMs / LatencyJitterMs: simulated per-call network latency
+- ThrottleRate: fraction of calls failing like a throttled account
+  (HTTP 503 ServerBusy)
+
+Errors are raised as the same azure.core exceptions the real SDKs raise,
+and every call is counted per operation (see `LocalStorage.stats`).
+Tables and queues are created on first use.
+"""
+
+import base64
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    HttpResponseError,
+    ResourceExistsError,
+    ResourceModifiedError,
+    ResourceNotFoundError,
+)
+from azure.data.tables import TableTransactionError, UpdateMode
+
+CONNECTION_PREFIX = 'UseLocalStorage=true'
+MAX_BATCH_SIZE = 100
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def is_local_connection_string(connection_string):
+    return bool(connection_string) and connection_string.strip().lower().startswith(CONNECTION_PREFIX.lower())
+
+
+def _parse_connection_string(connection_string):
+    parts = dict(item.split('=', 1) for item in connection_string.split(';') if '=' in item)
+    return {
+        'path': parts.get('Path', ':memory:'),
+        'latency_ms': float(parts.get('LatencyMs', 0)),
+        'jitter_ms': float(parts.get('LatencyJitterMs', 0)),
+        'throttle_rate': float(parts.get('ThrottleRate', 0)),
+    }
+
+
+def get_store(connection_string):
+    """Return the shared LocalStorage for a connection string."""
+    settings = _parse_connection_string(connection_string)
+    with _stores_lock:
+        store = _stores.get(settings['path'])
+        if store is None:
+            store = _stores[settings['path']] = LocalStorage(settings['path'])
+        store.configure(settings['latency_ms'], settings['jitter_ms'], settings['throttle_rate'])
+        return store
+
+
+def close_store(connection_string):
+    """Checkpoint and close the store for a connection string, if open."""
+    settings = _parse_connection_string(connection_string)
+    with _stores_lock:
+        store = _stores.pop(settings['path'], None)
+    if store is not None:
+        with store.lock:
+            if store.path != ':memory:':
+                store.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            store.db.close()
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+def _new_etag():
+    return f'W/"{uuid.uuid4().hex}"'
+
+
+def _encode_value(value):
+    if isinstance(value, (bytes, bytearray)):
+        return {'$b': base64.b64encode(bytes(value)).decode('ascii')}
+    if isinstance(value, datetime):
+        return {'$dt': value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if '$b' in value:
+            return base64.b64decode(value['$b'])
+        if '$dt' in value:
+            return datetime.fromisoformat(value['$dt'])
+    return value
+
+
+class LocalEntity(dict):
+    """Entity dict carrying `metadata` (etag, timestamp) like TableEntity."""
+
+    def __init__(self, *args, metadata=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metadata = metadata or {}
+
+
+class LocalStorage:
+    """One SQLite database holding tables, queues and blobs."""
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        if path != ':memory:':
+            self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS tables (name TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS entities (
+                tbl TEXT, pk TEXT, rk TEXT, etag TEXT, ts TEXT, body TEXT,
+                PRIMARY KEY (tbl, pk, rk)
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                id TEXT PRIMARY KEY, queue TEXT, content TEXT, inserted REAL,
+                visible_at REAL, expires_at REAL, dequeue_count INTEGER, pop_receipt TEXT
+            );
+            CREATE INDEX IF NOT EXISTS messages_by_queue ON messages (queue, visible_at);
+            CREATE TABLE IF NOT EXISTS blobs (
+                container TEXT, name TEXT, data BLOB, content_type TEXT, content_encoding TEXT,
+                cache_control TEXT, metadata TEXT, etag TEXT, modified TEXT,
+                PRIMARY KEY (container, name)
+            );
+            CREATE TABLE IF NOT EXISTS containers (name TEXT PRIMARY KEY);
+        """)
+        self.latency_ms = 0.0
+        self.jitter_ms = 0.0
+        self.throttle_rate = 0.0
+        self.calls = Counter()
+        self.calls_lock = threading.Lock()
+
+    def configure(self, latency_ms=0.0, jitter_ms=0.0, throttle_rate=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle_rate = throttle_rate
+
+    def call(self, operation):
+        """Count one storage call and apply the simulated latency/throttling."""
+        with self.calls_lock:
+            self.calls[operation] += 1
+        delay = self.latency_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000.0)
+        if self.throttle_rate and random.random() < self.throttle_rate:
+            with self.calls_lock:
+                self.calls['throttled'] += 1
+            error = HttpResponseError(message="ServerBusy: The server is busy. (simulated)")
+            error.status_code = 503
+            error.error_code = 'ServerBusy'
+            raise error
+
+    def stats(self):
+        with self.calls_lock:
+            return dict(self.calls)
+
+    def reset_stats(self):
+        with self.calls_lock:
+            self.calls.clear()
+
+    def execute(self, sql, params=()):
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+
+    @contextmanager
+    def transaction(self):
+        """Exclusive write transaction, also across processes sharing the file."""
+        with self.lock:
+            if self.db.in_transaction:
+                yield self.db
+                return
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.db
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def write(self, statements):
+        """Run [(sql, params), ...] atomically."""
+        with self.transaction() as db:
+            return [db.execute(sql, params).fetchall() for sql, params in statements]
+
+
+# ---------------------------------------------------------------------------
+# OData filters
+# ---------------------------------------------------------------------------
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<open>\()|(?P<close>\))|
+        (?P<string>'(?:[^']|'')*')|
+        (?P<typed>(?:datetime|guid|X|binary)'(?:[^']|'')*')|
+        (?P<param>@\w+)|
+        (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?L?)|
+        (?P<word>[A-Za-z_][\w]*)
+    )""", re.VERBOSE)
+
+_COMPARISONS = {
+    'eq': lambda a, b: a == b,
+    'ne': lambda a, b: a != b,
+    'gt': lambda a, b: a > b,
+    'ge': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+    'le': lambda a, b: a <= b,
+}
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise HttpResponseError(message=f"InvalidInput: cannot parse filter near {text[position:]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+    return tokens
+
+
+class _FilterParser:
+    """Recursive-descent parser turning an OData filter into a predicate."""
+
+    def __init__(self, text, parameters):
+        self.tokens = _tokenize(text)
+        self.parameters = parameters or {}
+        self.index = 0
+        # Top-level "PartitionKey eq <value>" lets queries skip other partitions
+        self.partition_key = None
+        self.row_key = None
+        self.depth = 0
+        self.top_level_or = False
+
+    def parse(self):
+        predicate = self._or()
+        if self.index != len(self.tokens):
+            raise HttpResponseError(message=f"InvalidInput: unexpected {self.tokens[self.index][1]!r} in filter")
+        if self.top_level_or:
+            self.partition_key = self.row_key = None
+        return predicate
+
+    def _peek_word(self):
+        if self.index < len(self.tokens) and self.tokens[self.index][0] == 'word':
+            return self.tokens[self.index][1].lower()
+        return None
+
+    def _or(self):
+        left = self._and()
+        while self._peek_word() == 'or':
+            self.index += 1
+            if self.depth == 0:
+                self.top_level_or = True
+            right = self._and()
+            left = (lambda l, r: lambda e: l(e) or r(e))(left, right)
+        return left
+
+    def _and(self):
+        left = self._unary()
+        while self._peek_word() == 'and':
+            self.index += 1
+            right = self._unary()
+            left = (lambda l, r: lambda e: l(e) and r(e))(left, right)
+        return left
+
+    def _unary(self):
+        if self._peek_word() == 'not':
+            self.index += 1
+            self.depth += 1
+            inner = self._unary()
+            self.depth -= 1
+            return lambda e: not inner(e)
+        kind, value = self.tokens[self.index]
+        if kind == 'open':
+            self.index += 1
+            self.depth += 1
+            inner = self._or()
+            self.depth -= 1
+            if self.index >= len(self.tokens) or self.tokens[self.index][0] != 'close':
+                raise HttpResponseError(message="InvalidInput: missing ')' in filter")
+            self.index += 1
+            return inner
+        return self._comparison()
+
+    def _comparison(self):
+        kind, name = self.tokens[self.index]
+        if kind != 'word':
+            raise HttpResponseError(message=f"InvalidInput: expected a property name, got {name!r}")
+        word = name.lower()
+        if word in ('true', 'false'):
+            # A bare boolean literal
+            self.index += 1
+            return lambda e, v=(word == 'true'): v
+        operator = self.tokens[self.index + 1][1].lower()
+        if operator not in _COMPARISONS:
+            raise HttpResponseError(message=f"InvalidInput: unsupported operator {operator!r}")
+        literal = self._literal(self.tokens[self.index + 2])
+        self.index += 3
+
+        if operator == 'eq' and self.depth == 0:
+            if name == 'PartitionKey':
+                self.partition_key = literal
+            elif name == 'RowKey':
+                self.row_key = literal
+
+        compare = _COMPARISONS[operator]
+
+        def predicate(entity):
+            if name not in entity:
+                return False
+            value = entity[name]
+            try:
+                return compare(value, literal)
+            except TypeError:
+                return False
+        return predicate
+
+    def _literal(self, token):
+        kind, value = token
+        if kind == 'param':
+            key = value[1:]
+            if key not in self.parameters:
+                raise HttpResponseError(message=f"InvalidInput: missing parameter {value}")
+            return self.parameters[key]
+        if kind == 'string':
+            return value[1:-1].replace("''", "'")
+        if kind == 'typed':
+            prefix, raw = value.split("'", 1)
+            raw = raw[:-1].replace("''", "'")
+            if prefix == 'datetime':
+                return datetime.fromisoformat(raw.replace('Z', '+00:00'))
+            if prefix in ('X', 'binary'):
+                return bytes.fromhex(raw)
+            return raw
+        if kind == 'number':
+            number = value.rstrip('L')
+            return float(number) if any(c in number for c in '.eE') else int(number)
+        if kind == 'word' and value.lower() in ('true', 'false'):
+            return value.lower() == 'true'
+        raise HttpResponseError(message=f"InvalidInput: unexpected literal {value!r}")
+
+
+def compile_filter(query_filter, parameters=None):
+    """Return (predicate, partition_key, row_key) for an OData filter."""
+    parser = _FilterParser(query_filter, parameters)
+    predicate = parser.parse()
+    return predicate, parser.partition_key, parser.row_key
+
+
+# ---------------------------------------------------------------------------
+# Tables
+# ---------------------------------------------------------------------------
+
+class LocalPageIterator:
+    """Iterator of pages whose `continuation_token` points past the last page read."""
+
+    def __init__(self, fetch, page_size, continuation_token=None):
+        self._fetch = fetch
+        self._page_size = page_size
+        self.continuation_token = continuation_token
+        self._done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._done:
+            raise StopIteration
+        page = self._fetch(self.continuation_token, self._page_size + 1)
+        if len(page) > self._page_size:
+            following = page.pop()
+            self.continuation_token = {'PartitionKey': following.metadata['pk'], 'RowKey': following.metadata['rk']}
+        else:
+            self.continuation_token = None
+            self._done = True
+        return iter(page)
+
+
+class LocalItemPaged:
+    """Iterable of entities that also supports `by_page()` like ItemPaged."""
+
+    def __init__(self, fetch, results_per_page=None):
+        self._fetch = fetch
+        self._results_per_page = results_per_page or 1000
+
+    def __iter__(self):
+        for page in self.by_page():
+            yield from page
+
+    def by_page(self, continuation_token=None):
+        return LocalPageIterator(self._fetch, self._results_per_page, continuation_token)
+
+
+class LocalTableClient:
+    def __init__(self, store, table_name):
+        self.store = store
+        self.table_name = table_name
+        self.store.execute("INSERT OR IGNORE INTO tables (name) VALUES (?)", (table_name,))
+
+    # -- helpers ------------------------------------------------------------
+
+    def _row_to_entity(self, row, select=None):
+        pk, rk, etag, ts, body = row
+        data = {key: _decode_value(value) for key, value in json.loads(body).items()}
+        entity = {'PartitionKey': pk, 'RowKey': rk}
+        entity.update(data)
+        if select:
+            entity = {key: entity[key] for key in select if key in entity}
+        return LocalEntity(entity, metadata={'etag': etag, 'timestamp': datetime.fromisoformat(ts), 'pk': pk, 'rk': rk})
+
+    @staticmethod
+    def _body(entity):
+        return json.dumps({key: _encode_value(value) for key, value in entity.items()
+                           if key not in ('PartitionKey', 'RowKey')})
+
+    @staticmethod
+    def _keys(entity):
+        try:
+            return str(entity['PartitionKey']), str(entity['RowKey'])
+        except KeyError:
+            raise HttpResponseError(message="PropertiesNeedValue: PartitionKey and RowKey are required")
+
+    def _current(self, pk, rk):
+        rows = self.store.execute(
+            "SELECT pk, rk, etag, ts, body FROM entities WHERE tbl = ? AND pk = ? AND rk = ?",
+            (self.table_name, pk, rk))
+        return rows[0] if rows else None
+
+    def _plan(self, operation, entity, mode=UpdateMode.MERGE, etag=None, match_condition=None):
+        """Validate one write against current state and return (sql, params, metadata)."""
+        pk, rk = self._keys(entity)
+        current = self._current(pk, rk)
+        new_etag = _new_etag()
+        now = _utcnow().isoformat()
+
+        if operation == 'delete':
+            if current and match_condition == MatchConditions.IfNotModified and etag != current[2]:
+                raise ResourceModifiedError(message="UpdateConditionNotSatisfied")
+            return ("DELETE FROM entities WHERE tbl = ? AND pk = ? AND rk = ?",
+                    (self.table_name, pk, rk), {})
+
+        if operation == 'create':
+            if current:
+                raise ResourceExistsError(message="EntityAlreadyExists: The specified entity already exists.")
+            body = self._body(entity)
+        elif operation in ('update', 'upsert'):
+            if current is None:
+                if operation == 'update':
+                    raise ResourceNotFoundError(message="ResourceNotFound: The specified resource does not exist.")
+                body = self._body(entity)
+            else:
+                if match_condition == MatchConditions.IfNotModified and etag != current[2]:
+                    raise ResourceModifiedError(message="UpdateConditionNotSatisfied")
+                if mode == UpdateMode.REPLACE:
+                    body = self._body(entity)
+                else:
+                    merged = json.loads(current[4])
+                    merged.update(json.loads(self._body(entity)))
+                    body = json.dumps(merged)
+        else:
+            raise ValueError(f"Unsupported operation: {operation}")
+
+        return ("INSERT OR REPLACE INTO entities (tbl, pk, rk, etag, ts, body) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.table_name, pk, rk, new_etag, now, body), {'etag': new_etag, 'timestamp': now})
+
+    def _write(self, operation, entity, **kwargs):
+        with self.store.transaction() as db:
+            sql, params, metadata = self._plan(operation, entity, **kwargs)
+            db.execute(sql, params)
+        return metadata
+
+    # -- public API ---------------------------------------------------------
+
+    def create_table(self):
+        self.store.call('create_table')
+
+    def delete_table(self):
+        self.store.call('delete_table')
+        self.store.write([
+            ("DELETE FROM entities WHERE tbl = ?", (self.table_name,)),
+            ("DELETE FROM tables WHERE name = ?", (self.table_name,)),
+        ])
+
+    def create_entity(self, entity, **kwargs):
+        self.store.call('create_entity')
+        return self._write('create', entity)
+
+    def upsert_entity(self, entity, mode=UpdateMode.MERGE, **kwargs):
+        self.store.call('upsert_entity')
+        return self._write('upsert', entity, mode=mode)
+
+    def update_entity(self, entity, mode=UpdateMode.MERGE, **kwargs):
+        self.store.call('update_entity')
+        return self._write('update', entity, mode=mode,
+                           etag=kwargs.get('etag'), match_condition=kwargs.get('match_condition'))
+
+    def delete_entity(self, *args, **kwargs):
+        self.store.call('delete_entity')
+        if args and isinstance(args[0], dict):
+            entity = args[0]
+            etag = kwargs.get('etag') or getattr(entity, 'metadata', {}).get('etag')
+        else:
+            partition_key = kwargs.get('partition_key', args[0] if args else None)
+            row_key = kwargs.get('row_key', args[1] if len(args) > 1 else None)
+            entity = {'PartitionKey': partition_key, 'RowKey': row_key}
+            etag = kwargs.get('etag')
+        self._write('delete', entity, etag=etag, match_condition=kwargs.get('match_condition'))
+
+    def get_entity(self, partition_key, row_key, select=None, **kwargs):
+        self.store.call('get_entity')
+        row = self._current(str(partition_key), str(row_key))
+        if row is None:
+            raise ResourceNotFoundError(message="ResourceNotFound: The specified resource does not exist.")
+        return self._row_to_entity(row, [select] if isinstance(select, str) else select)
+
+    def query_entities(self, query_filter, parameters=None, select=None, results_per_page=None, **kwargs):
+        predicate, partition_key, row_key = compile_filter(query_filter, parameters)
+        return self._query(predicate, partition_key, row_key, select, results_per_page)
+
+    def list_entities(self, select=None, results_per_page=None, **kwargs):
+        return self._query(lambda entity: True, None, None, select, results_per_page)
+
+    def _query(self, predicate, partition_key, row_key, select, results_per_page):
+        select = [select] if isinstance(select, str) else select
+        select = [column.strip() for item in select for column in item.split(',')] if select else None
+
+        def fetch(token, limit):
+            # Each page is one billable round trip, as with the real service
+            self.store.call('query_entities')
+            conditions = ["tbl = ?"]
+            params = [self.table_name]
+            if partition_key is not None:
+                conditions.append("pk = ?")
+                params.append(str(partition_key))
+            if row_key is not None:
+                conditions.append("rk = ?")
+                params.append(str(row_key))
+            if token:
+                conditions.append("(pk > ? OR (pk = ? AND rk >= ?))")
+                params.extend([token['PartitionKey'], token['PartitionKey'], token['RowKey']])
+            sql = (f"SELECT pk, rk, etag, ts, body FROM entities WHERE {' AND '.join(conditions)} "
+                   f"ORDER BY pk, rk")
+
+            page = []
+            with self.store.lock:
+                cursor = self.store.db.execute(sql, params)
+                for row in cursor:
+                    entity = self._row_to_entity(row)
+                    if predicate(entity):
+                        page.append(self._row_to_entity(row, select) if select else entity)
+                        if len(page) >= limit:
+                            break
+                cursor.close()
+            return page
+
+        return LocalItemPaged(fetch, results_per_page)
+
+    def submit_transaction(self, operations, **kwargs):
+        self.store.call('submit_transaction')
+        operations = list(operations)
+        if len(operations) > MAX_BATCH_SIZE:
+            raise TableTransactionError(message=f"0:InvalidInput: a batch may hold at most {MAX_BATCH_SIZE} operations")
+        if len({str(op[1]['PartitionKey']) for op in operations}) > 1:
+            raise TableTransactionError(message="0:CommandsInBatchActOnDifferentPartitions")
+
+        results = []
+        with self.store.transaction() as db:
+            for index, operation in enumerate(operations):
+                kind, entity = operation[0], operation[1]
+                options = dict(operation[2]) if len(operation) > 2 and operation[2] else {}
+                kind = getattr(kind, 'value', kind)
+                try:
+                    sql, params, metadata = self._plan(
+                        kind, entity,
+                        mode=options.get('mode', UpdateMode.MERGE),
+                        etag=options.get('etag'),
+                        match_condition=options.get('match_condition'))
+                except (ResourceExistsError, ResourceNotFoundError, ResourceModifiedError) as e:
+                    raise TableTransactionError(message=f"{index}:{e.message}")
+                db.execute(sql, params)
+                results.append(metadata)
+        return results
+
+
+class LocalTableServiceClient:
+    def __init__(self, store):
+        self.store = store
+
+    @classmethod
+    def from_connection_string(cls, connection_string, **kwargs):
+        return cls(get_store(connection_string))
+
+    def get_table_client(self, table_name, **kwargs):
+        return LocalTableClient(self.store, table_name)
+
+    def create_table(self, table_name, **kwargs):
+        self.store.call('create_table')
+        if self.store.execute("SELECT name FROM tables WHERE name = ?", (table_name,)):
+            raise ResourceExistsError(message="TableAlreadyExists: The table specified already exists.")
+        return LocalTableClient(self.store, table_name)
+
+    def create_table_if_not_exists(self, table_name, **kwargs):
+        self.store.call('create_table')
+        return LocalTableClient(self.store, table_name)
+
+    def delete_table(self, table_name, **kwargs):
+        LocalTableClient(self.store, table_name).delete_table()
+
+    def list_tables(self, results_per_page=None, **kwargs):
+        def fetch(token, limit):
+            self.store.call('list_tables')
+            rows = self.store.execute("SELECT name FROM tables WHERE name >= ? ORDER BY name LIMIT ?",
+                                      (token['PartitionKey'] if token else '', limit))
+            return [LocalTableItem({'name': row[0]}, metadata={'pk': row[0], 'rk': ''}) for row in rows]
+
+        return LocalItemPaged(fetch, results_per_page)
+
+
+class LocalTableItem(LocalEntity):
+    """Table listing entry; exposes `.name` like azure.data.tables.TableItem."""
+
+    @property
+    def name(self):
+        return self['name']
+
+
+# ---------------------------------------------------------------------------
+# Queues
+# ---------------------------------------------------------------------------
+
+class LocalQueueMessage(dict):
+    """Message with the attributes of azure.storage.queue.QueueMessage."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class LocalQueueClient:
+    def __init__(self, store, queue_name):
+        self.store = store
+        self.queue_name = queue_name
+
+    @classmethod
+    def from_connection_string(cls, connection_string, queue_name, **kwargs):
+        return cls(get_store(connection_string), queue_name)
+
+    def create_queue(self, **kwargs):
+        self.store.call('create_queue')
+
+    def send_message(self, content, visibility_timeout=None, time_to_live=None, **kwargs):
+        self.store.call('send_message')
+        now = time.time()
+        message_id = str(uuid.uuid4())
+        visible_at = now + (visibility_timeout or 0)
+        expires_at = now + (time_to_live if time_to_live and time_to_live > 0 else 7 * 24 * 3600)
+        self.store.write([(
+            "INSERT INTO messages (id, queue, content, inserted, visible_at, expires_at, dequeue_count, pop_receipt) "
+            "VALUES (?, ?, ?, ?, ?, ?, 0, ?)",
+            (message_id, self.queue_name, content, now, visible_at, expires_at, uuid.uuid4().hex)
+        )])
+        return LocalQueueMessage(
+            id=message_id, content=content, dequeue_count=0,
+            inserted_on=datetime.fromtimestamp(now, timezone.utc),
+            expires_on=datetime.fromtimestamp(expires_at, timezone.utc),
+            next_visible_on=datetime.fromtimestamp(visible_at, timezone.utc)
+        )
+
+    def receive_messages(self, messages_per_page=None, visibility_timeout=30, max_messages=None, **kwargs):
+        self.store.call('receive_messages')
+        limit = max_messages or messages_per_page or 32
+        now = time.time()
+        received = []
+        with self.store.transaction() as db:
+            rows = db.execute(
+                "SELECT id, content, inserted, dequeue_count FROM messages "
+                "WHERE queue = ? AND visible_at <= ? AND expires_at > ? ORDER BY visible_at LIMIT ?",
+                (self.queue_name, now, now, limit)).fetchall()
+            for message_id, content, inserted, dequeue_count in rows:
+                pop_receipt = uuid.uuid4().hex
+                db.execute(
+                    "UPDATE messages SET visible_at = ?, dequeue_count = dequeue_count + 1, pop_receipt = ? WHERE id = ?",
+                    (now + visibility_timeout, pop_receipt, message_id))
+                received.append(LocalQueueMessage(
+                    id=message_id, content=content, dequeue_count=dequeue_count + 1, pop_receipt=pop_receipt,
+                    inserted_on=datetime.fromtimestamp(inserted, timezone.utc)))
+        return iter(received)
+
+    def peek_messages(self, max_messages=None, **kwargs):
+        self.store.call('peek_messages')
+        now = time.time()
+        rows = self.store.execute(
+            "SELECT id, content, inserted, dequeue_count FROM messages "
+            "WHERE queue = ? AND visible_at <= ? AND expires_at > ? ORDER BY visible_at LIMIT ?",
+            (self.queue_name, now, now, max_messages or 1))
+        return [LocalQueueMessage(id=r[0], content=r[1], dequeue_count=r[3],
+                                  inserted_on=datetime.fromtimestamp(r[2], timezone.utc)) for r in rows]
+
+    def delete_message(self, message, pop_receipt=None, **kwargs):
+        self.store.call('delete_message')
+        message_id = message if isinstance(message, str) else message['id']
+        self.store.write([("DELETE FROM messages WHERE id = ?", (message_id,))])
+
+    def clear_messages(self, **kwargs):
+        self.store.call('clear_messages')
+        self.store.write([("DELETE FROM messages WHERE queue = ?", (self.queue_name,))])
+
+    def get_queue_properties(self, **kwargs):
+        self.store.call('get_queue_properties')
+        count = self.store.execute("SELECT COUNT(*) FROM messages WHERE queue = ?", (self.queue_name,))[0][0]
+        return LocalQueueMessage(name=self.queue_name, approximate_message_count=count, metadata={})
+
+
+# ---------------------------------------------------------------------------
+# Blobs
+# ---------------------------------------------------------------------------
+
+class LocalContentSettings:
+    def __init__(self, content_type=None, content_encoding=None, cache_control=None):
+        self.content_type = content_type
+        self.content_encoding = content_encoding
+        self.cache_control = cache_control
+
+
+class LocalBlobProperties:
+    def __init__(self, container, name, size, content_settings, metadata, etag, last_modified):
+        self.container = container
+        self.name = name
+        self.size = size
+        self.content_settings = content_settings
+        self.metadata = metadata
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+class LocalBlobDownloader:
+    def __init__(self, data, properties):
+        self._data = data
+        self.properties = properties
+        self.size = properties.size
+
+    def readall(self):
+        return self._data
+
+    def chunks(self):
+        yield self._data
+
+
+class LocalBlobClient:
+    def __init__(self, store, container, blob):
+        self.store = store
+        self.container_name = container
+        self.blob_name = blob
+
+    @property
+    def url(self):
+        return f"local://{self.container_name}/{self.blob_name}"
+
+    def _row(self):
+        rows = self.store.execute(
+            "SELECT data, content_type, content_encoding, cache_control, metadata, etag, modified "
+            "FROM blobs WHERE container = ? AND name = ?", (self.container_name, self.blob_name))
+        if not rows:
+            raise ResourceNotFoundError(message="BlobNotFound: The specified blob does not exist.")
+        return rows[0]
+
+    def _properties(self, row):
+        data, content_type, content_encoding, cache_control, metadata, etag, modified = row
+        return LocalBlobProperties(
+            self.container_name, self.blob_name, len(data),
+            LocalContentSettings(content_type, content_encoding, cache_control),
+            json.loads(metadata or '{}'), etag, datetime.fromisoformat(modified))
+
+    def upload_blob(self, data, overwrite=False, content_settings=None, metadata=None, **kwargs):
+        self.store.call('upload_blob')
+        if hasattr(data, 'read'):
+            data = data.read()
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        exists = self.store.execute("SELECT 1 FROM blobs WHERE container = ? AND name = ?",
+                                    (self.container_name, self.blob_name))
+        if exists and not overwrite:
+            raise ResourceExistsError(message="BlobAlreadyExists: The specified blob already exists.")
+        etag = f'"0x{uuid.uuid4().hex[:16].upper()}"'
+        now = _utcnow()
+        self.store.write([(
+            "INSERT OR REPLACE INTO blobs (container, name, data, content_type, content_encoding, cache_control, "
+            "metadata, etag, modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.container_name, self.blob_name, bytes(data),
+             getattr(content_settings, 'content_type', None) or 'application/octet-stream',
+             getattr(content_settings, 'content_encoding', None),
+             getattr(content_settings, 'cache_control', None),
+             json.dumps(metadata or {}), etag, now.isoformat())
+        )])
+        return {'etag': etag, 'last_modified': now}
+
+    def download_blob(self, **kwargs):
+        self.store.call('download_blob')
+        row = self._row()
+        return LocalBlobDownloader(row[0], self._properties(row))
+
+    def get_blob_properties(self, **kwargs):
+        self.store.call('get_blob_properties')
+        return self._properties(self._row())
+
+    def exists(self, **kwargs):
+        self.store.call('get_blob_properties')
+        return bool(self.store.execute("SELECT 1 FROM blobs WHERE container = ? AND name = ?",
+                                       (self.container_name, self.blob_name)))
+
+    def delete_blob(self, **kwargs):
+        self.store.call('delete_blob')
+        self._row()
+        self.store.write([("DELETE FROM blobs WHERE container = ? AND name = ?",
+                           (self.container_name, self.blob_name))])
+
+
+class LocalContainerClient:
+    def __init__(self, store, container):
+        self.store = store
+        self.container_name = container
+
+    def create_container(self, **kwargs):
+        self.store.call('create_container')
+        if self.store.execute("SELECT 1 FROM containers WHERE name = ?", (self.container_name,)):
+            raise ResourceExistsError(message="ContainerAlreadyExists: The specified container already exists.")
+        self.store.write([("INSERT INTO containers (name) VALUES (?)", (self.container_name,))])
+        return self
+
+    def get_blob_client(self, blob):
+        return LocalBlobClient(self.store, self.container_name, blob)
+
+    def upload_blob(self, name, data, **kwargs):
+        blob = self.get_blob_client(name)
+        blob.upload_blob(data, **kwargs)
+        return blob
+
+    def list_blobs(self, name_starts_with=None, **kwargs):
+        self.store.call('list_blobs')
+        rows = self.store.execute(
+            "SELECT name, data, content_type, content_encoding, cache_control, metadata, etag, modified "
+            "FROM blobs WHERE container = ? AND name >= ? ORDER BY name",
+            (self.container_name, name_starts_with or ''))
+        for name, *rest in rows:
+            if name_starts_with and not name.startswith(name_starts_with):
+                break
+            yield LocalBlobClient(self.store, self.container_name, name)._properties(rest)
+
+
+class LocalBlobServiceClient:
+    def __init__(self, store):
+        self.store = store
+
+    @classmethod
+    def from_connection_string(cls, connection_string, **kwargs):
+        return cls(get_store(connection_string))
+
+    def create_container(self, name, **kwargs):
+        return LocalContainerClient(self.store, name).create_container()
+
+    def get_container_client(self, container):
+        return LocalContainerClient(self.store, container)
+
+    def get_blob_client(self, container, blob, **kwargs):
+        return LocalBlobClient(self.store, container, blob)
+
+    def list_containers(self, **kwargs):
+        self.store.call('list_containers')
+        return [{'name': row[0]} for row in self.store.execute("SELECT name FROM containers ORDER BY name")]
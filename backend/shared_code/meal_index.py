@@ -0,0 +1,388 @@
+"""
+AREA MEAL INDEX
+Filter and sort an area's menu in memory instead of in the browser
+
+An area's available meals are loaded once per catalog version (see
+menu.bump_version) into a MealIndex shared by every request on the
+worker. Each meal is serialized to JSON once; the filterable fields are
+kept as NumPy columns:
+
+- Price and PreparationTime also as sorted copies, so a range is two
+  bisections and a slice of row numbers
+- Category and restaurant as small integer codes, with each one's rows
+  precomputed
+- a sort order per sortable field
+- price and prep-time bucket codes for facet counts (np.bincount over
+  the matching rows)
+
+A query starts from its most selective candidate rows (a range slice or
+a category's rows), checks the remaining filters on those rows only, and
+joins the pre-serialized meals, so its cost grows with the result size
+rather than the menu size.
+
+numpy is imported when the first index is built, not with this module.
+
+An area published from this worker is dropped from its cache, and
+rebuilt by the next request reading it (other workers notice the new
+catalog version). Rebuilding costs one partition query; patching an
+index in place would mean rebuilding every column and the search index
+anyway.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from shared_code import menu, responses
+
+# Sort parameter -> column sorted by ('-' prefix for descending)
+SORTS = {
+    'price': 'price',
+    '-price': 'price',
+    'preparationTime': 'prep',
+    'calories': 'calories',
+    'name': 'name'
+}
+
+# Query parameter -> (select() argument, parser)
+FILTER_PARAMS = {
+    'category': ('categories', lambda value: [name.strip() for name in value.split(',') if name.strip()]),
+    'vegetarian': ('vegetarian', lambda value: {'true': True, 'false': False}[value.lower()]),
+    'minPrice': ('min_price', float),
+    'maxPrice': ('max_price', float),
+    'maxPrepTime': ('max_prep', int),
+    'maxCalories': ('max_calories', int),
+    'restaurantId': ('restaurant_ids', lambda value: [rid.strip() for rid in value.split(',') if rid.strip()])
+}
+
+# Facet buckets: meals up to each price / prep time, matching maxPrice / maxPrepTime
+PRICE_BUCKETS = [10, 15, 20, 30]
+PREP_BUCKETS = [15, 20, 30, 45]
+MAX_RESTAURANT_FACETS = 20
+
+# Search and typeahead accept a cached index checked this many seconds ago
+# without reading the catalog version again
+MAX_AGE = float(os.getenv('MENU_INDEX_MAX_AGE', '30'))
+
+np = None  # numpy, imported when the first index is built (see MealIndex)
+
+_indexes = {}
+_areas = {'areas': [], 'checked': None}
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _whole(value):
+    """A stored count (calories) as a non-negative int32; a value that isn't one counts as 0."""
+    try:
+        return min(max(int(float(value or 0)), 0), 2 ** 31 - 1)
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def _label(value):
+    """A text field as a hashable, sortable key whatever was stored."""
+    return value if isinstance(value, str) else ('' if value is None else str(value))
+
+
+class MealIndex:
+    """The available meals of one area at one catalog version."""
+
+    def __init__(self, area, version, meals, source='readModel'):
+        # Deferred like the storage SDKs: importing this module stays cheap
+        # for requests answered from a snapshot or a cached index
+        global np
+        import numpy as np
+
+        self.area = area
+        self.version = version
+        self.source = source
+        self.checked = time.monotonic()
+        self.search = None  # meal_search.SearchIndex, built on first search
+        self.rows = [responses.dumps(meal) for meal in meals]
+        self.ids = [meal['id'] for meal in meals]
+        self.size = len(meals)
+
+        self.price = np.array([meal['price'] for meal in meals], dtype=np.float64)
+        self.prep = np.array([meal['preparationTime'] for meal in meals], dtype=np.int32)
+        self.calories = np.array([_whole(meal['calories']) for meal in meals], dtype=np.int32)
+        self.vegetarian = np.array([bool(meal['isVegetarian']) for meal in meals], dtype=bool)
+
+        self.categories = {}
+        codes = [self.categories.setdefault(_label(meal['category']), len(self.categories)) for meal in meals]
+        self.category = np.array(codes, dtype=np.int16)
+        self.category_rows = _group_rows(self.category, len(self.categories))
+
+        self.restaurants = {}
+        self.restaurant_names = []
+        codes = []
+        for meal in meals:
+            code = self.restaurants.setdefault(meal['restaurantId'], len(self.restaurants))
+            if code == len(self.restaurant_names):
+                self.restaurant_names.append(meal['restaurantName'])
+            codes.append(code)
+        self.restaurant = np.array(codes, dtype=np.int32)
+        self.restaurant_rows = _group_rows(self.restaurant, len(self.restaurants))
+
+        # Bucket b holds prices above PRICE_BUCKETS[b - 1] and up to PRICE_BUCKETS[b]
+        self.price_bucket = np.searchsorted(PRICE_BUCKETS, self.price, side='left')
+        self.prep_bucket = np.searchsorted(PREP_BUCKETS, self.prep, side='left')
+        self._facets = None
+
+        # Stable sorts keep storage order among equal values
+        self.orders = {
+            'price': np.argsort(self.price, kind='stable'),
+            'prep': np.argsort(self.prep, kind='stable'),
+            'calories': np.argsort(self.calories, kind='stable'),
+            'name': np.array(sorted(range(self.size), key=lambda row: _label(meals[row]['name']).lower()), dtype=np.int64)
+        }
+        self.price_sorted = self.price[self.orders['price']]
+        self.prep_sorted = self.prep[self.orders['prep']]
+
+        # rank[column][row] = position of row in that column's sort order
+        self.ranks = {}
+        for column, order in self.orders.items():
+            rank = np.empty(self.size, dtype=np.int64)
+            rank[order] = np.arange(self.size)
+            self.ranks[column] = rank
+
+    def _range(self, column, sorted_values, low, high):
+        """Rows with low <= value <= high, by bisection."""
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side='left')
+        end = self.size if high is None else np.searchsorted(sorted_values, high, side='right')
+        return self.orders[column][start:end]
+
+    def select(self, categories=None, vegetarian=None, min_price=None, max_price=None,
+               max_prep=None, max_calories=None, restaurant_ids=None, sort=None):
+        """Row numbers of the meals matching every filter, in `sort` order."""
+        # Candidate rows: the smallest set some filter can produce directly
+        sources = []
+        if min_price is not None or max_price is not None:
+            sources.append(self._range('price', self.price_sorted, min_price, max_price))
+        if max_prep is not None:
+            sources.append(self._range('prep', self.prep_sorted, None, max_prep))
+        codes = None
+        if categories is not None:
+            codes = [self.categories[name] for name in categories if name in self.categories]
+            if not codes:
+                return np.empty(0, dtype=np.int64)
+            sources.append(np.concatenate([self.category_rows[code] for code in codes]))
+        restaurant_codes = None
+        if restaurant_ids is not None:
+            restaurant_codes = [self.restaurants[rid] for rid in restaurant_ids if rid in self.restaurants]
+            if not restaurant_codes:
+                return np.empty(0, dtype=np.int64)
+            sources.append(np.concatenate([self.restaurant_rows[code] for code in restaurant_codes]))
+        rows = min(sources, key=len) if sources else np.arange(self.size)
+
+        # Check every filter on the candidates only
+        keep = np.ones(len(rows), dtype=bool)
+        if min_price is not None:
+            keep &= self.price[rows] >= min_price
+        if max_price is not None:
+            keep &= self.price[rows] <= max_price
+        if max_prep is not None:
+            keep &= self.prep[rows] <= max_prep
+        if max_calories is not None:
+            keep &= self.calories[rows] <= max_calories
+        if vegetarian is not None:
+            keep &= self.vegetarian[rows] == vegetarian
+        if codes is not None:
+            keep &= np.isin(self.category[rows], codes)
+        if restaurant_codes is not None:
+            keep &= np.isin(self.restaurant[rows], restaurant_codes)
+        rows = rows[keep]
+
+        if sort:
+            rows = rows[np.argsort(self.ranks[SORTS[sort]][rows], kind='stable')]
+            if sort.startswith('-'):
+                rows = rows[::-1]
+        else:
+            rows = np.sort(rows)
+        return rows
+
+    def facets(self, **filters):
+        """
+        Meal counts per category, vegetarian flag, price and prep-time
+        bucket and restaurant. Each facet is counted under every filter but
+        its own, so its other values stay selectable; the unfiltered counts
+        are computed once per index.
+        """
+        filters.pop('sort', None)
+        if not filters:
+            if self._facets is None:
+                self._facets = self._count_facets(lambda own: None)
+            return self._facets
+
+        def rows_without(own):
+            others = {name: value for name, value in filters.items() if name not in own}
+            return self.select(**others) if others else None
+        return self._count_facets(rows_without)
+
+    def _count_facets(self, rows_without):
+        def counts(codes, length, own):
+            rows = rows_without(own)
+            return np.bincount(codes if rows is None else codes[rows], minlength=length)
+
+        categories = counts(self.category, len(self.categories), ('categories',))
+        vegetarian = counts(self.vegetarian.astype(np.int8), 2, ('vegetarian',))
+        # Cumulative: "up to $15" includes every cheaper bucket
+        prices = np.cumsum(counts(self.price_bucket, len(PRICE_BUCKETS) + 1, ('max_price',)))
+        preps = np.cumsum(counts(self.prep_bucket, len(PREP_BUCKETS) + 1, ('max_prep',)))
+        restaurants = counts(self.restaurant, len(self.restaurants), ('restaurant_ids',))
+
+        names = list(self.categories)
+        top = np.argsort(-restaurants, kind='stable')[:MAX_RESTAURANT_FACETS]
+        restaurant_ids = list(self.restaurants)
+        return {
+            'category': sorted(({'value': names[code], 'count': int(count)}
+                                for code, count in enumerate(categories) if count),
+                               key=lambda facet: -facet['count']),
+            'vegetarian': [{'value': True, 'count': int(vegetarian[1])},
+                           {'value': False, 'count': int(vegetarian[0])}],
+            'price': [{'maxPrice': limit, 'label': f"Up to ${limit}", 'count': int(prices[bucket])}
+                      for bucket, limit in enumerate(PRICE_BUCKETS)],
+            'preparationTime': [{'maxPrepTime': limit, 'label': f"Up to {limit} min", 'count': int(preps[bucket])}
+                                for bucket, limit in enumerate(PREP_BUCKETS)],
+            'restaurant': [{'restaurantId': restaurant_ids[code], 'name': self.restaurant_names[code],
+                            'count': int(restaurants[code])} for code in top.tolist() if restaurants[code]]
+        }
+
+    def restaurant_menus(self, rows=None):
+        """
+        {restaurant id: its rows} among `rows` (default: every meal), each
+        restaurant's rows kept in the order given.
+        """
+        if rows is None:
+            return {restaurant_id: self.restaurant_rows[code] for restaurant_id, code in self.restaurants.items()}
+        restaurant_ids = list(self.restaurants)
+        groups = _group_rows(self.restaurant[rows], len(self.restaurants))
+        return {restaurant_ids[code]: rows[positions] for code, positions in groups.items() if len(positions)}
+
+    def meals_json(self, rows):
+        """The JSON array of the given meals."""
+        return '[' + ','.join([self.rows[row] for row in rows.tolist()]) + ']'
+
+    def json_rows(self, rows):
+        """The serialized meals of the given rows, one by one."""
+        return (self.rows[row] for row in rows.tolist())
+
+    def meals(self):
+        """Every meal of the index as a dict, in index order."""
+        return [json.loads(row) for row in self.rows]
+
+
+def merge_areas(indexes, filters):
+    """
+    The filtered meals of several areas with each meal listed once:
+    (serialized meals, [{'area', 'version', 'count', 'mealIds'}]). A meal
+    delivered to several areas appears under the first of them in `meals`
+    and in every area's mealIds.
+    """
+    meals = []
+    seen = set()
+    groups = []
+    for index in indexes:
+        rows = index.select(**filters).tolist()
+        ids = [index.ids[row] for row in rows]
+        for row, meal_id in zip(rows, ids):
+            if meal_id not in seen:
+                seen.add(meal_id)
+                meals.append(index.rows[row])
+        groups.append({'area': index.area, 'version': index.version, 'count': len(ids), 'mealIds': ids})
+    return meals, groups
+
+
+def _group_rows(codes, count):
+    """{code: sorted rows having it}, from one stable sort of the codes."""
+    order = np.argsort(codes, kind='stable')
+    bounds = np.cumsum(np.bincount(codes, minlength=count))
+    return {code: order[(bounds[code - 1] if code else 0):bounds[code]] for code in range(count)}
+
+
+def parse_filters(params):
+    """
+    select() arguments from request query parameters, and the applied
+    filters to echo back. Raises ValueError naming a bad parameter.
+    """
+    arguments = {}
+    applied = {}
+    for name, (argument, parse) in FILTER_PARAMS.items():
+        value = params.get(name)
+        if value is None or value == '':
+            continue
+        try:
+            arguments[argument] = parse(value)
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid value for '{name}': {value}")
+        applied[name] = arguments[argument]
+    sort = params.get('sort')
+    if sort:
+        if sort not in SORTS:
+            raise ValueError(f"'sort' must be one of: {', '.join(SORTS)}")
+        arguments['sort'] = applied['sort'] = sort
+    return arguments, applied
+
+
+def _area_lock(area):
+    with _locks_guard:
+        return _locks.setdefault(area, threading.Lock())
+
+
+def get_index(table_service, area, timer, max_age=0, version=None):
+    """
+    The area's MealIndex at its current catalog version, and whether it
+    was built for this request. One version point read when cached, or
+    none at all if the cached index was checked under `max_age` seconds ago
+    or the caller passes the CatalogVersions row it already read.
+    """
+    index = _indexes.get(area)
+    if max_age and index and time.monotonic() - index.checked < max_age:
+        return index, False
+
+    if version is None:
+        with timer.span('version'):
+            version = menu.get_version(table_service.get_table_client(menu.VERSIONS_TABLE), area)
+    current = version.get('Version') if version else None
+    if current and index and index.version == current:
+        index.checked = time.monotonic()
+        return index, False
+
+    # One request builds a stale area's index; the others wait and share it
+    with _area_lock(area):
+        index = _indexes.get(area)
+        if current and index and index.version == current:
+            return index, False
+        query, source = menu.area_meals(table_service, area, version)
+        with timer.span('build'):
+            index = MealIndex(area, current, [menu.format_meal(entity, area) for entity in query], source)
+        if current:
+            _indexes[area] = index
+    return index, True
+
+
+def known_areas(table_service, timer, max_age=0):
+    """Every area with a catalog version, i.e. with a published menu."""
+    checked = _areas['checked']
+    if checked is not None and max_age and time.monotonic() - checked < max_age:
+        return _areas['areas']
+    with timer.span('areas'):
+        areas = menu.list_areas(table_service)
+    _areas.update(areas=areas, checked=time.monotonic())
+    return areas
+
+
+def forget(area):
+    """Drop the area's cached index after this worker published to it."""
+    _indexes.pop(area, None)
+
+
+def clear():
+    _indexes.clear()
+    _areas.update(areas=[], checked=None)
+
+
+menu.register_cache(forget)
+
@@ -0,0 +1,170 @@
+"""
+MEAL SEARCH
+Full-text search and typeahead over an area's menu
+
+A SearchIndex is built from a MealIndex (see meal_index) the first time
+that area and catalog version is searched, entirely from memory:
+
+- an inverted index term -> (rows, weighted term frequencies) over Name,
+  Description, RestaurantName and Category, ranked with BM25; a term in
+  the name weighs more than one in the description
+- the sorted vocabulary, so the last word of a query is matched as a
+  prefix by bisection (search-as-you-type)
+- a prefix trie over the vocabulary whose nodes keep their most frequent
+  completions, so a suggestion is a walk of len(prefix) nodes
+
+Words of a query must all match (the last one as a prefix).
+"""
+
+import bisect
+import heapq
+import math
+import re
+import threading
+
+np = None  # numpy, imported when the first search index is built
+
+TOKEN = re.compile(r'[^\W_]+')
+
+# Field -> weight of each occurrence of a term in it
+FIELDS = {'name': 3.0, 'restaurantName': 2.0, 'category': 2.0, 'description': 1.0}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+MAX_EXPANSIONS = 50  # terms a query's last word may expand to
+SUGGESTIONS = 10     # completions kept per trie node
+
+_build_lock = threading.Lock()
+
+
+def tokenize(text):
+    """"Chicken Tikka-Masala!" -> ['chicken', 'tikka', 'masala']"""
+    return TOKEN.findall(str(text or '').lower())
+
+
+class SearchIndex:
+    """Inverted index, vocabulary and suggestion trie of one MealIndex."""
+
+    def __init__(self, meals):
+        global np
+        import numpy as np
+
+        self.size = len(meals)
+        postings = {}
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for row, meal in enumerate(meals):
+            for field, weight in FIELDS.items():
+                for term in tokenize(meal.get(field)):
+                    frequencies = postings.setdefault(term, {})
+                    frequencies[row] = frequencies.get(row, 0.0) + weight
+                    lengths[row] += weight
+
+        average = float(lengths.mean()) if self.size else 1.0
+        self.norm = K1 * (1 - B + B * lengths / (average or 1.0))
+        self.postings = {}
+        self.idf = {}
+        for term, frequencies in postings.items():
+            self.postings[term] = (np.fromiter(frequencies.keys(), dtype=np.int64, count=len(frequencies)),
+                                   np.fromiter(frequencies.values(), dtype=np.float32, count=len(frequencies)))
+            self.idf[term] = math.log(1 + (self.size - len(frequencies) + 0.5) / (len(frequencies) + 0.5))
+        self.vocabulary = sorted(self.postings)
+
+        # Trie node: [children, [(meal count, term), ...] most frequent first]
+        self.trie = [{}, []]
+        for term in self.vocabulary:
+            if term.isdigit():
+                continue  # numbers are searchable but make poor suggestions
+            count = len(self.postings[term][0])
+            node = self.trie
+            for char in term:
+                node = node[0].setdefault(char, [{}, []])
+                heapq.heappush(node[1], (count, term))
+                if len(node[1]) > SUGGESTIONS:
+                    heapq.heappop(node[1])
+        self._sort_trie(self.trie)
+
+    def _sort_trie(self, root):
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            node[1].sort(key=lambda entry: (-entry[0], entry[1]))
+            stack.extend(node[0].values())
+
+    def expand(self, prefix):
+        """Indexed terms starting with `prefix`, the most frequent first."""
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + '\uffff', start)
+        terms = self.vocabulary[start:end]
+        if len(terms) > MAX_EXPANSIONS:
+            terms = heapq.nlargest(MAX_EXPANSIONS, terms, key=lambda term: len(self.postings[term][0]))
+        return terms
+
+    def completions(self, prefix):
+        """[(meal count, term)] of the most frequent terms starting with `prefix`."""
+        node = self.trie
+        for char in prefix:
+            node = node[0].get(char)
+            if node is None:
+                return []
+        return node[1]
+
+    def search(self, query, limit, rows=None):
+        """
+        (rows, scores, matches): the best `limit` rows for `query` by BM25,
+        the score of each and how many rows matched. `rows` restricts the
+        search to those rows (e.g. a MealIndex.select() result).
+        """
+        words = tokenize(query)
+        if not words:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), 0
+        groups = [[word] for word in words[:-1]] + [self.expand(words[-1])]
+
+        scores = np.zeros(self.size, dtype=np.float32)
+        matched = np.zeros(self.size, dtype=np.int16)
+        for group in groups:
+            hit = np.zeros(self.size, dtype=bool)
+            for term in group:
+                posting = self.postings.get(term)
+                if posting is None:
+                    continue
+                term_rows, frequencies = posting
+                scores[term_rows] += self.idf[term] * frequencies * (K1 + 1) / (frequencies + self.norm[term_rows])
+                hit[term_rows] = True
+            matched += hit
+
+        candidates = np.flatnonzero(matched == len(groups))
+        if rows is not None:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        matches = len(candidates)
+        if matches > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return candidates, scores[candidates], matches
+
+
+def for_index(index):
+    """The SearchIndex of a MealIndex, built on first use."""
+    if index.search is None:
+        with _build_lock:
+            if index.search is None:
+                index.search = SearchIndex(index.meals())
+    return index.search
+
+
+def suggest(search_indexes, query, limit):
+    """
+    Typeahead completions of the last word of `query` across one or more
+    areas' SearchIndexes: [{'text', 'count'}], most frequent first.
+    """
+    words = tokenize(query)
+    if not words:
+        return []
+    counts = {}
+    for search_index in search_indexes:
+        for count, term in search_index.completions(words[-1]):
+            counts[term] = counts.get(term, 0) + count
+    leading = ' '.join(words[:-1])
+    best = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return [{'text': f"{leading} {term}" if leading else term, 'count': count} for term, count in best]
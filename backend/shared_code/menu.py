@@ -0,0 +1,490 @@
+"""
+MENU WRITES AND THE AREA READ MODEL
+Meal validation, batched meal inserts and the MealsByArea read model
+
+Meals are partitioned by restaurant, which suits writes but means an
+area's menu can only be found by scanning every restaurant's partition.
+MealsByArea keeps a copy of each meal's menu fields in one partition per
+area it delivers to (a meal sold in three areas has three rows), so an
+area's menu is a single-partition query.
+
+CatalogVersions holds one row per area whose Version changes on every
+write to that area's menu, so per-area caches can tell when they are
+stale. Its Complete flag is set once the read model has been backfilled
+from Meals (see rebuild_area_model); until then an area is still served
+by scanning Meals.
+
+MealChanges is the area's change log for delta sync: every published row
+is also appended to the area's partition under RowKey
+'<ModifiedDate>_<mealId>', and a meal leaving an area appends a Removed
+tombstone. "What changed since T" is then a single-partition range query.
+
+The Azure SDK is imported by the functions that write, as in
+shared_code/storage, so importing this module stays cheap for getMeals.
+"""
+
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+MEALS_TABLE = 'Meals'
+AREA_TABLE = 'MealsByArea'
+VERSIONS_TABLE = 'CatalogVersions'
+CHANGES_TABLE = 'MealChanges'
+VERSION_PARTITION = 'area'
+
+BATCH_SIZE = 100  # Table Storage's limit per transaction
+PUBLISH_WORKERS = int(os.getenv('MENU_PUBLISH_WORKERS', '8'))
+CHANGE_RETENTION_DAYS = int(os.getenv('MENU_CHANGE_RETENTION_DAYS', '7'))
+
+REQUIRED_FIELDS = ['name', 'description', 'price', 'preparationTime', 'deliveryAreas', 'restaurantName']
+
+# Meal properties copied into MealsByArea rows
+AREA_FIELDS = ['Name', 'Description', 'Price', 'PreparationTime', 'Category', 'IsAvailable', 'IsVegetarian',
+               'Calories', 'DeliveryAreas', 'RestaurantName', 'RestaurantId', 'CreatedDate', 'ModifiedDate',
+               'ImageUrl', 'ImageBlobPath']
+
+# Request fields an update may change, and the entity property each maps to
+UPDATABLE_FIELDS = {
+    'name': 'Name',
+    'description': 'Description',
+    'price': 'Price',
+    'preparationTime': 'PreparationTime',
+    'category': 'Category',
+    'isAvailable': 'IsAvailable',
+    'isVegetarian': 'IsVegetarian',
+    'calories': 'Calories',
+    'deliveryAreas': 'DeliveryAreas',
+    'imageUrl': 'ImageUrl'
+}
+
+
+# Callbacks dropping an area from an in-process menu cache; see register_cache
+_caches = []
+
+
+def timestamp(moment=None):
+    """Fixed-width UTC ISO timestamp, so change log keys sort by time."""
+    return (moment or datetime.utcnow()).strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+
+def parse_delivery_areas(value):
+    """['Central', 'North'] or 'Central,North' -> ['Central', 'North']"""
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, (list, tuple)):
+        return []
+    return [str(area).strip() for area in value if str(area).strip()]
+
+
+def validate_meal(item):
+    """Problems with one meal of a request body; an empty list means it is valid."""
+    if not isinstance(item, dict):
+        return ["Meal must be an object"]
+
+    missing = [field for field in REQUIRED_FIELDS if field not in item]
+    if missing:
+        return [f"Missing required fields: {', '.join(missing)}"]
+
+    errors = []
+    if not isinstance(item['name'], str):
+        errors.append("Name must be text")
+    elif not item['name'].strip():
+        errors.append("Name must not be empty")
+    try:
+        if float(item['price']) < 0:
+            errors.append("Price must not be negative")
+    except (TypeError, ValueError):
+        errors.append("Price must be a number")
+    try:
+        if int(item['preparationTime']) < 0:
+            errors.append("Preparation time must not be negative")
+    except (TypeError, ValueError):
+        errors.append("Preparation time must be a whole number of minutes")
+    if item.get('calories') not in (None, ''):
+        try:
+            if int(item['calories']) < 0:
+                errors.append("Calories must not be negative")
+        except (TypeError, ValueError):
+            errors.append("Calories must be a whole number")
+    if not parse_delivery_areas(item['deliveryAreas']):
+        errors.append("At least one delivery area is required")
+    return errors
+
+
+def build_meal_entity(item, restaurant_id, restaurant_name, meal_id=None):
+    """The Meals table entity for a validated request item."""
+    delivery_areas = parse_delivery_areas(item['deliveryAreas'])
+    meal_id = meal_id or str(uuid.uuid4())
+    now = timestamp()
+    return {
+        'PartitionKey': restaurant_id,  # Restaurant ID as partition key
+        'RowKey': meal_id,
+        'Name': item['name'],
+        'Description': item['description'],
+        'Price': float(item['price']),
+        'PreparationTime': int(item['preparationTime']),
+        'Category': item.get('category', 'Main Course'),
+        'IsAvailable': item.get('isAvailable', True),
+        'IsVegetarian': item.get('isVegetarian', False),
+        'Calories': int(item.get('calories') or 0),
+        'DeliveryAreas': ','.join(delivery_areas),
+        'DeliveryArea': delivery_areas[0],  # Primary area for querying
+        'RestaurantName': restaurant_name,
+        'RestaurantId': restaurant_id,
+        'CreatedDate': now,
+        'ModifiedDate': now,
+        'ImageUrl': item.get('imageUrl', ''),
+        'ImageBlobPath': item.get('imageBlobPath', '')
+    }
+
+
+def area_entities(meal):
+    """One MealsByArea row per area the meal delivers to; DeliveryArea is the row's area."""
+    rows = []
+    for area in parse_delivery_areas(meal.get('DeliveryAreas') or meal.get('DeliveryArea', '')):
+        row = {field: meal[field] for field in AREA_FIELDS if field in meal}
+        row.update({
+            'PartitionKey': area,
+            'RowKey': meal['RowKey'],
+            'RestaurantId': meal.get('RestaurantId') or meal['PartitionKey'],
+            'DeliveryArea': area
+        })
+        rows.append(row)
+    return rows
+
+
+def _chunks(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def write_meals(meals_table, meals):
+    """
+    Insert meals as transactions of up to BATCH_SIZE per restaurant partition.
+
+    A failed transaction fails only its own meals. Returns {mealId: error}
+    with None for every meal that was written.
+    """
+    by_partition = {}
+    for meal in meals:
+        by_partition.setdefault(meal['PartitionKey'], []).append(meal)
+
+    results = {}
+    for partition_meals in by_partition.values():
+        for chunk in _chunks(partition_meals):
+            try:
+                meals_table.submit_transaction([('create', meal) for meal in chunk])
+                error = None
+            except Exception as e:
+                error = str(e)
+            results.update((meal['RowKey'], error) for meal in chunk)
+    return results
+
+
+def bump_version(versions_table, area, **fields):
+    """Give an area's menu a new catalog version and return it."""
+    from azure.data.tables import UpdateMode
+
+    version = f"{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+    versions_table.upsert_entity(dict(fields, PartitionKey=VERSION_PARTITION, RowKey=area, Version=version,
+                                      UpdatedDate=datetime.utcnow().isoformat()), mode=UpdateMode.MERGE)
+    return version
+
+
+def get_version(versions_table, area):
+    """An area's CatalogVersions row, or None before anything was published to it."""
+    from azure.core.exceptions import ResourceNotFoundError
+
+    try:
+        return versions_table.get_entity(partition_key=VERSION_PARTITION, row_key=area)
+    except ResourceNotFoundError:
+        return None
+
+
+def list_areas(table_service):
+    """Every area with a CatalogVersions row, i.e. every area ever published to."""
+    versions_table = table_service.get_table_client(VERSIONS_TABLE)
+    return sorted(row['RowKey'] for row in versions_table.query_entities(
+        "PartitionKey eq @partition", parameters={'partition': VERSION_PARTITION}, select=['RowKey']))
+
+
+def change_entity(row):
+    """The MealChanges entry recording a MealsByArea row as it is now."""
+    change = dict(row)
+    change.update({
+        'RowKey': f"{row.get('ModifiedDate') or timestamp()}_{row['RowKey']}",
+        'MealId': row['RowKey'],
+        'Removed': False
+    })
+    return change
+
+
+def tombstone_entity(area, meal_id, modified_date):
+    """The MealChanges entry recording that a meal left an area's menu."""
+    return {
+        'PartitionKey': area,
+        'RowKey': f"{modified_date}_{meal_id}",
+        'MealId': meal_id,
+        'ModifiedDate': modified_date,
+        'Removed': True
+    }
+
+
+def register_cache(forget):
+    """
+    Keep an in-process cache of area menus from serving this worker's own
+    publishes stale: forget(area) is called after each area is written,
+    and the cache reloads the area when it is next read.
+    """
+    _caches.append(forget)
+
+
+def _publish_area(table_service, area, rows, removed_ids=()):
+    from azure.core.exceptions import ResourceNotFoundError
+    from azure.data.tables import UpdateMode
+
+    area_table = table_service.get_table_client(AREA_TABLE)
+    for chunk in _chunks(rows):
+        area_table.submit_transaction([('upsert', row, {'mode': UpdateMode.REPLACE}) for row in chunk])
+    for meal_id in removed_ids:
+        try:
+            area_table.delete_entity(partition_key=area, row_key=meal_id)
+        except ResourceNotFoundError:
+            pass
+
+    removed_at = timestamp()
+    changes = [change_entity(row) for row in rows] + [tombstone_entity(area, meal_id, removed_at)
+                                                       for meal_id in removed_ids]
+    changes_table = table_service.get_table_client(CHANGES_TABLE)
+    for chunk in _chunks(changes):
+        changes_table.submit_transaction([('upsert', change, {'mode': UpdateMode.REPLACE}) for change in chunk])
+
+    version = bump_version(table_service.get_table_client(VERSIONS_TABLE), area)
+    return {'rows': len(rows) + len(removed_ids), 'version': version}
+
+
+def publish_to_areas(table_service, meals, removed=(), workers=PUBLISH_WORKERS):
+    """
+    Copy meals into every MealsByArea partition they deliver to, and log
+    the changes. `removed` is [(area, mealId)] for meals leaving an area.
+
+    Each area is its own partition, so the areas are written concurrently,
+    each as batches of up to BATCH_SIZE rows. Returns {area: {'rows',
+    'version', ...}} with the rows written and the area's new version.
+    """
+    by_area = {}
+    for meal in meals:
+        for row in area_entities(meal):
+            by_area.setdefault(row['PartitionKey'], ([], []))[0].append(row)
+    for area, meal_id in removed:
+        by_area.setdefault(area, ([], []))[1].append(meal_id)
+
+    if len(by_area) <= 1:
+        results = {area: _publish_area(table_service, area, rows, removed_ids)
+                   for area, (rows, removed_ids) in by_area.items()}
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(by_area))) as pool:
+            futures = {area: pool.submit(_publish_area, table_service, area, rows, removed_ids)
+                       for area, (rows, removed_ids) in by_area.items()}
+            results = {area: future.result() for area, future in futures.items()}
+
+    for forget in _caches:
+        for area in by_area:
+            forget(area)
+    return results
+
+
+def mark_incomplete(table_service, areas):
+    """
+    Serve areas by scanning Meals again, and reset their delta sync, until
+    rebuild_area_model backfills them. Used when a publish failed, so a
+    meal missing from MealsByArea is not silently left out of the menu.
+    """
+    versions_table = table_service.get_table_client(VERSIONS_TABLE)
+    for area in areas:
+        bump_version(versions_table, area, Complete=False)
+    for forget in _caches:
+        for area in areas:
+            forget(area)
+
+
+def publish_or_fall_back(table_service, meals, removed=(), workers=PUBLISH_WORKERS):
+    """
+    publish_to_areas, marking the meals' areas incomplete if it fails.
+
+    Returns publish_to_areas' result, or None after falling back. Raises
+    only when the areas could not be marked incomplete either.
+    """
+    try:
+        return publish_to_areas(table_service, meals, removed, workers)
+    except Exception:
+        areas = {area for meal in meals
+                 for area in parse_delivery_areas(meal.get('DeliveryAreas') or meal.get('DeliveryArea', ''))}
+        areas = sorted(areas | {area for area, _ in removed})
+        logging.exception(f"Publishing to the area read model failed; serving {', '.join(areas)} from Meals")
+        mark_incomplete(table_service, areas)
+        return None
+
+
+def apply_update(meal, changes):
+    """
+    Apply an update request's fields to a Meals entity in place.
+    Returns the problems found; nothing is changed when there are any.
+    """
+    unknown = [field for field in changes if field not in UPDATABLE_FIELDS]
+    if unknown:
+        return [f"Fields cannot be updated: {', '.join(unknown)}"]
+
+    current = {field: meal.get(prop) for field, prop in UPDATABLE_FIELDS.items()}
+    current['deliveryAreas'] = meal.get('DeliveryAreas') or meal.get('DeliveryArea', '')
+    current['restaurantName'] = meal.get('RestaurantName', '')
+    if 'calories' not in changes:
+        current.pop('calories')  # a stored value is not re-validated by unrelated updates
+    errors = validate_meal(dict(current, **changes))
+    if errors:
+        return errors
+
+    for field, value in changes.items():
+        if field == 'price':
+            value = float(value)
+        elif field == 'preparationTime':
+            value = int(value)
+        elif field == 'calories':
+            value = int(value or 0)
+        elif field == 'deliveryAreas':
+            areas = parse_delivery_areas(value)
+            meal['DeliveryArea'] = areas[0]
+            value = ','.join(areas)
+        meal[UPDATABLE_FIELDS[field]] = value
+    meal['ModifiedDate'] = timestamp()
+    return []
+
+
+def area_meals(table_service, area, version=None):
+    """
+    Query for the available meals of an area, and where it is served from.
+
+    Returns (pager, 'readModel') once the area's read model is complete,
+    otherwise (pager, 'scan') over the whole Meals table. Pass the area's
+    CatalogVersions row as `version` if it has already been read.
+    """
+    if version is None:
+        version = get_version(table_service.get_table_client(VERSIONS_TABLE), area)
+    if version and version.get('Complete'):
+        pager = table_service.get_table_client(AREA_TABLE).query_entities(
+            "PartitionKey eq @area and IsAvailable eq true", parameters={'area': area})
+        return pager, 'readModel'
+    pager = table_service.get_table_client(MEALS_TABLE).query_entities(
+        "DeliveryArea eq @area and IsAvailable eq true", parameters={'area': area})
+    return pager, 'scan'
+
+
+def format_meal(entity, area):
+    """A Meals or MealsByArea entity as the JSON the API returns."""
+    meal_data = {
+        'id': entity.get('MealId') or entity['RowKey'],
+        'name': entity.get('Name', 'Unknown'),
+        'description': entity.get('Description', ''),
+        'price': float(entity.get('Price', 0)),
+        'preparationTime': int(entity.get('PreparationTime', 0)),
+        'category': entity.get('Category', 'Main Course'),
+        'restaurantId': entity.get('RestaurantId') or entity.get('PartitionKey', ''),
+        'restaurantName': entity.get('RestaurantName', 'Unknown Restaurant'),
+        'area': entity.get('DeliveryArea', area),
+        'isVegetarian': entity.get('IsVegetarian', False),
+        'calories': entity.get('Calories', 0),
+        'imageUrl': entity.get('ImageUrl', '')
+    }
+    # Add blob path if exists
+    if 'ImageBlobPath' in entity:
+        meal_data['imageBlobPath'] = entity['ImageBlobPath']
+    return meal_data
+
+
+def read_changes(table_service, area, since, limit):
+    """
+    The latest change per meal logged for an area after `since`.
+
+    Returns (changes, last RowKey read or None, whether more remain). Reads
+    stop after `limit` log entries; the caller continues from the last key.
+    """
+    query = table_service.get_table_client(CHANGES_TABLE).query_entities(
+        "PartitionKey eq @area and RowKey gt @since",
+        parameters={'area': area, 'since': since},
+        results_per_page=min(limit, 1000))
+    latest = {}
+    last_key = None
+    read = 0
+    for change in query:
+        if read >= limit:
+            return list(latest.values()), last_key, True
+        latest.pop(change['MealId'], None)
+        latest[change['MealId']] = change
+        last_key = change['RowKey']
+        read += 1
+    return list(latest.values()), last_key, False
+
+
+def prune_changes(table_service, area):
+    """
+    Delete an area's change log entries past CHANGE_RETENTION_DAYS, the
+    same period after which mealChanges stops answering from the log.
+    """
+    cutoff = timestamp(datetime.utcnow() - timedelta(days=CHANGE_RETENTION_DAYS))
+    changes_table = table_service.get_table_client(CHANGES_TABLE)
+    row_keys = [change['RowKey'] for change in changes_table.query_entities(
+        "PartitionKey eq @area and RowKey lt @cutoff",
+        parameters={'area': area, 'cutoff': cutoff}, select=['RowKey'])]
+    for chunk in _chunks(row_keys):
+        changes_table.submit_transaction(
+            [('delete', {'PartitionKey': area, 'RowKey': row_key}) for row_key in chunk])
+    return len(row_keys)
+
+
+def rebuild_area_model(table_service, meals):
+    """
+    Recompute MealsByArea from a full scan of Meals and overwrite it.
+    Used once to backfill meals registered before the read model existed;
+    marks every area complete so getMeals switches to the read model.
+    Rows are written as the scan streams in, a batch per area at a time.
+    """
+    from azure.data.tables import UpdateMode
+
+    for table_name in (AREA_TABLE, VERSIONS_TABLE, CHANGES_TABLE):
+        table_service.create_table_if_not_exists(table_name)
+    area_table = table_service.get_table_client(AREA_TABLE)
+
+    def flush(area, rows):
+        area_table.submit_transaction([('upsert', row, {'mode': UpdateMode.REPLACE}) for row in rows])
+        rows.clear()
+
+    pending = {}
+    written = set()
+    for meal in meals:
+        for row in area_entities(meal):
+            rows = pending.setdefault(row['PartitionKey'], [])
+            rows.append(row)
+            written.add((row['PartitionKey'], row['RowKey']))
+            if len(rows) >= BATCH_SIZE:
+                flush(row['PartitionKey'], rows)
+    for area, rows in pending.items():
+        if rows:
+            flush(area, rows)
+
+    stale = {}
+    for row in area_table.list_entities(select=['PartitionKey', 'RowKey']):
+        if (row['PartitionKey'], row['RowKey']) not in written:
+            stale.setdefault(row['PartitionKey'], []).append(row['RowKey'])
+    for area, row_keys in stale.items():
+        for chunk in _chunks(row_keys):
+            area_table.submit_transaction(
+                [('delete', {'PartitionKey': area, 'RowKey': row_key}) for row_key in chunk])
+
+    versions_table = table_service.get_table_client(VERSIONS_TABLE)
+    for area in set(pending) | set(stale):
+        bump_version(versions_table, area, Complete=True, ResetDate=timestamp())
+
+    return len(written)
@@ -0,0 +1,165 @@
+"""
+MENU SNAPSHOTS
+Pre-compressed area menus in blob storage, keyed by catalog version
+
+Menus are read far more often than they change, so the menusnapshots
+timer renders each area's unfiltered GET /api/meals response once per
+catalog version and stores it gzip- and (when the brotli package is
+installed) brotli-compressed:
+
+    menu-snapshots/<area>/<version>.json.gz
+    menu-snapshots/<area>/<version>.json.br
+
+A version is never rewritten, so the blobs carry a year-long immutable
+Cache-Control and a strong ETag (a hash of the compressed bytes, kept in
+the blob metadata). getMeals serves the bytes as they are to clients
+accepting the encoding: from this worker's memory after the first fetch,
+otherwise with one blob download. Without a snapshot it assembles the
+menu live, as before. The Azure SDK is imported on first use.
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+from shared_code import responses, storage
+
+CONTAINER = os.getenv('MENU_SNAPSHOT_CONTAINER', 'menu-snapshots')
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+WATERMARK_HEADER = 'X-Menu-Watermark'
+KEEP_VERSIONS = 2  # an area's older snapshots are deleted by the next render
+MISS_RETRY = 30    # seconds before a missing snapshot is looked for again
+
+# Content-Encoding -> blob name suffix, preferred first
+ENCODINGS = {'br': '.json.br', 'gzip': '.json.gz'}
+
+_cache = {}    # (area, encoding) -> Snapshot of the latest version served here
+_missing = {}  # (area, version, encoding) -> when it was found missing
+_cache_lock = threading.Lock()
+
+
+class Snapshot:
+    """One compressed rendering of an area's menu at a catalog version."""
+
+    def __init__(self, area, version, encoding, data, etag):
+        self.area = area
+        self.version = version
+        self.encoding = encoding
+        self.data = data
+        self.etag = etag
+
+
+def blob_name(area, version, encoding):
+    return f"{area}/{version}{ENCODINGS[encoding]}"
+
+
+def available_encodings():
+    return [encoding for encoding in ENCODINGS if responses.ENCODINGS[encoding]]
+
+
+def render(index):
+    """
+    The unfiltered GET /api/meals body of a MealIndex, as str chunks.
+    It holds no watermark: a snapshot can be served long after it was
+    rendered, so getMeals sends the current one in WATERMARK_HEADER.
+    """
+    return list(responses.json_chunks({
+        'status': 'success',
+        'area': index.area,
+        'count': index.size,
+        'total': index.size,
+        'version': index.version,
+        'filters': {}
+    }, 'meals', index.rows))
+
+
+def _remember(snapshot):
+    with _cache_lock:
+        _cache[(snapshot.area, snapshot.encoding)] = snapshot
+    return snapshot
+
+
+def get(blob_service, area, version, encodings):
+    """
+    The area's snapshot at `version` in the first of `encodings` that has
+    one, or None. Served from memory when this worker has it already.
+    """
+    from azure.core.exceptions import ResourceNotFoundError
+
+    for encoding in encodings:
+        with _cache_lock:
+            snapshot = _cache.get((area, encoding))
+            missed = _missing.get((area, version, encoding))
+        if snapshot and snapshot.version == version:
+            return snapshot
+        if missed and time.monotonic() - missed < MISS_RETRY:
+            continue
+        try:
+            download = blob_service.get_blob_client(CONTAINER, blob_name(area, version, encoding)).download_blob()
+        except ResourceNotFoundError:
+            with _cache_lock:
+                if len(_missing) >= 1024:
+                    _missing.clear()
+                _missing[(area, version, encoding)] = time.monotonic()
+            continue
+        data = download.readall()
+        etag = (download.properties.metadata or {}).get('contenthash') or hashlib.sha256(data).hexdigest()[:32]
+        return _remember(Snapshot(area, version, encoding, data, f'"{etag}"'))
+    return None
+
+
+def publish(blob_service, index):
+    """
+    Render and upload the snapshots of an index's version that are not
+    stored yet, and delete the area's snapshots older than KEEP_VERSIONS.
+    Returns the encodings uploaded.
+    """
+    from azure.core.exceptions import ResourceNotFoundError
+
+    container = blob_service.get_container_client(CONTAINER)
+    existing = {blob.name for blob in container.list_blobs(name_starts_with=f"{index.area}/")}
+    uploaded = []
+    body = None
+    for encoding in available_encodings():
+        name = blob_name(index.area, index.version, encoding)
+        if name in existing:
+            continue
+        body = body or render(index)
+        # Rendered once per version, so worth the slowest, smallest settings
+        data = responses.encode(body, encoding, gzip_level=9, brotli_quality=11)
+        contenthash = hashlib.sha256(data).hexdigest()[:32]
+        content_settings = storage.blob_content_settings(
+            storage.get_connection_string(),
+            content_type='application/json', content_encoding=encoding, cache_control=CACHE_CONTROL)
+        container.get_blob_client(name).upload_blob(
+            data, overwrite=True, content_settings=content_settings, metadata={'contenthash': contenthash})
+        _remember(Snapshot(index.area, index.version, encoding, data, f'"{contenthash}"'))
+        uploaded.append(encoding)
+
+    # Blob names start with the version, which sorts by time
+    versions = sorted({name[len(index.area) + 1:].split('.', 1)[0] for name in existing} | {index.version})
+    for version in versions[:-KEEP_VERSIONS]:
+        for encoding in ENCODINGS:
+            name = blob_name(index.area, version, encoding)
+            if name in existing:
+                try:
+                    container.get_blob_client(name).delete_blob()
+                except ResourceNotFoundError:
+                    pass
+    return uploaded
+
+
+def ensure_container(blob_service):
+    from azure.core.exceptions import ResourceExistsError
+
+    try:
+        blob_service.create_container(CONTAINER)
+    except ResourceExistsError:
+        pass
+
+
+def clear():
+    with _cache_lock:
+        _cache.clear()
+        _missing.clear()
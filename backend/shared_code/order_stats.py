@@ -0,0 +1,178 @@
+"""
+ORDER STATISTICS ROLLUP
+Pre-aggregated order counters kept in the OrderStats table
+
+Each area is one partition. Rows are keyed "<YYYYMMDD>-<shard>", so a
+day's statistics are spread over a few sharded counter rows that are
+updated with ETag optimistic concurrency. Reading an area's statistics
+for any date range is a single-partition range query.
+
+Orders are counted when they are placed; nothing tracks their status
+afterwards, so the rollup has no per-status counts.
+"""
+
+import json
+import os
+import zlib
+from datetime import datetime
+
+from shared_code.tables import optimistic_update
+
+STATS_TABLE = 'OrderStats'
+SHARD_COUNT = int(os.getenv('ORDER_STATS_SHARDS', '8'))
+
+COUNTER_FIELDS = ['OrderCount', 'ItemCount', 'Revenue', 'PrepTimeSum', 'DeliveryTimeSum']
+
+
+def _day_key(order_date):
+    """'2025-01-31T12:00:00' -> '20250131'"""
+    return (order_date or datetime.utcnow().isoformat())[:10].replace('-', '')
+
+
+def _shard_for(order_id):
+    try:
+        return int(order_id[:8], 16) % SHARD_COUNT
+    except (TypeError, ValueError):
+        return zlib.crc32(str(order_id).encode('utf-8')) % SHARD_COUNT
+
+
+def _empty_row(area, row_key):
+    row = {'PartitionKey': area, 'RowKey': row_key}
+    for field in COUNTER_FIELDS:
+        row[field] = 0.0 if field == 'Revenue' else 0
+    return row
+
+
+def _item_count(meal_details):
+    try:
+        return sum(int(line.get('quantity', 1)) for line in meal_details)
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
+
+def _apply_order(row, order, item_count, sign=1):
+    """Add (or with sign=-1, remove) one order's contribution to a counter row."""
+    row['OrderCount'] = int(row.get('OrderCount', 0)) + sign
+    row['ItemCount'] = int(row.get('ItemCount', 0)) + sign * item_count
+    row['Revenue'] = round(float(row.get('Revenue', 0.0)) + sign * float(order.get('TotalCost', 0) or 0), 2)
+    row['PrepTimeSum'] = int(row.get('PrepTimeSum', 0)) + sign * int(order.get('TotalPreparationTime', 0) or 0)
+    row['DeliveryTimeSum'] = int(row.get('DeliveryTimeSum', 0)) + sign * int(order.get('EstimatedDeliveryTime', 0) or 0)
+    row['UpdatedDate'] = datetime.utcnow().isoformat()
+
+
+def record_order(stats_table, order_entity, meal_details=None):
+    """
+    Add a newly created order to its area/day counters.
+
+    `order_entity` is the entity written to the Orders table.
+    """
+    area = order_entity['PartitionKey']
+    row_key = f"{_day_key(order_entity.get('OrderDate'))}-{_shard_for(order_entity['RowKey']):02d}"
+    item_count = _item_count(meal_details or [])
+    return optimistic_update(stats_table, area, row_key, lambda row: _apply_order(row, order_entity, item_count))
+
+
+def query_stats(stats_table, area=None, start_day=None, end_day=None):
+    """
+    Sum the sharded counters into per-area, per-day and overall totals.
+
+    `start_day`/`end_day` are inclusive 'YYYY-MM-DD' or 'YYYYMMDD' strings.
+    With an area this reads a single partition.
+    """
+    conditions = []
+    parameters = {}
+    if area:
+        conditions.append("PartitionKey eq @area")
+        parameters['area'] = area
+    if start_day:
+        conditions.append("RowKey ge @start")
+        parameters['start'] = start_day.replace('-', '')
+    if end_day:
+        # '~' sorts after every "-<shard>" suffix of the end day
+        conditions.append("RowKey le @end")
+        parameters['end'] = end_day.replace('-', '') + '~'
+
+    if conditions:
+        rows = stats_table.query_entities(" and ".join(conditions), parameters=parameters)
+    else:
+        rows = stats_table.list_entities()
+
+    totals = _empty_totals()
+    by_area = {}
+    by_day = {}
+
+    for row in rows:
+        day = row['RowKey'].split('-')[0]
+        day = f"{day[:4]}-{day[4:6]}-{day[6:8]}"
+        for bucket in (totals,
+                       by_area.setdefault(row['PartitionKey'], _empty_totals()),
+                       by_day.setdefault(day, _empty_totals())):
+            _add_row(bucket, row)
+
+    for bucket in [totals] + list(by_area.values()) + list(by_day.values()):
+        _finish(bucket)
+
+    return {
+        'area': area,
+        'from': start_day,
+        'to': end_day,
+        'totals': totals,
+        'byArea': dict(sorted(by_area.items())),
+        'byDay': dict(sorted(by_day.items()))
+    }
+
+
+def _empty_totals():
+    return {
+        'orderCount': 0,
+        'itemCount': 0,
+        'revenue': 0.0,
+        'prepTimeSum': 0,
+        'deliveryTimeSum': 0
+    }
+
+
+def _add_row(bucket, row):
+    bucket['orderCount'] += int(row.get('OrderCount', 0))
+    bucket['itemCount'] += int(row.get('ItemCount', 0))
+    bucket['revenue'] += float(row.get('Revenue', 0.0))
+    bucket['prepTimeSum'] += int(row.get('PrepTimeSum', 0))
+    bucket['deliveryTimeSum'] += int(row.get('DeliveryTimeSum', 0))
+
+
+def _finish(bucket):
+    count = bucket['orderCount']
+    bucket['revenue'] = round(bucket['revenue'], 2)
+    bucket['averageOrderValue'] = round(bucket['revenue'] / count, 2) if count else 0.0
+    bucket['averagePreparationTime'] = round(bucket['prepTimeSum'] / count, 1) if count else 0.0
+    bucket['averageDeliveryTime'] = round(bucket['deliveryTimeSum'] / count, 1) if count else 0.0
+    bucket['averageBasketSize'] = round(bucket['itemCount'] / count, 2) if count else 0.0
+
+
+def rebuild_from_orders(stats_table, orders):
+    """
+    Recompute the rollup from a full scan of Orders and overwrite it.
+    Used once to backfill orders placed before the rollup existed.
+    """
+    from azure.data.tables import UpdateMode
+
+    rows = {}
+    for order in orders:
+        area = order.get('PartitionKey', order.get('Area', 'Unknown'))
+        row_key = f"{_day_key(order.get('OrderDate'))}-{_shard_for(order.get('RowKey', '')):02d}"
+        row = rows.get((area, row_key))
+        if row is None:
+            row = rows[(area, row_key)] = _empty_row(area, row_key)
+        try:
+            meal_details = json.loads(order.get('Meals', '[]'))
+        except (TypeError, ValueError):
+            meal_details = []
+        _apply_order(row, order, _item_count(meal_details))
+
+    existing = {(row['PartitionKey'], row['RowKey']) for row in stats_table.list_entities(select=['PartitionKey', 'RowKey'])}
+    for area, row_key in existing - set(rows):
+        stats_table.delete_entity(partition_key=area, row_key=row_key)
+    for row in rows.values():
+        stats_table.upsert_entity(row, mode=UpdateMode.REPLACE)
+
+    return len(rows)
@@ -0,0 +1,473 @@
+"""
+ORDER INDEXES
+Find orders without scanning the Orders table
+
+Orders are partitioned by area under a uuid, but customers and support
+only know the order number (ORD-YYYYMMDD-XXXXXX), and nothing groups a
+customer's orders. submitOrder claims the order's number before writing
+it, and writes the other two indexes right after, so they never point
+at a missing order:
+
+- OrderNumberIndex, PartitionKey=<order number>, RowKey='order':
+  OrderPartition, OrderRow. Created (never replaced) before the order is
+  written, so an order number taken twice gets a new one instead of
+  repointing the first order's lookups. A lookup is two point reads; a number
+  missing from the index is not found. Orders from before the index are
+  backfilled with view_orders.py (option 7); until then ORDER_LEGACY_SCAN
+  lets a miss fall back to a scan of Orders, indexing what it finds.
+- OrdersByCustomer, PartitionKey=<customer key> (customers.customer_key),
+  RowKey=<reverse timestamp>_<order id>: a summary of the order with its
+  line items, so a customer's history, newest first, is a range read of
+  one partition.
+- OrdersByRestaurant, PartitionKey=<restaurant id>,
+  RowKey=<timestamp>_<order id>: one row per restaurant of an order with
+  only that restaurant's line items and prep time, so a kitchen's new
+  orders since its last poll are a range read of one partition.
+
+The keys of an order never change and are cached per worker; the order
+itself is cached for ORDER_CACHE_TTL seconds, as its status moves on.
+A number that matched no order is not looked for again for MISS_TTL
+seconds, so mistyped numbers don't repeat the lookup.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from shared_code.customers import customer_key
+
+ORDERS_TABLE = 'Orders'
+NUMBER_INDEX_TABLE = 'OrderNumberIndex'
+CUSTOMER_INDEX_TABLE = 'OrdersByCustomer'
+RESTAURANT_INDEX_TABLE = 'OrdersByRestaurant'
+NUMBER_ROW = 'order'
+
+# Microseconds since 1970 subtracted from this sort newest first (until 2286)
+REVERSE_EPOCH = 10 ** 16 - 1
+
+# Order fields copied into the OrdersByCustomer summary rows
+SUMMARY_FIELDS = ['OrderNumber', 'OrderDate', 'Area', 'Status', 'TotalCost', 'EstimatedDeliveryTime', 'Meals']
+
+# Order fields copied into the OrdersByRestaurant rows (Meals is split per restaurant)
+KITCHEN_FIELDS = ['OrderNumber', 'OrderDate', 'Area', 'Status', 'CustomerName', 'SpecialInstructions']
+PAGE_CURSOR = re.compile(r'^\d{16}_.+$')  # just after this order
+POLL_CURSOR = re.compile(r'^\d{16}$')     # the time of a poll
+
+# A poll re-reads this much before its cursor: an order's RowKey is its
+# OrderDate, taken before the order is written, so its index row can land
+# after a poll that already read past that time. Clients merge by orderId.
+POLL_OVERLAP_SECONDS = 30
+
+ORDER_NUMBER = re.compile(r'^ORD-\d{8}-[0-9A-F]{6}$')
+
+# A number has 24 random bits per day, so a new order may draw one already taken
+NUMBER_ATTEMPTS = 5
+
+# Index rows are independent writes; they go out together. Threads start on first use.
+_index_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='order-index')
+
+ORDER_CACHE_TTL = float(os.getenv('ORDER_CACHE_TTL', '5'))
+# Off by default: the scan reads every order, and anyone can ask for any number
+LEGACY_SCAN = os.getenv('ORDER_LEGACY_SCAN', '').lower() in ('1', 'true', 'yes')
+MISS_TTL = 60
+CACHE_SIZE = 4096
+
+_keys = {}     # order number -> (PartitionKey, RowKey)
+_orders = {}   # order number -> (expires, order)
+_missing = {}  # order number -> when no order was found for it
+_cache_lock = threading.Lock()
+
+
+def normalize_number(order_number):
+    """' ord-20250131-3f2a9c ' -> 'ORD-20250131-3F2A9C', or None if it isn't one."""
+    order_number = (order_number or '').strip().upper()
+    return order_number if ORDER_NUMBER.match(order_number) else None
+
+
+def format_order(entity):
+    """An Orders entity as returned by the API (without the phone number)."""
+    try:
+        meals = json.loads(entity.get('Meals') or '[]')
+    except ValueError:
+        meals = []
+    return {
+        'orderNumber': entity.get('OrderNumber'),
+        'orderId': entity.get('RowKey'),
+        'customerName': entity.get('CustomerName'),
+        'area': entity.get('Area') or entity.get('PartitionKey'),
+        'address': entity.get('DeliveryAddress'),
+        'specialInstructions': entity.get('SpecialInstructions'),
+        'totalCost': entity.get('TotalCost'),
+        'prepTime': entity.get('TotalPreparationTime'),
+        'deliveryTime': entity.get('EstimatedDeliveryTime'),
+        'orderDate': entity.get('OrderDate'),
+        'status': entity.get('Status'),
+        'meals': meals
+    }
+
+
+def _micros(order_date):
+    """Microseconds since 1970 of a UTC OrderDate ('2025-01-31T12:00:00.123456'), 0 if unreadable."""
+    try:
+        moment = datetime.fromisoformat(order_date).replace(tzinfo=timezone.utc)
+        return int(moment.timestamp() * 1_000_000)
+    except (TypeError, ValueError):
+        return 0
+
+
+def reverse_time_key(order_date, order_id):
+    """RowKey sorting an order before every older one: '<16 digits>_<order id>'"""
+    return f"{REVERSE_EPOCH - _micros(order_date):016d}_{order_id}"
+
+
+def time_key(order_date, order_id=''):
+    """RowKey sorting an order after every older one: '<16 digits>_<order id>'"""
+    return f"{_micros(order_date):016d}_{order_id}"
+
+
+def poll_cursor(moment=None):
+    """The cursor of a poll made at `moment` (a naive UTC datetime, default now)."""
+    return time_key((moment or datetime.utcnow()).isoformat()).rstrip('_')
+
+
+def since_key(since):
+    """
+    Where to read a restaurant's orders from, as (RowKey, exclusive), for
+    `since`: the cursor of a full page (just after its last order), the
+    cursor of a poll (POLL_OVERLAP_SECONDS before it) or an ISO time.
+    None if it is none of these.
+    """
+    since = (since or '').strip()
+    if PAGE_CURSOR.match(since):
+        return since, True
+    if POLL_CURSOR.match(since):
+        return f"{max(int(since) - POLL_OVERLAP_SECONDS * 1_000_000, 0):016d}", False
+    try:
+        moment = datetime.fromisoformat(since.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return time_key(moment.isoformat()), False
+
+
+def format_summary(row):
+    """An OrdersByCustomer row as returned by the API."""
+    try:
+        meals = json.loads(row.get('Meals') or '[]')
+    except ValueError:
+        meals = []
+    return {
+        'orderNumber': row.get('OrderNumber'),
+        'orderId': row.get('OrderRow'),
+        'area': row.get('Area'),
+        'orderDate': row.get('OrderDate'),
+        'status': row.get('Status'),
+        'totalCost': row.get('TotalCost'),
+        'deliveryTime': row.get('EstimatedDeliveryTime'),
+        'meals': meals
+    }
+
+
+def customer_index_entity(order_entity):
+    """The OrdersByCustomer row of an order, or None when it has no customer key."""
+    key = customer_key(order_entity.get('Phone'))
+    if not key:
+        return None
+    row = {field: order_entity[field] for field in SUMMARY_FIELDS if field in order_entity}
+    row.update({
+        'PartitionKey': key,
+        'RowKey': reverse_time_key(order_entity.get('OrderDate'), order_entity['RowKey']),
+        'OrderPartition': order_entity['PartitionKey'],
+        'OrderRow': order_entity['RowKey']
+    })
+    return row
+
+
+def format_kitchen_order(row):
+    """An OrdersByRestaurant row as returned by the API."""
+    try:
+        meals = json.loads(row.get('Meals') or '[]')
+    except ValueError:
+        meals = []
+    return {
+        'orderNumber': row.get('OrderNumber'),
+        'orderId': row.get('OrderRow'),
+        'area': row.get('Area'),
+        'orderDate': row.get('OrderDate'),
+        'status': row.get('Status'),
+        'customerName': row.get('CustomerName'),
+        'specialInstructions': row.get('SpecialInstructions'),
+        'prepTime': row.get('PreparationTime'),
+        'itemCount': row.get('ItemCount'),
+        'meals': meals
+    }
+
+
+def restaurant_index_entities(order_entity):
+    """
+    The OrdersByRestaurant rows of an order, one per restaurant, each with
+    only that restaurant's line items. Line items written before they
+    carried a restaurantId are given to the order's only restaurant.
+    """
+    try:
+        meals = json.loads(order_entity.get('Meals') or '[]')
+    except ValueError:
+        meals = []
+    restaurant_ids = [restaurant_id for restaurant_id in (order_entity.get('RestaurantIds') or '').split(',')
+                      if restaurant_id and restaurant_id != 'unknown']
+    lines = {}
+    for meal in meals:
+        restaurant_id = meal.get('restaurantId') or (restaurant_ids[0] if len(restaurant_ids) == 1 else None)
+        if restaurant_id:
+            lines.setdefault(restaurant_id, []).append(meal)
+
+    row_key = time_key(order_entity.get('OrderDate'), order_entity['RowKey'])
+    rows = []
+    for restaurant_id, items in lines.items():
+        row = {field: order_entity[field] for field in KITCHEN_FIELDS if field in order_entity}
+        row.update({
+            'PartitionKey': restaurant_id,
+            'RowKey': row_key,
+            'OrderPartition': order_entity['PartitionKey'],
+            'OrderRow': order_entity['RowKey'],
+            'Meals': json.dumps(items),
+            'ItemCount': sum(int(item.get('quantity', 1)) for item in items),
+            'PreparationTime': sum(int(item.get('preparationTime', 0)) * int(item.get('quantity', 1))
+                                   for item in items)
+        })
+        rows.append(row)
+    return rows
+
+
+def new_order_number(order_id, moment=None):
+    """ORD-<local date>-<first 6 hex digits of the order id>"""
+    return f"ORD-{(moment or datetime.now()).strftime('%Y%m%d')}-{order_id[:6].upper()}"
+
+
+def number_index_entity(order_entity):
+    return {
+        'PartitionKey': order_entity['OrderNumber'],
+        'RowKey': NUMBER_ROW,
+        'OrderPartition': order_entity['PartitionKey'],
+        'OrderRow': order_entity['RowKey']
+    }
+
+
+def claim_number(table_service, order_entity):
+    """
+    Create the OrderNumberIndex row of an order. Returns False when the
+    number already belongs to another order: the row is never replaced,
+    so a colliding number cannot point a lookup at someone else's order.
+    """
+    from azure.core.exceptions import ResourceExistsError
+
+    row = number_index_entity(order_entity)
+    try:
+        table_service.get_table_client(NUMBER_INDEX_TABLE).create_entity(row)
+        return True
+    except ResourceExistsError:
+        existing = table_service.get_table_client(NUMBER_INDEX_TABLE).get_entity(
+            partition_key=row['PartitionKey'], row_key=NUMBER_ROW)
+        return (existing.get('OrderPartition'), existing.get('OrderRow')) == (row['OrderPartition'], row['OrderRow'])
+
+
+def release_number(table_service, order_entity):
+    """Delete the OrderNumberIndex row claimed for an order that was not written."""
+    table_service.get_table_client(NUMBER_INDEX_TABLE).delete_entity(
+        partition_key=order_entity['OrderNumber'], row_key=NUMBER_ROW)
+
+
+def index_rows(order_entity):
+    """[(table name, row)] of the customer and kitchen index rows of an order, each in its own partition."""
+    rows = []
+    customer_row = customer_index_entity(order_entity)
+    if customer_row:
+        rows.append((CUSTOMER_INDEX_TABLE, customer_row))
+    rows += [(RESTAURANT_INDEX_TABLE, row) for row in restaurant_index_entities(order_entity)]
+    return rows
+
+
+def _in_parallel(calls):
+    """Run (function, args, kwargs) calls together; raises the first failure once all are done."""
+    if not calls:
+        return
+    first, *rest = calls
+    futures = [_index_pool.submit(call, *args, **kwargs) for call, args, kwargs in rest]
+    error = None
+    try:
+        first[0](*first[1], **first[2])
+    except Exception as e:
+        error = e
+    for future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            error = error or e
+    if error:
+        raise error
+
+
+def index_order(table_service, order_entity, number_claimed=False):
+    """
+    Write the index rows of an order just written to Orders. The number
+    row is claimed first unless the caller already did (submitOrder claims
+    it before writing the order); if another order holds the number, that
+    order keeps it. The other rows are in different partitions (no batch
+    spans them), so they are written concurrently: one storage call each,
+    one round trip of latency.
+    """
+    from azure.data.tables import UpdateMode
+
+    if not number_claimed and not claim_number(table_service, order_entity):
+        logging.warning(f"Order number {order_entity['OrderNumber']} belongs to another order; "
+                        f"order {order_entity['RowKey']} is not indexed by number")
+    _in_parallel([(table_service.get_table_client(table_name).upsert_entity, (row,), {'mode': UpdateMode.REPLACE})
+                  for table_name, row in index_rows(order_entity)])
+
+
+def unindex_order(table_service, order_entity):
+    """Delete the index rows of an order whose number it claimed (missing rows are fine)."""
+    rows = [(NUMBER_INDEX_TABLE, number_index_entity(order_entity))] + index_rows(order_entity)
+    _in_parallel([(table_service.get_table_client(table_name).delete_entity, (),
+                   {'partition_key': row['PartitionKey'], 'row_key': row['RowKey']})
+                  for table_name, row in rows])
+
+
+def customer_orders(table_service, key, limit, after=None):
+    """
+    One page of a customer's orders, newest first: (summaries, cursor).
+    `cursor` is the RowKey to pass as `after` for the next page, or None
+    after the last page. One range read of the customer's partition.
+    """
+    query = "PartitionKey eq @key"
+    parameters = {'key': key}
+    if after:
+        query += " and RowKey gt @after"
+        parameters['after'] = after
+    pager = table_service.get_table_client(CUSTOMER_INDEX_TABLE).query_entities(
+        query, parameters=parameters, results_per_page=limit + 1)
+    rows = list(next(iter(pager.by_page()), []))
+    page = rows[:limit]
+    cursor = page[-1]['RowKey'] if len(rows) > limit else None
+    return [format_summary(row) for row in page], cursor
+
+
+def restaurant_orders(table_service, restaurant_id, start, limit, status=None):
+    """
+    A restaurant's orders from `start` (see since_key), oldest first:
+    (orders, cursor, more). When the page was full (`more`), `cursor`
+    continues just after its last order; otherwise it is a poll cursor
+    taken before the read. One range read of the restaurant's partition;
+    the status filter is applied by the table service within it.
+    """
+    polled = poll_cursor()
+    key, exclusive = start
+    query = f"PartitionKey eq @restaurant and RowKey {'gt' if exclusive else 'ge'} @start"
+    parameters = {'restaurant': restaurant_id, 'start': key}
+    if status:
+        query += " and Status eq @status"
+        parameters['status'] = status
+    pager = table_service.get_table_client(RESTAURANT_INDEX_TABLE).query_entities(
+        query, parameters=parameters, results_per_page=limit + 1)
+    rows = list(next(iter(pager.by_page()), []))
+    page = rows[:limit]
+    more = len(rows) > limit
+    cursor = page[-1]['RowKey'] if more else polled
+    return [format_kitchen_order(row) for row in page], cursor, more
+
+
+def _remember_keys(order_number, keys):
+    with _cache_lock:
+        if len(_keys) >= CACHE_SIZE:
+            _keys.clear()
+        _keys[order_number] = keys
+    return keys
+
+
+def _order_keys(table_service, order_number):
+    """(PartitionKey, RowKey) of an order, or None if there is no such order."""
+    from azure.core.exceptions import ResourceNotFoundError
+
+    with _cache_lock:
+        keys = _keys.get(order_number)
+        missed = _missing.get(order_number)
+    if keys:
+        return keys
+    if missed and time.monotonic() - missed < MISS_TTL:
+        return None
+    try:
+        row = table_service.get_table_client(NUMBER_INDEX_TABLE).get_entity(
+            partition_key=order_number, row_key=NUMBER_ROW)
+        return _remember_keys(order_number, (row['OrderPartition'], row['OrderRow']))
+    except ResourceNotFoundError:
+        pass
+
+    # An order from before the index, while it is being backfilled: find it once, then index it
+    if LEGACY_SCAN:
+        orders_table = table_service.get_table_client(ORDERS_TABLE)
+        for order in orders_table.query_entities("OrderNumber eq @number", parameters={'number': order_number}):
+            index_order(table_service, order)
+            return _remember_keys(order_number, (order['PartitionKey'], order['RowKey']))
+    with _cache_lock:
+        if len(_missing) >= CACHE_SIZE:
+            _missing.clear()
+        _missing[order_number] = time.monotonic()
+    return None
+
+
+def get_by_number(table_service, order_number):
+    """The formatted order with this order number, or None."""
+    from azure.core.exceptions import ResourceNotFoundError
+
+    with _cache_lock:
+        entry = _orders.get(order_number)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+
+    keys = _order_keys(table_service, order_number)
+    if not keys:
+        return None
+    try:
+        entity = table_service.get_table_client(ORDERS_TABLE).get_entity(partition_key=keys[0], row_key=keys[1])
+    except ResourceNotFoundError:
+        entity = None
+    if entity is None or entity.get('OrderNumber') != order_number:
+        with _cache_lock:
+            _keys.pop(order_number, None)
+        return None
+
+    order = format_order(entity)
+    with _cache_lock:
+        if len(_orders) >= CACHE_SIZE:
+            _orders.clear()
+        _orders[order_number] = (time.monotonic() + ORDER_CACHE_TTL, order)
+    return order
+
+
+def rebuild_indexes(table_service, orders):
+    """
+    Index every order of an Orders table scan.
+    Used once to backfill orders placed before the indexes existed.
+    """
+    table_service.create_table_if_not_exists(NUMBER_INDEX_TABLE)
+    table_service.create_table_if_not_exists(CUSTOMER_INDEX_TABLE)
+    table_service.create_table_if_not_exists(RESTAURANT_INDEX_TABLE)
+    count = 0
+    for order in orders:
+        if order.get('OrderNumber'):
+            index_order(table_service, order)
+            count += 1
+    return count
+
+
+def clear_cache():
+    with _cache_lock:
+        _keys.clear()
+        _orders.clear()
+        _missing.clear()
@@ -0,0 +1,158 @@
+"""
+ON-DEMAND PROFILING
+Capture a cProfile of selected invocations for offline analysis
+
+Decorate a function's entry point:
+
+    @profiling.profiled('getMeals')
+    def main(req: func.HttpRequest) -> func.HttpResponse:
+
+Profiling is off unless an app setting turns it on:
+
+- PROFILE_FUNCTIONS: '*' or a comma-separated list of function names to
+  profile on every invocation
+- PROFILE_SAMPLE_RATE: fraction (0-1) of all other invocations to profile
+- PROFILE_OUTPUT: a directory, or 'blob:<container>' to upload to Blob
+  Storage (default 'blob:profiles')
+
+Each profile is a pstats file ('{function}/{time}-{id}.prof') with a JSON
+sidecar of tags: function, duration, status and request attributes such as
+area and cart size. Load them with pstats/snakeviz or aggregate them with
+benchmarks/profiles.py.
+"""
+
+import functools
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+DEFAULT_OUTPUT = 'blob:profiles'
+
+
+def _enabled(function_name):
+    functions = os.getenv('PROFILE_FUNCTIONS', '')
+    if functions.strip() == '*' or function_name.lower() in {
+            name.strip().lower() for name in functions.split(',') if name.strip()}:
+        return 'always'
+    try:
+        rate = float(os.getenv('PROFILE_SAMPLE_RATE') or 0)
+    except ValueError:
+        return None
+    return 'sampled' if rate > 0 and random.random() < rate else None
+
+
+def request_tags(request):
+    """Attributes worth filtering profiles by: route, area, cart size."""
+    tags = {}
+    body = None
+    if hasattr(request, 'params'):  # HttpRequest
+        tags['method'] = request.method
+        tags['url'] = request.url.split('?')[0]
+        tags.update({f"param.{name}": value for name, value in request.params.items()})
+        try:
+            body = request.get_json()
+        except ValueError:
+            body = None
+    elif hasattr(request, 'get_body'):  # QueueMessage
+        tags['dequeueCount'] = request.dequeue_count
+        try:
+            body = json.loads(request.get_body().decode('utf-8'))
+        except (ValueError, UnicodeDecodeError):
+            body = None
+
+    if isinstance(body, dict):
+        if body.get('area'):
+            tags['area'] = body['area']
+        if isinstance(body.get('meals'), list):
+            tags['cartLines'] = len(body['meals'])
+    if 'param.area' in tags:
+        tags.setdefault('area', tags['param.area'])
+    return tags
+
+
+def _write(name, stats_bytes, tags):
+    output = os.getenv('PROFILE_OUTPUT') or DEFAULT_OUTPUT
+    sidecar = json.dumps(tags, indent=2, default=str).encode('utf-8')
+
+    if not output.startswith('blob:'):
+        path = os.path.join(output, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.prof', 'wb') as f:
+            f.write(stats_bytes)
+        with open(path + '.json', 'wb') as f:
+            f.write(sidecar)
+        return path + '.prof'
+
+    from azure.core.exceptions import ResourceExistsError
+    from shared_code import storage
+
+    container = output[len('blob:'):] or 'profiles'
+    blob_service = storage.blob_service_from_connection_string(storage.get_connection_string())
+    try:
+        blob_service.create_container(container)
+    except ResourceExistsError:
+        pass
+    blob_service.get_blob_client(container, name + '.prof').upload_blob(stats_bytes, overwrite=True)
+    blob_service.get_blob_client(container, name + '.json').upload_blob(sidecar, overwrite=True)
+    return f"{container}/{name}.prof"
+
+
+def _save(function_name, profiler, tags):
+    import marshal
+    import pstats
+
+    profiler.create_stats()
+    # pstats' on-disk format, as written by Profile.dump_stats
+    stats_bytes = marshal.dumps(pstats.Stats(profiler).stats)
+    started = datetime.now(timezone.utc)
+    name = f"{function_name}/{started.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    location = _write(name, stats_bytes, tags)
+    logging.info("profile %s written to %s (%.1f ms)", function_name, location, tags['durationMs'])
+
+
+def profiled(function_name):
+    """Decorator profiling `main` when the app settings ask for it."""
+    def decorate(main):
+        @functools.wraps(main)
+        def wrapper(*args, **kwargs):
+            mode = _enabled(function_name)
+            if not mode:
+                return main(*args, **kwargs)
+
+            import cProfile
+
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            result = None
+            error = None
+            profiler.enable()
+            try:
+                result = main(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                profiler.disable()
+                duration_ms = (time.perf_counter() - started) * 1000
+                try:
+                    # The host passes the trigger by its binding name (req=, msg=, mytimer=)
+                    request = args[0] if args else next(iter(kwargs.values()), None)
+                    tags = dict(request_tags(request),
+                                function=function_name,
+                                mode=mode,
+                                durationMs=round(duration_ms, 2),
+                                status=getattr(result, 'status_code', None),
+                                error=repr(error) if error else None,
+                                capturedAt=datetime.now(timezone.utc).isoformat(),
+                                host=os.getenv('WEBSITE_INSTANCE_ID') or os.getenv('COMPUTERNAME'))
+                    _save(function_name, profiler, tags)
+                except Exception as save_error:
+                    # A lost profile must never fail the request
+                    logging.warning("Failed to save profile for %s: %s", function_name, save_error)
+        return wrapper
+    return decorate
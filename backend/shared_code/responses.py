@@ -0,0 +1,154 @@
+"""
+HTTP RESPONSES
+JSON encoding, compression and CORS headers shared by the functions
+
+- dumps() uses orjson when it is installed (several times faster than
+  the json module for meal-sized dicts) and json otherwise
+- large bodies are passed around as chunks (see json_chunks) and fed to
+  the gzip or brotli compressor as they are produced, so a big menu is
+  held once compressed instead of as a list, a str and its utf-8 bytes
+- the encoding follows the request's Accept-Encoding; bodies under
+  MIN_COMPRESS_SIZE bytes are sent as they are
+- every response gets the same CORS headers, and a Server-Timing header
+  when a timing.RequestTimer is given
+"""
+
+import json
+import zlib
+
+import azure.functions as func
+
+try:
+    import orjson
+except ImportError:  # optional: json is used instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: responses are then gzip only
+    brotli = None
+
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*"}
+ALLOW_HEADERS = "Content-Type"
+
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 5   # live responses: most of level 9's ratio at a fraction of the CPU
+BROTLI_QUALITY = 5
+CHUNK_ROWS = 256  # pre-serialized items joined per chunk
+
+# Content-Encoding -> available on this worker, preferred first
+ENCODINGS = {'br': brotli is not None, 'gzip': True}
+
+
+def dumps(value):
+    """JSON text of `value`; values JSON can't represent are str()-ed."""
+    if orjson is not None:
+        return orjson.dumps(value, default=str,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME).decode('utf-8')
+    return json.dumps(value, default=str)
+
+
+def json_chunks(head, key, items):
+    """
+    The JSON object `head` (a dict) with `key` set to the array of `items`,
+    pre-serialized JSON strings, as a sequence of str chunks.
+    """
+    yield f"{dumps(head)[:-1]}, \"{key}\": ["
+    batch = []
+    first = True
+    for item in items:
+        batch.append(item)
+        if len(batch) == CHUNK_ROWS:
+            yield ('' if first else ',') + ','.join(batch)
+            batch = []
+            first = False
+    if batch:
+        yield ('' if first else ',') + ','.join(batch)
+    yield "]}"
+
+
+def accepted_encodings(accept_encoding, encodings=ENCODINGS):
+    """Of `encodings`, those an Accept-Encoding header allows, in their order."""
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return [encoding for encoding in encodings
+            if accepted.get(encoding, accepted.get('*', 0.0)) > 0]
+
+
+def negotiate(req):
+    """The encoding to compress a response to `req` with, or None."""
+    usable = [encoding for encoding, available in ENCODINGS.items() if available]
+    encodings = accepted_encodings(req.headers.get('Accept-Encoding'), usable)
+    return encodings[0] if encodings else None
+
+
+def encode(chunks, encoding=None, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+    """The utf-8 bytes of str chunks, compressed chunk by chunk when an encoding is given."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=brotli_quality)
+        parts = [compressor.process(chunk.encode('utf-8')) for chunk in chunks]
+        parts.append(compressor.finish())
+    elif encoding == 'gzip':
+        # wbits 31: a gzip header and trailer around the deflate stream
+        compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+        parts = [compressor.compress(chunk.encode('utf-8')) for chunk in chunks]
+        parts.append(compressor.flush())
+    else:
+        parts = [chunk.encode('utf-8') for chunk in chunks]
+    return b''.join(parts)
+
+
+def preflight(methods="GET, OPTIONS"):
+    """The answer to a CORS preflight (OPTIONS) request."""
+    return func.HttpResponse(
+        status_code=200,
+        headers=dict(CORS_HEADERS, **{
+            "Access-Control-Allow-Methods": methods,
+            "Access-Control-Allow-Headers": ALLOW_HEADERS
+        })
+    )
+
+
+def json_response(req, body, status_code=200, timer=None, headers=None):
+    """
+    A JSON response. `body` is a value to serialize, JSON text, or an
+    iterable of JSON text chunks; it is compressed when the client
+    accepts gzip or br and it is not tiny.
+    """
+    encoding = negotiate(req) if req is not None else None
+    if isinstance(body, str):
+        chunks = [body]
+    elif isinstance(body, (dict, list)):
+        chunks = [dumps(body)]
+    else:
+        chunks = body
+    if isinstance(chunks, list) and sum(len(chunk) for chunk in chunks) < MIN_COMPRESS_SIZE:
+        encoding = None
+
+    if timer is not None:
+        with timer.span('encode'):
+            data = encode(chunks, encoding)
+    else:
+        data = encode(chunks, encoding)
+
+    response_headers = dict(CORS_HEADERS, **{"Content-Type": "application/json", "Vary": "Accept-Encoding"})
+    if encoding:
+        response_headers["Content-Encoding"] = encoding
+    response_headers.update(headers or {})
+    if timer is not None:
+        timer.tag(responseBytes=len(data), encoding=encoding or 'identity')
+        response_headers = timer.finish(status_code, response_headers)
+    return func.HttpResponse(data, status_code=status_code, mimetype="application/json", headers=response_headers)
+
+
+def error_response(req, message, status_code=500, timer=None):
+    """{"status": "error", "message": message}"""
+    return json_response(req, {'status': 'error', 'message': message}, status_code, timer)
@@ -0,0 +1,237 @@
+"""
+RESTAURANT INDEX
+Resolve a restaurant by id or by name with one point read
+
+Restaurants are partitioned by area, so finding one from its id alone
+means guessing its area. The RestaurantIndex table holds two kinds of row:
+
+- PartitionKey=<restaurant id>, RowKey='id': the restaurant's Area and Name
+- PartitionKey=<normalized name>, RowKey='name': the RestaurantId using it
+
+Both are point reads. Meals registered without a restaurant id are put
+under the restaurant already using their (normalized) name instead of a
+new one. Resolved restaurants are cached per worker for CACHE_TTL seconds,
+as is each area's list of restaurants (one partition query).
+"""
+
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
+from azure.data.tables import UpdateMode
+
+RESTAURANTS_TABLE = 'Restaurants'
+INDEX_TABLE = 'RestaurantIndex'
+ID_ROW = 'id'
+NAME_ROW = 'name'
+
+CACHE_TTL = float(os.getenv('RESTAURANT_CACHE_TTL', '300'))
+CACHE_SIZE = 4096
+
+# Restaurants table field -> API field of a listed restaurant
+PUBLIC_FIELDS = {
+    'Name': 'name',
+    'Description': 'description',
+    'CuisineType': 'cuisineType',
+    'Address': 'address',
+    'Phone': 'phone',
+    'DeliveryFee': 'deliveryFee',
+    'MinOrder': 'minOrder',
+    'Rating': 'rating',
+    'OpeningHours': 'openingHours'
+}
+
+_cache = {}
+_cache_lock = threading.Lock()
+_area_cache = {}
+
+
+def normalize_name(name):
+    """"  Luigi's  Pizza!" -> 'luigi s pizza'; also a valid PartitionKey"""
+    return ' '.join(re.sub(r'[^\w]+', ' ', str(name or '').lower()).split())
+
+
+def _cached(key):
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+    return None
+
+
+def _remember(restaurant):
+    expires = time.monotonic() + CACHE_TTL
+    with _cache_lock:
+        if len(_cache) >= CACHE_SIZE:
+            _cache.clear()
+        _cache[('id', restaurant['restaurantId'])] = (expires, restaurant)
+        if restaurant.get('name'):
+            _cache[('name', normalize_name(restaurant['name']))] = (expires, restaurant)
+    return restaurant
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+        _area_cache.clear()
+
+
+def _from_id_row(row):
+    return {'restaurantId': row['PartitionKey'], 'area': row.get('Area'), 'name': row.get('Name')}
+
+
+def index_entities(restaurant):
+    """The RestaurantIndex rows for a Restaurants table entity."""
+    rows = [{
+        'PartitionKey': restaurant['RowKey'],
+        'RowKey': ID_ROW,
+        'Area': restaurant['PartitionKey'],
+        'Name': restaurant.get('Name', '')
+    }]
+    name_key = normalize_name(restaurant.get('Name'))
+    if name_key:
+        rows.append({'PartitionKey': name_key, 'RowKey': NAME_ROW, 'RestaurantId': restaurant['RowKey']})
+    return rows
+
+
+def get_by_id(index_table, restaurant_id):
+    """{'restaurantId', 'area', 'name'} for an indexed restaurant, else None."""
+    restaurant = _cached(('id', restaurant_id))
+    if restaurant:
+        return restaurant
+    try:
+        row = index_table.get_entity(partition_key=restaurant_id, row_key=ID_ROW)
+    except ResourceNotFoundError:
+        return None
+    return _remember(_from_id_row(row))
+
+
+def get_by_name(index_table, name):
+    """The restaurant already registered under `name` (normalized), else None."""
+    name_key = normalize_name(name)
+    if not name_key:
+        return None
+    restaurant = _cached(('name', name_key))
+    if restaurant:
+        return restaurant
+    try:
+        row = index_table.get_entity(partition_key=name_key, row_key=NAME_ROW)
+    except ResourceNotFoundError:
+        return None
+    return get_by_id(index_table, row['RestaurantId'])
+
+
+def _index(index_table, restaurant_entity):
+    """Write a restaurant's index rows; a name already taken keeps its owner."""
+    id_row, *name_rows = index_entities(restaurant_entity)
+    index_table.upsert_entity(id_row, mode=UpdateMode.REPLACE)
+    for name_row in name_rows:
+        try:
+            index_table.create_entity(name_row)
+        except ResourceExistsError:
+            pass
+    return _remember(_from_id_row(id_row))
+
+
+def create(table_service, name, area):
+    """
+    Register a new restaurant in Restaurants and the index.
+
+    The name row is claimed first, so two requests racing to create the
+    same restaurant by name share the winner's id, even before the winner
+    has written its Restaurants and id rows.
+    """
+    index_table = table_service.get_table_client(INDEX_TABLE)
+    restaurant_id = str(uuid.uuid4())
+    name_key = normalize_name(name)
+    if name_key:
+        try:
+            index_table.create_entity({'PartitionKey': name_key, 'RowKey': NAME_ROW, 'RestaurantId': restaurant_id})
+        except ResourceExistsError:
+            existing = get_by_name(index_table, name)
+            if existing:
+                return existing
+            # The owner's id row isn't written yet (it is racing us) or
+            # never was (it failed after claiming the name): the name
+            # still decides the id, so nothing new is minted for it
+            row = index_table.get_entity(partition_key=name_key, row_key=NAME_ROW)
+            return {'restaurantId': row['RestaurantId'], 'area': area, 'name': name}
+
+    restaurant_entity = {
+        'PartitionKey': area,
+        'RowKey': restaurant_id,
+        'Name': name,
+        'IsActive': True,
+        'CreatedDate': datetime.utcnow().isoformat()
+    }
+    table_service.get_table_client(RESTAURANTS_TABLE).upsert_entity(restaurant_entity, mode=UpdateMode.MERGE)
+    with _cache_lock:
+        _area_cache.pop(area, None)
+    return _index(index_table, restaurant_entity)
+
+
+def format_restaurant(entity):
+    """A Restaurants table entity as a listed restaurant."""
+    restaurant = {'restaurantId': entity['RowKey'], 'area': entity['PartitionKey']}
+    for field, key in PUBLIC_FIELDS.items():
+        if field in entity:
+            restaurant[key] = entity[field]
+    return restaurant
+
+
+def area_restaurants(table_service, area):
+    """
+    {restaurant id: restaurant} of the active restaurants in an area's
+    partition, best rated first. Cached per worker for CACHE_TTL seconds.
+    """
+    with _cache_lock:
+        entry = _area_cache.get(area)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+    entities = table_service.get_table_client(RESTAURANTS_TABLE).query_entities(
+        "PartitionKey eq @area", parameters={'area': area})
+    listed = sorted((format_restaurant(entity) for entity in entities if entity.get('IsActive', True)),
+                    key=lambda restaurant: (-float(restaurant.get('rating') or 0), restaurant.get('name') or ''))
+    restaurants = {restaurant['restaurantId']: restaurant for restaurant in listed}
+    with _cache_lock:
+        _area_cache[area] = (time.monotonic() + CACHE_TTL, restaurants)
+    return restaurants
+
+
+def resolve(table_service, restaurant_id, name, area):
+    """
+    The restaurant meals should be registered under, or None for an
+    unknown id.
+
+    - an id resolves with one (usually cached) point read of the index;
+      restaurants from before the index are found once rebuild_menus has
+      backfilled it, and ids are never minted by clients
+    - without an id, a restaurant already using the name is reused
+    - anything else becomes a new restaurant in `area`
+    """
+    index_table = table_service.get_table_client(INDEX_TABLE)
+    if restaurant_id:
+        return get_by_id(index_table, restaurant_id)
+
+    restaurant = get_by_name(index_table, name)
+    if restaurant:
+        return restaurant
+    return create(table_service, name, area)
+
+
+def rebuild_index(table_service, restaurants):
+    """
+    Index every restaurant of a Restaurants table scan.
+    Used once to backfill restaurants created before the index existed.
+    """
+    table_service.create_table_if_not_exists(INDEX_TABLE)
+    index_table = table_service.get_table_client(INDEX_TABLE)
+    count = 0
+    for restaurant in restaurants:
+        _index(index_table, restaurant)
+        count += 1
+    return count
@@ -0,0 +1,197 @@
+"""
+STREAMING SKETCHES
+Bounded-memory summaries of order traffic, stored in the MealSketches table
+
+- SpaceSaving: approximate top-K meals by quantity ordered
+- HyperLogLog: approximate count of distinct customers
+
+Each area and day is spread over SHARD_COUNT rows (PartitionKey = area,
+RowKey = YYYYMMDD-<shard>, the shard picked from the order id), so
+concurrent orders rarely contend for one row, as in OrderStats. Both
+sketches have a fixed size and merge cheaply, so reading "popular in the
+last N days" costs N * SHARD_COUNT small rows however many orders were
+placed. Each row remembers the last RECENT_ORDERS order ids folded into
+it, so a retried queue message does not count its order twice.
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+import zlib
+from datetime import datetime, timedelta
+
+from shared_code.tables import optimistic_update
+
+SKETCH_TABLE = 'MealSketches'
+TOP_K = 64
+HLL_PRECISION = 10
+SHARD_COUNT = int(os.getenv('SKETCH_SHARDS', '8'))
+RECENT_ORDERS = 256
+
+
+class SpaceSaving:
+    """Space-Saving heavy hitters: at most `k` counters of [count, error, label]."""
+
+    def __init__(self, k=TOP_K, counters=None):
+        self.k = k
+        self.counters = counters or {}
+
+    def add(self, item, weight=1, label=''):
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+            if label:
+                counter[2] = label
+        elif len(self.counters) < self.k:
+            self.counters[item] = [weight, 0, label]
+        else:
+            # Evict the smallest counter; its count becomes the newcomer's error bound
+            victim = min(self.counters, key=lambda key: self.counters[key][0])
+            floor = self.counters.pop(victim)[0]
+            self.counters[item] = [floor + weight, floor, label]
+
+    def _floor(self):
+        if len(self.counters) < self.k:
+            return 0
+        return min(counter[0] for counter in self.counters.values())
+
+    def merge(self, other):
+        """Combine two summaries; items missing from a full summary get its floor."""
+        self_floor = self._floor()
+        other_floor = other._floor()
+        merged = {}
+        for item in set(self.counters) | set(other.counters):
+            mine = self.counters.get(item, [self_floor, self_floor, ''])
+            theirs = other.counters.get(item, [other_floor, other_floor, ''])
+            merged[item] = [mine[0] + theirs[0], mine[1] + theirs[1], mine[2] or theirs[2]]
+        top = sorted(merged.items(), key=lambda pair: pair[1][0], reverse=True)[:self.k]
+        self.counters = dict(top)
+        return self
+
+    def top(self, limit):
+        ranked = sorted(self.counters.items(), key=lambda pair: pair[1][0], reverse=True)
+        return [(item, count, error, label) for item, (count, error, label) in ranked[:limit]]
+
+    def dumps(self):
+        return json.dumps([[item] + counter for item, counter in self.counters.items()], separators=(',', ':'))
+
+    @classmethod
+    def loads(cls, data, k=TOP_K):
+        counters = {row[0]: list(row[1:]) for row in json.loads(data)} if data else {}
+        return cls(k, counters)
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter with 2**precision one-byte registers."""
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(registers) if registers else bytearray(self.m)
+
+    def add(self, value):
+        digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+        index = hashed >> (64 - self.precision)
+        remainder = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            # Small-range correction (linear counting)
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+    def dumps(self):
+        return bytes(self.registers)
+
+    @classmethod
+    def loads(cls, data, precision=HLL_PRECISION):
+        return cls(precision, data)
+
+
+def window_key(date=None):
+    return (date or datetime.utcnow()).strftime('%Y%m%d')
+
+
+def _shard_for(order_id):
+    if not order_id:
+        return random.randrange(SHARD_COUNT)
+    return zlib.crc32(order_id.encode('utf-8')) % SHARD_COUNT
+
+
+def record_order(sketch_table, area, meals, customer, order_date=None, order_id=None):
+    """
+    Fold one order into its area/day sketches; an order already folded in
+    is not counted again. Raises when the row stayed contended, so a
+    queue-triggered caller is retried.
+
+    `meals` are order line items ({'mealId', 'quantity', 'name'}) and
+    `customer` is an opaque customer key.
+    """
+    row_key = f"{window_key(order_date)}-{_shard_for(order_id):02d}"
+
+    def mutate(row):
+        recent = [key for key in (row.get('RecentOrders') or '').split(',') if key]
+        if order_id:
+            if order_id in recent:
+                return
+            row['RecentOrders'] = ','.join((recent + [order_id])[-RECENT_ORDERS:])
+
+        top_meals = SpaceSaving.loads(row.get('TopMeals'))
+        for meal in meals:
+            top_meals.add(meal.get('mealId'), int(meal.get('quantity', 1)), meal.get('name', ''))
+
+        customers = HyperLogLog.loads(row.get('Customers'))
+        if customer:
+            customers.add(customer)
+
+        row['TopMeals'] = top_meals.dumps()
+        row['Customers'] = customers.dumps()
+        row['OrderCount'] = int(row.get('OrderCount', 0)) + 1
+        row['UpdatedDate'] = datetime.utcnow().isoformat()
+
+    if not optimistic_update(sketch_table, area, row_key, mutate):
+        raise RuntimeError(f"Sketch row {area}/{row_key} stayed contended; order {order_id} not recorded")
+
+
+def popular_meals(sketch_table, area, days=7, limit=10):
+    """Merge the shards of the last `days` daily sketches of an area into one answer."""
+    start = window_key(datetime.utcnow() - timedelta(days=days - 1))
+    rows = sketch_table.query_entities(
+        "PartitionKey eq @area and RowKey ge @start",
+        parameters={'area': area, 'start': start}
+    )
+
+    top_meals = SpaceSaving()
+    customers = HyperLogLog()
+    order_count = 0
+    windows = set()
+    for row in rows:
+        top_meals.merge(SpaceSaving.loads(row.get('TopMeals')))
+        customers.merge(HyperLogLog.loads(row.get('Customers')))
+        order_count += int(row.get('OrderCount', 0))
+        windows.add(row['RowKey'][:8])
+
+    return {
+        'area': area,
+        'days': days,
+        'windows': len(windows),
+        'orderCount': order_count,
+        'distinctCustomers': customers.count() if windows else 0,
+        'meals': [
+            {'mealId': meal_id, 'name': name, 'quantity': count, 'maxOverestimate': error}
+            for meal_id, count, error, name in top_meals.top(limit)
+        ]
+    }
@@ -0,0 +1,101 @@
+"""
+STORAGE CLIENT FACTORY
+Build Table/Queue/Blob clients from a connection string
+
+A normal Azure Storage connection string returns the Azure SDK clients.
+A 'UseLocalStorage=true;...' string returns the SQLite stand-in from
+shared_code.localstorage, so everything can run offline.
+
+SDK modules are imported on first use, so a function only pays for the
+SDKs it actually touches (e.g. the queue SDK is not loaded by getMeals).
+Azure clients are cached per connection string and reused across
+invocations of a warm worker, keeping their connection pools alive.
+"""
+
+import os
+from functools import lru_cache
+
+LOCAL_PREFIX = 'UseLocalStorage=true'
+
+
+def get_connection_string():
+    """The app's storage connection string from its settings."""
+    return os.getenv('AzureStorageConnectionString') or os.getenv('AzureWebJobsStorage')
+
+
+def is_local(connection_string):
+    return bool(connection_string) and connection_string.strip().lower().startswith(LOCAL_PREFIX.lower())
+
+
+def table_service_from_connection_string(connection_string):
+    if is_local(connection_string):
+        from shared_code import localstorage
+        return localstorage.LocalTableServiceClient.from_connection_string(connection_string)
+    return _azure_table_service(connection_string)
+
+
+def queue_client_from_connection_string(connection_string, queue_name):
+    if is_local(connection_string):
+        from shared_code import localstorage
+        return localstorage.LocalQueueClient.from_connection_string(connection_string, queue_name=queue_name)
+    return _azure_queue_client(connection_string, queue_name)
+
+
+def blob_service_from_connection_string(connection_string):
+    if is_local(connection_string):
+        from shared_code import localstorage
+        return localstorage.LocalBlobServiceClient.from_connection_string(connection_string)
+    return _azure_blob_service(connection_string)
+
+
+def blob_content_settings(connection_string, **settings):
+    """ContentSettings (content_type, content_encoding, cache_control, ...) for a blob upload."""
+    if is_local(connection_string):
+        from shared_code import localstorage
+        return localstorage.LocalContentSettings(**settings)
+    from azure.storage.blob import ContentSettings
+    return ContentSettings(**settings)
+
+
+@lru_cache(maxsize=8)
+def _azure_table_service(connection_string):
+    from azure.data.tables import TableServiceClient
+    return TableServiceClient.from_connection_string(connection_string)
+
+
+@lru_cache(maxsize=16)
+def _azure_queue_client(connection_string, queue_name):
+    from azure.storage.queue import QueueClient
+    return QueueClient.from_connection_string(connection_string, queue_name=queue_name)
+
+
+@lru_cache(maxsize=8)
+def _azure_blob_service(connection_string):
+    from azure.storage.blob import BlobServiceClient
+    return BlobServiceClient.from_connection_string(connection_string)
+
+
+def warm(connection_string, queues=(), probe=True):
+    """
+    Import the SDKs and build the cached clients ahead of real traffic.
+
+    With `probe`, one cheap request opens the table endpoint's connection
+    (DNS, TLS) too. Returns the time each step took, in milliseconds.
+    """
+    import time
+
+    timings = {}
+    started = time.perf_counter()
+    table_service = table_service_from_connection_string(connection_string)
+    timings['tables'] = round((time.perf_counter() - started) * 1000, 1)
+
+    for queue_name in queues:
+        started = time.perf_counter()
+        queue_client_from_connection_string(connection_string, queue_name)
+        timings[f"queue:{queue_name}"] = round((time.perf_counter() - started) * 1000, 1)
+
+    if probe:
+        started = time.perf_counter()
+        next(iter(table_service.list_tables(results_per_page=1).by_page()), None)
+        timings['probe'] = round((time.perf_counter() - started) * 1000, 1)
+    return timings
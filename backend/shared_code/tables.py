@@ -0,0 +1,48 @@
+"""
+TABLE STORAGE HELPERS
+Small utilities shared by the functions that write to Table Storage
+"""
+
+import logging
+
+MAX_ATTEMPTS = 8
+
+
+def optimistic_update(table_client, partition_key, row_key, mutate, max_attempts=MAX_ATTEMPTS):
+    """
+    Read-modify-write one entity, retrying on ETag conflicts.
+
+    `mutate(entity)` changes the entity in place. A missing entity starts
+    as just its keys and is inserted; losing that insert race is retried
+    like any other conflict. Returns False if every attempt conflicted.
+    """
+    from azure.core import MatchConditions
+    from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+    from azure.data.tables import UpdateMode
+
+    for _ in range(max_attempts):
+        try:
+            entity = table_client.get_entity(partition_key=partition_key, row_key=row_key)
+        except ResourceNotFoundError:
+            entity = {'PartitionKey': partition_key, 'RowKey': row_key}
+            mutate(entity)
+            try:
+                table_client.create_entity(entity)
+                return True
+            except ResourceExistsError:
+                continue
+
+        mutate(entity)
+        try:
+            table_client.update_entity(
+                entity,
+                mode=UpdateMode.REPLACE,
+                etag=entity.metadata['etag'],
+                match_condition=MatchConditions.IfNotModified
+            )
+            return True
+        except ResourceModifiedError:
+            continue
+
+    logging.warning(f"Gave up updating {partition_key}/{row_key} after {max_attempts} attempts")
+    return False
@@ -0,0 +1,92 @@
+"""
+REQUEST TIMING
+Named spans for one invocation, reported as a Server-Timing header and a log line
+
+    timer = timing.RequestTimer('getMeals')
+    with timer.span('query'):
+        entities = list(meals_table.query_entities(...))
+    ...
+    return func.HttpResponse(body, headers=timer.finish(200, {...}))
+
+Spans with the same name add up (e.g. one 'meal_lookup' per cart line) and
+keep a count. finish() logs every span as a structured field (custom
+dimensions in Application Insights) and returns the response headers with
+Server-Timing added, so browser devtools show the breakdown too.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+_TOKEN = re.compile(r'[^A-Za-z0-9_-]')
+
+
+def _field_name(span_name):
+    """'meal_lookup' -> 'mealLookup', matching the other log fields."""
+    head, *rest = span_name.split('_')
+    return head + ''.join(word.capitalize() for word in rest)
+
+
+class RequestTimer:
+    def __init__(self, function_name):
+        self.function_name = function_name
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.fields = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - started) * 1000)
+
+    def add(self, name, duration_ms):
+        # Spans may be recorded from worker threads (e.g. concurrent area reads)
+        with self._lock:
+            total, count = self.spans.get(name, (0.0, 0))
+            self.spans[name] = (total + duration_ms, count + 1)
+
+    def tag(self, **fields):
+        """Attach request attributes (area, cart size, ...) to the timing log."""
+        self.fields.update(fields)
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        parts = []
+        for name, (total, count) in self.spans.items():
+            part = f"{_TOKEN.sub('_', name)};dur={total:.1f}"
+            if count > 1:
+                part += f';desc="{count} calls"'
+            parts.append(part)
+        parts.append(f"total;dur={self.total_ms():.1f}")
+        return ', '.join(parts)
+
+    def as_dict(self, status_code=None):
+        fields = {'function': self.function_name, 'status': status_code, 'totalMs': round(self.total_ms(), 2)}
+        for name, (total, count) in self.spans.items():
+            fields[f"{_field_name(name)}Ms"] = round(total, 2)
+            if count > 1:
+                fields[f"{_field_name(name)}Count"] = count
+        fields.update(self.fields)
+        return fields
+
+    def finish(self, status_code=None, headers=None):
+        """Log the timings and return `headers` with Server-Timing added."""
+        fields = self.as_dict(status_code)
+        logging.info("timing %s", json.dumps(fields, default=str), extra={'custom_dimensions': fields})
+
+        headers = dict(headers or {})
+        headers['Server-Timing'] = self.server_timing()
+        # Let cross-origin pages (the GitHub Pages frontend) read the header
+        headers['Timing-Allow-Origin'] = '*'
+        exposed = headers.get('Access-Control-Expose-Headers')
+        headers['Access-Control-Expose-Headers'] = f"{exposed}, Server-Timing" if exposed else 'Server-Timing'
+        return headers
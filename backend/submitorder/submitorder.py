@@ -1,12 +1,14 @@
 import logging
 import json
 import azure.functions as func
-from azure.data.tables import TableServiceClient
-from azure.storage.queue import QueueClient
 from datetime import datetime
 import uuid
 import os
 
+from shared_code import order_stats, orders, profiling, responses, storage, timing
+from shared_code.customers import customer_key
+
+@profiling.profiled('submitOrder')
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     Azure Function: Submit a customer order
@@ -16,15 +18,9 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     
     # Handle CORS preflight
     if req.method == "OPTIONS":
-        return func.HttpResponse(
-            status_code=200,
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "POST, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type"
-            }
-        )
+        return responses.preflight("POST, OPTIONS")
     
+    timer = timing.RequestTimer('submitOrder')
     try:
         # Parse request body
         req_body = req.get_json()
@@ -40,7 +36,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             # Send to invalid orders queue (advanced feature)
             try:
                 connection_string = os.getenv('AzureStorageConnectionString') or os.getenv('AzureWebJobsStorage')
-                queue_client = QueueClient.from_connection_string(
+                queue_client = storage.queue_client_from_connection_string(
                     connection_string,
                     queue_name="invalid-orders"
                 )
@@ -50,48 +46,31 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                     'error': f"Missing fields: {', '.join(missing_fields)}",
                     'timestamp': datetime.utcnow().isoformat()
                 }
-                queue_client.send_message(json.dumps(invalid_order))
+                with timer.span('invalid_queue_send'):
+                    queue_client.send_message(json.dumps(invalid_order))
                 logging.info(f"Sent invalid order to queue: {', '.join(missing_fields)}")
             except Exception as queue_error:
                 logging.error(f"Failed to send to queue: {queue_error}")
             
-            return func.HttpResponse(
-                json.dumps({
-                    'status': 'error',
-                    'message': f"Missing required fields: {', '.join(missing_fields)}"
-                }),
-                status_code=400,
-                mimetype="application/json",
-                headers={
-                    "Access-Control-Allow-Origin": "*",
-                    "Content-Type": "application/json"
-                }
-            )
+            return responses.error_response(
+                req, f"Missing required fields: {', '.join(missing_fields)}", 400, timer)
         
         # Validate meals array
         if not isinstance(req_body['meals'], list) or len(req_body['meals']) == 0:
-            return func.HttpResponse(
-                json.dumps({
-                    'status': 'error',
-                    'message': "Meals must be a non-empty array"
-                }),
-                status_code=400,
-                mimetype="application/json",
-                headers={
-                    "Access-Control-Allow-Origin": "*",
-                    "Content-Type": "application/json"
-                }
-            )
+            return responses.error_response(req, "Meals must be a non-empty array", 400, timer)
         
         # Get connection string
         connection_string = os.getenv('AzureStorageConnectionString')
         if not connection_string:
             connection_string = os.getenv('AzureWebJobsStorage')
         
+        timer.tag(area=req_body['area'], cartLines=len(req_body['meals']))
+        
         # Connect to Table Storage
-        table_service = TableServiceClient.from_connection_string(connection_string)
-        meals_table = table_service.get_table_client('Meals')
-        orders_table = table_service.get_table_client('Orders')
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+            meals_table = table_service.get_table_client('Meals')
+            orders_table = table_service.get_table_client('Orders')
         
         # Calculate order details
         total_cost = 0.0
@@ -109,7 +88,8 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 
                 # In a real app, you'd have the restaurant ID
                 # For now, we'll get the first meal that matches
-                meals = list(meals_table.query_entities(f"RowKey eq '{meal_id}'"))
+                with timer.span('meal_lookup'):
+                    meals = list(meals_table.query_entities(f"RowKey eq '{meal_id}'"))
                 
                 if meals:
                     meal = meals[0]
@@ -122,6 +102,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                     
                     meal_details.append({
                         'mealId': meal_id,
+                        'restaurantId': meal.get('PartitionKey'),
                         'name': meal.get('Name', 'Unknown'),
                         'price': meal_price,
                         'quantity': quantity,
@@ -141,7 +122,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         
         # Generate order details
         order_id = str(uuid.uuid4())
-        order_number = f"ORD-{datetime.now().strftime('%Y%m%d')}-{order_id[:6].upper()}"
+        order_number = orders.new_order_number(order_id)
         
         # Create order entity
         order_entity = {
@@ -162,12 +143,56 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             'RestaurantIds': ','.join(restaurant_ids) if restaurant_ids else 'unknown'
         }
         
+        customer_id = customer_key(order_entity['Phone'])
+        
+        # Claim the order number for GET /api/orders/{orderNumber} before the
+        # order exists; a number another order already has gets redrawn
+        with timer.span('number_claim'):
+            for _ in range(orders.NUMBER_ATTEMPTS):
+                if orders.claim_number(table_service, order_entity):
+                    break
+                order_id = str(uuid.uuid4())
+                order_number = orders.new_order_number(order_id)
+                order_entity.update(RowKey=order_id, OrderNumber=order_number)
+            else:
+                return responses.error_response(
+                    req, "The order could not be recorded, please try again", 503, timer)
+        
         # Save to Orders table
-        orders_table.create_entity(order_entity)
+        try:
+            with timer.span('order_insert'):
+                orders_table.create_entity(order_entity)
+        except Exception:
+            orders.release_number(table_service, order_entity)
+            raise
+        
+        # Index it for /api/customers/{id}/orders and /api/restaurants/{id}/orders.
+        # An order the kitchens can't see is a lost order, so if indexing fails
+        # it is withdrawn and the client retries the submission.
+        try:
+            with timer.span('order_index'):
+                orders.index_order(table_service, order_entity, number_claimed=True)
+        except Exception as index_error:
+            logging.error(f"Failed to index order {order_number}, withdrawing it: {index_error}")
+            try:
+                orders.unindex_order(table_service, order_entity)
+                orders_table.delete_entity(partition_key=order_entity['PartitionKey'], row_key=order_id)
+            except Exception as withdraw_error:
+                logging.error(f"Failed to withdraw order {order_number}: {withdraw_error}")
+            return responses.error_response(
+                req, "The order could not be recorded, please try again", 503, timer)
+        
+        # Update the pre-aggregated statistics rollup
+        try:
+            with timer.span('stats_update'):
+                stats_table = table_service.get_table_client(order_stats.STATS_TABLE)
+                order_stats.record_order(stats_table, order_entity, meal_details)
+        except Exception as stats_error:
+            logging.warning(f"Failed to update order statistics: {stats_error}")
         
         # Send notification to queue (15 second delay handled by notifyorder function)
         try:
-            notification_queue = QueueClient.from_connection_string(
+            notification_queue = storage.queue_client_from_connection_string(
                 connection_string,
                 queue_name="order-notifications"
             )
@@ -178,53 +203,44 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 'customerName': req_body['customerName'],
                 'area': req_body['area'],
                 'status': 'Preparing',
-                'message': f"Your order {order_number} is being prepared!"
+                'message': f"Your order {order_number} is being prepared!",
+                # Line items and customer key feed the popular-meals sketches
+                'orderDate': order_entity['OrderDate'],
+                'customerKey': customer_id,
+                'meals': [
+                    {'mealId': meal['mealId'], 'quantity': meal['quantity'], 'name': meal['name']}
+                    for meal in meal_details
+                ]
             }
             
-            notification_queue.send_message(
-                json.dumps(notification_payload),
-                visibility_timeout=15
-            )
+            with timer.span('queue_send'):
+                notification_queue.send_message(
+                    json.dumps(notification_payload),
+                    visibility_timeout=15
+                )
             logging.info(f"Notification queued for order {order_number}")
         except Exception as notification_error:
             logging.warning(f"Failed to queue notification: {notification_error}")
         
         # Return success response
-        return func.HttpResponse(
-            json.dumps({
-                'status': 'success',
-                'message': 'Order submitted successfully',
-                'orderId': order_id,
-                'orderNumber': order_number,
-                'totalCost': total_cost,
-                'estimatedDeliveryTime': estimated_delivery,
-                'deliveryTimeFormatted': f"{estimated_delivery} minutes",
-                'data': {
-                    'customerName': req_body['customerName'],
-                    'area': req_body['area'],
-                    'mealCount': len(meal_details),
-                    'orderDate': order_entity['OrderDate']
-                }
-            }),
-            status_code=201,
-            mimetype="application/json",
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Content-Type": "application/json"
+        return responses.json_response(req, {
+            'status': 'success',
+            'message': 'Order submitted successfully',
+            'orderId': order_id,
+            'orderNumber': order_number,
+            'totalCost': total_cost,
+            'estimatedDeliveryTime': estimated_delivery,
+            'deliveryTimeFormatted': f"{estimated_delivery} minutes",
+            'data': {
+                'customerName': req_body['customerName'],
+                'area': req_body['area'],
+                'mealCount': len(meal_details),
+                'orderDate': order_entity['OrderDate'],
+                # For GET /api/customers/{customerId}/orders
+                'customerId': customer_id or None
             }
-        )
+        }, 201, timer)
         
     except Exception as e:
         logging.error(f"Error in submitOrder function: {str(e)}")
-        return func.HttpResponse(
-            json.dumps({
-                'status': 'error',
-                'message': f"Server error: {str(e)}"
-            }),
-            status_code=500,
-            mimetype="application/json",
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Content-Type": "application/json"
-            }
-        )
\ No newline at end of file
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
\ No newline at end of file
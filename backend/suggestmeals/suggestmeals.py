@@ -0,0 +1,78 @@
+import logging
+import azure.functions as func
+import os
+
+from shared_code import meal_index, meal_search, profiling, responses, storage, timing
+
+MAX_LIMIT = 20
+MAX_MEALS = 5
+
+@profiling.profiled('suggestMeals')
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function: Typeahead suggestions while a customer types
+    GET /api/meals/suggest?q=chi&area=Central&limit=8
+
+    Without an area, suggestions come from every area's menu. With one,
+    the best few matching meals of that area are included too.
+    """
+    logging.info('Python HTTP trigger function processed a request.')
+
+    # Handle CORS preflight
+    if req.method == "OPTIONS":
+        return responses.preflight()
+
+    timer = timing.RequestTimer('suggestMeals')
+    try:
+        # Get query parameters
+        area = req.params.get('area')
+        query = (req.params.get('q') or '').strip()
+        try:
+            limit = min(max(int(req.params.get('limit', 8)), 1), MAX_LIMIT)
+        except ValueError:
+            limit = None
+
+        if not query or limit is None:
+            return responses.json_response(
+                req, {"error": "Please provide a 'q' parameter and a numeric 'limit'"}, 400, timer)
+
+        # Get connection string from environment
+        connection_string = os.getenv('AzureStorageConnectionString')
+        if not connection_string:
+            connection_string = os.getenv('AzureWebJobsStorage')
+
+        timer.tag(area=area or '*')
+
+        # Connect to Table Storage
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+
+        # A warm worker answers from memory without touching storage
+        areas = [area] if area else meal_index.known_areas(table_service, timer, max_age=meal_index.MAX_AGE)
+        indexes = [meal_index.get_index(table_service, name, timer, max_age=meal_index.MAX_AGE)[0]
+                   for name in areas]
+        with timer.span('search_index'):
+            search_indexes = [meal_search.for_index(index) for index in indexes]
+
+        with timer.span('suggest'):
+            suggestions = meal_search.suggest(search_indexes, query, limit)
+            if area:
+                rows, _, _ = search_indexes[0].search(query, MAX_MEALS)
+                meals = indexes[0].meals_json(rows)
+            else:
+                meals = '[]'
+
+        # Return response
+        with timer.span('serialize'):
+            head = responses.dumps({
+                'status': 'success',
+                'query': query,
+                'area': area,
+                'suggestions': suggestions
+            })
+            body = f"{head[:-1]}, \"meals\": {meals}}}"
+        return responses.json_response(req, body, 200, timer)
+
+    except Exception as e:
+        logging.error(f"Error in suggestMeals function: {str(e)}")
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
@@ -1,11 +1,31 @@
 """
 Test script for Azure Functions
 Run this to verify your functions work correctly
+
+Without arguments it runs the interactive smoke test. With --load it drives
+an open-loop mix of browse/register/order traffic at one or more arrival
+rates and reports throughput, latency percentiles, errors and storage
+throttling over time, plus the saturation point across the rates:
+
+    python testdeploy.py --base-url http://localhost:7071/api --load --rates 5 10 20 40 --duration 30
+
+Against `func start`, point AzureStorageConnectionString in
+local.settings.json at the local stand-in (e.g.
+UseLocalStorage=true;Path=load.sqlite;LatencyMs=20;ThrottleRate=0.01).
 """
 
+import argparse
+import random
 import requests
 import json
 import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+AREAS = ['Central', 'North', 'South']
+DEFAULT_MIX = 'browse=70,register=5,order=25'
 
 def test_functions(base_url):
     """Test all Azure Functions endpoints"""
@@ -104,30 +124,231 @@ def test_functions(base_url):
     print("\n" + "=" * 50)
     print("✅ Testing complete!")
 
+def _percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ('browse', 'register', 'order'):
+            raise ValueError(f"Unknown traffic type: {name}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+class LoadGenerator:
+    """Open-loop traffic: requests start on schedule whether or not earlier ones finished."""
+
+    def __init__(self, base_url, mix, users=64, timeout=10, seed=None):
+        self.base_url = base_url
+        self.mix = mix
+        self.users = users
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.local = threading.local()
+        self.meal_ids = {}
+        self.lock = threading.Lock()
+        self.samples = []
+
+    def _session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=self.users)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self.local.session = session
+        return session
+
+    def load_menu(self):
+        """Fetch meal ids per area so orders reference real meals."""
+        for area in AREAS:
+            response = requests.get(f"{self.base_url}/meals?area={area}", timeout=max(self.timeout, 60))
+            response.raise_for_status()
+            self.meal_ids[area] = [meal['id'] for meal in response.json().get('meals', [])]
+        return sum(len(ids) for ids in self.meal_ids.values())
+
+    def _request(self, kind, rng):
+        area = rng.choice(AREAS)
+        if kind == 'browse':
+            return 'GET', f"{self.base_url}/meals?area={area}", None
+        if kind == 'register':
+            return 'POST', f"{self.base_url}/registerMeal", {
+                "name": f"Load Test Meal {rng.randint(1, 10 ** 6)}",
+                "description": "Registered by the load generator",
+                "price": round(rng.uniform(5, 25), 2),
+                "preparationTime": rng.randint(5, 40),
+                "deliveryAreas": [area],
+                "restaurantName": "Load Test Restaurant",
+                "category": "Main Course",
+                "isAvailable": True
+            }
+        meal_ids = self.meal_ids.get(area) or ['load-test-meal']
+        return 'POST', f"{self.base_url}/submitOrder", {
+            "customerName": f"Load Tester {rng.randint(1, 500)}",
+            "deliveryAddress": "1 Load Test Way",
+            "area": area,
+            "phoneNumber": f"555-{rng.randint(0, 9999):04d}",
+            "meals": [{"mealId": rng.choice(meal_ids), "quantity": rng.randint(1, 3)}
+                      for _ in range(rng.randint(1, 5))]
+        }
+
+    def _fire(self, kind, method, url, body, scheduled):
+        outcome = 'ok'
+        status = None
+        try:
+            response = self._session().request(method, url, json=body, timeout=self.timeout)
+            status = response.status_code
+            if status >= 400:
+                text = response.text
+                # Storage throttling surfaces as 503/429 or a ServerBusy error from the function
+                if status in (429, 503) or 'ServerBusy' in text or 'throttl' in text.lower():
+                    outcome = 'throttled'
+                else:
+                    outcome = f"http{status}"
+        except requests.Timeout:
+            outcome = 'timeout'
+        except requests.RequestException as e:
+            outcome = type(e).__name__
+        finished = time.perf_counter()
+        # Latency counts from the scheduled start, so queueing delay is not hidden
+        with self.lock:
+            self.samples.append((scheduled, finished, kind, outcome, (finished - scheduled) * 1000))
+
+    def run(self, rate, duration):
+        """Offer `rate` requests/s (Poisson arrivals) for `duration` seconds."""
+        self.samples = []
+        kinds = list(self.mix)
+        weights = [self.mix[kind] for kind in kinds]
+        started = time.perf_counter()
+        next_at = started
+        with ThreadPoolExecutor(max_workers=self.users) as executor:
+            while next_at - started < duration:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                kind = self.rng.choices(kinds, weights)[0]
+                method, url, body = self._request(kind, self.rng)
+                executor.submit(self._fire, kind, method, url, body, next_at)
+                next_at += self.rng.expovariate(rate)
+        return started, list(self.samples)
+
+
+def summarize(samples, started, duration, interval=None):
+    """Throughput, latency percentiles and outcomes, overall and per interval."""
+    def stats(subset, seconds):
+        latencies = sorted(sample[4] for sample in subset)
+        outcomes = Counter(sample[3] for sample in subset)
+        return {
+            'requests': len(subset),
+            'throughput': round(outcomes.get('ok', 0) / seconds, 2) if seconds else 0.0,
+            'p50Ms': round(_percentile(latencies, 50), 1),
+            'p95Ms': round(_percentile(latencies, 95), 1),
+            'p99Ms': round(_percentile(latencies, 99), 1),
+            'errors': {k: v for k, v in outcomes.items() if k != 'ok'},
+            'throttled': outcomes.get('throttled', 0)
+        }
+
+    summary = stats(samples, duration)
+    summary['byType'] = {kind: stats([s for s in samples if s[2] == kind], duration)
+                         for kind in sorted({s[2] for s in samples})}
+    if interval:
+        timeline = []
+        for offset in range(0, int(duration + 0.999), interval):
+            bucket = [s for s in samples if offset <= s[0] - started < offset + interval]
+            timeline.append(dict(stats(bucket, interval), second=offset))
+        summary['timeline'] = timeline
+    return summary
+
+
+def run_load(args):
+    mix = _parse_mix(args.mix)
+    generator = LoadGenerator(args.base_url, mix, args.users, args.timeout, args.seed)
+    print(f"🍽️  Loaded {generator.load_menu()} meals for order traffic")
+
+    steps = []
+    saturation = None
+    for rate in args.rates:
+        print(f"\n🚦 Offering {rate} req/s for {args.duration}s ({args.mix}, {args.users} users)")
+        started, samples = generator.run(rate, args.duration)
+        summary = summarize(samples, started, args.duration, args.interval)
+        summary['offeredRate'] = rate
+
+        for point in summary.get('timeline', []):
+            print(f"   t={point['second']:>4}s  {point['throughput']:>7.1f} ok/s  "
+                  f"p50={point['p50Ms']:>7.1f}ms p95={point['p95Ms']:>7.1f}ms p99={point['p99Ms']:>7.1f}ms  "
+                  f"errors={sum(point['errors'].values())} throttled={point['throttled']}")
+        error_rate = sum(summary['errors'].values()) / summary['requests'] if summary['requests'] else 1.0
+        summary['healthy'] = (summary['throughput'] >= 0.95 * rate * (1 - error_rate)
+                              and summary['p99Ms'] <= args.slo_ms and error_rate <= args.max_error_rate)
+        print(f"   ➜ {summary['throughput']} ok/s, p99 {summary['p99Ms']}ms, "
+              f"error rate {error_rate:.1%}, {'✅ healthy' if summary['healthy'] else '❌ saturated'}")
+        steps.append(summary)
+        if summary['healthy']:
+            saturation = rate
+
+    report = {'mix': mix, 'users': args.users, 'sloMs': args.slo_ms,
+              'highestHealthyRate': saturation, 'steps': steps}
+    print(f"\n📈 Highest healthy offered rate: {saturation if saturation is not None else 'none'} req/s")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📁 Report written to {args.output}")
+    return report
+
+
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Smoke-test or load-test the Azure Functions")
+    parser.add_argument('--base-url', help="Functions base URL, e.g. http://localhost:7071/api")
+    parser.add_argument('--load', action='store_true', help="Run the load generator instead of the smoke test")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Traffic weights, e.g. browse=70,register=5,order=25")
+    parser.add_argument('--rates', type=float, nargs='+', default=[5, 10, 20, 40],
+                        help="Offered arrival rates (req/s), run in turn to find the saturation point")
+    parser.add_argument('--duration', type=float, default=30, help="Seconds per rate")
+    parser.add_argument('--users', type=int, default=64, help="Concurrent virtual users (in-flight requests)")
+    parser.add_argument('--timeout', type=float, default=10, help="Per-request timeout in seconds")
+    parser.add_argument('--interval', type=int, default=5, help="Seconds per timeline bucket (0: no timeline)")
+    parser.add_argument('--slo-ms', type=float, default=1000, help="p99 latency a healthy rate must stay under")
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help="Error rate a healthy rate must stay under")
+    parser.add_argument('--seed', type=int, help="Random seed for reproducible traffic")
+    parser.add_argument('--output', help="Write the load report as JSON to this file")
+    args = parser.parse_args()
+
     print("Azure Functions Tester")
     print("=" * 50)
     
     # Get base URL
-    print("\nEnter the base URL of your Azure Functions")
-    print("Examples:")
-    print("  For local testing: http://localhost:7071/api")
-    print("  For Azure: https://your-function-app.azurewebsites.net/api")
-    
-    base_url = input("\nBase URL (without trailing slash): ").strip()
+    base_url = args.base_url
+    if not base_url:
+        print("\nEnter the base URL of your Azure Functions")
+        print("Examples:")
+        print("  For local testing: http://localhost:7071/api")
+        print("  For Azure: https://your-function-app.azurewebsites.net/api")
+        
+        base_url = input("\nBase URL (without trailing slash): ").strip()
     
     if not base_url:
         print("❌ No URL provided")
         sys.exit(1)
+    args.base_url = base_url.rstrip('/')
+
+    if args.load:
+        run_load(args)
+        return
     
     # Test the functions
-    test_functions(base_url)
+    test_functions(args.base_url)
     
     # Show next steps
     print("\n📋 Next steps for your frontend:")
-    print(f"   const API_BASE_URL = '{base_url}'")
+    print(f"   const API_BASE_URL = '{args.base_url}'")
     print("\n📁 Update your frontend JavaScript with this URL")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,95 @@
+import logging
+import azure.functions as func
+import os
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError
+from azure.data.tables import UpdateMode
+
+from shared_code import menu, profiling, responses, storage, timing
+
+@profiling.profiled('updateMeal')
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function: Change a registered meal (price, availability, areas, ...)
+    POST /api/updateMeal
+    Body: { restaurantId, mealId, price, isAvailable, deliveryAreas, ... }
+    """
+    logging.info('Python HTTP trigger function processed a request.')
+
+    # Handle CORS preflight
+    if req.method == "OPTIONS":
+        return responses.preflight("POST, OPTIONS")
+
+    timer = timing.RequestTimer('updateMeal')
+    try:
+        # Parse request body
+        req_body = req.get_json()
+        restaurant_id = req_body.get('restaurantId') if isinstance(req_body, dict) else None
+        meal_id = req_body.get('mealId') if isinstance(req_body, dict) else None
+        changes = {field: value for field, value in (req_body or {}).items()
+                   if field not in ('restaurantId', 'mealId')} if restaurant_id else {}
+
+        if not restaurant_id or not meal_id or not changes:
+            return responses.error_response(
+                req, "Provide restaurantId, mealId and at least one field to change", 400, timer)
+
+        # Get connection string
+        connection_string = os.getenv('AzureStorageConnectionString')
+        if not connection_string:
+            connection_string = os.getenv('AzureWebJobsStorage')
+
+        # Connect to Table Storage
+        with timer.span('client'):
+            table_service = storage.table_service_from_connection_string(connection_string)
+            meals_table = table_service.get_table_client(menu.MEALS_TABLE)
+
+        try:
+            with timer.span('meal_lookup'):
+                meal = meals_table.get_entity(partition_key=restaurant_id, row_key=meal_id)
+        except ResourceNotFoundError:
+            return responses.error_response(
+                req, f"Meal {meal_id} not found for restaurant {restaurant_id}", 404, timer)
+
+        old_areas = set(menu.parse_delivery_areas(meal.get('DeliveryAreas') or meal.get('DeliveryArea', '')))
+        errors = menu.apply_update(meal, changes)
+        if errors:
+            return responses.error_response(req, '; '.join(errors), 400, timer)
+
+        # Only update the version we read; a concurrent edit gets a 409
+        try:
+            with timer.span('meal_update'):
+                meals_table.update_entity(
+                    meal,
+                    mode=UpdateMode.REPLACE,
+                    etag=meal.metadata['etag'],
+                    match_condition=MatchConditions.IfNotModified
+                )
+        except ResourceModifiedError:
+            return responses.error_response(
+                req, "The meal was changed by someone else; reload it and try again", 409, timer)
+
+        # Update the area menus; areas the meal no longer delivers to get a tombstone.
+        # If that fails the areas are served from Meals until the read model is rebuilt
+        removed_areas = old_areas - set(menu.parse_delivery_areas(meal.get('DeliveryAreas') or meal.get('DeliveryArea', '')))
+        try:
+            with timer.span('area_publish'):
+                menu.publish_or_fall_back(table_service, [meal], removed=[(area, meal_id) for area in removed_areas])
+        except Exception as publish_error:
+            logging.error(f"Failed to publish meal {meal_id} or mark its areas incomplete: {publish_error}")
+            return responses.error_response(
+                req, f"Meal {meal_id} was updated but the area menus could not be refreshed", 503, timer)
+
+        # Return success response
+        return responses.json_response(req, {
+            'status': 'success',
+            'message': 'Meal updated successfully',
+            'mealId': meal_id,
+            'restaurantId': restaurant_id,
+            'modifiedDate': meal['ModifiedDate'],
+            'data': menu.format_meal(meal, meal.get('DeliveryArea', ''))
+        }, 200, timer)
+
+    except Exception as e:
+        logging.error(f"Error in updateMeal function: {str(e)}")
+        return responses.error_response(req, f"Server error: {str(e)}", 500, timer)
@@ -0,0 +1,58 @@
+import logging
+import json
+import azure.functions as func
+import time
+
+from shared_code import profiling, storage
+
+# Everything the menu and ordering paths import lazily on their first request
+WARM_MODULES = ['shared_code.meal_index', 'shared_code.meal_search', 'shared_code.order_stats', 'shared_code.sketches',
+                'shared_code.customers', 'shared_code.restaurants', 'shared_code.menu_snapshots', 'shared_code.responses',
+                'shared_code.orders', 'numpy']
+WARM_QUEUES = ['order-notifications']
+
+@profiling.profiled('warmup')
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function: Warm up a worker before real traffic reaches it
+    GET /api/warmup
+
+    Point an availability test, health check or deployment slot warm-up at
+    this route. It imports the shared modules and SDKs, builds the cached
+    storage clients and opens the connection to Table Storage, so the first
+    customer request on the instance does not pay for them.
+    """
+    logging.info('Python HTTP trigger function processed a request.')
+
+    try:
+        timings = {}
+        started = time.perf_counter()
+        for module in WARM_MODULES:
+            __import__(module)
+        timings['imports'] = round((time.perf_counter() - started) * 1000, 1)
+
+        timings.update(storage.warm(storage.get_connection_string(), queues=WARM_QUEUES))
+
+        return func.HttpResponse(
+            json.dumps({'status': 'warm', 'timingsMs': timings}),
+            status_code=200,
+            mimetype="application/json",
+            headers={
+                "Content-Type": "application/json",
+                "Cache-Control": "no-store"
+            }
+        )
+
+    except Exception as e:
+        logging.error(f"Error in warmup function: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({
+                'status': 'error',
+                'message': f"Server error: {str(e)}"
+            }),
+            status_code=500,
+            mimetype="application/json",
+            headers={
+                "Content-Type": "application/json"
+            }
+        )
@@ -38,14 +38,34 @@ class FoodOrderAPI {
 
     /**
      * Get meals by delivery area
+     * The first call loads the full menu; later calls only fetch what changed
+     * since the cached watermark and merge it into the cached menu.
+     * Filtered menus are filtered and sorted by the server and not cached.
      * @param {string} area - Delivery area (Central, North, South, etc.)
+     * @param {Object} filters - Optional { category, vegetarian, minPrice, maxPrice, maxPrepTime, maxCalories, sort }
      * @returns {Promise<Array>} Array of meal objects
      */
-    static async getMealsByArea(area) {
+    static async getMealsByArea(area, filters = {}) {
         try {
+            const query = new URLSearchParams({ area: area });
+            Object.entries(filters).forEach(([name, value]) => {
+                if (value !== undefined && value !== null && value !== '') {
+                    query.set(name, value);
+                }
+            });
+            const filtered = Array.from(query.keys()).length > 1;
+            
+            const cached = filtered ? null : FoodOrderAPI.readMenuCache(area);
+            if (cached) {
+                const meals = await FoodOrderAPI.syncMenu(area, cached);
+                if (meals) {
+                    return meals;
+                }
+            }
+            
             console.log(`📡 Fetching meals for area: ${area}`);
             
-            const response = await fetch(`${API_BASE_URL}/meals?area=${encodeURIComponent(area)}`, {
+            const response = await fetch(`${API_BASE_URL}/meals?${query}`, {
                 method: 'GET',
                 headers: API_HEADERS
             });
@@ -61,7 +81,13 @@ class FoodOrderAPI {
             }
             
             console.log(`✅ Found ${data.count || 0} meals in ${area}`);
-            return data.meals || [];
+            const meals = data.meals || [];
+            // Snapshot responses carry the watermark in a header, the live ones in the body
+            const watermark = response.headers.get('X-Menu-Watermark') || data.watermark;
+            if (watermark && !filtered) {
+                FoodOrderAPI.writeMenuCache(area, { watermark: watermark, meals: meals });
+            }
+            return meals;
             
         } catch (error) {
             console.error('❌ Error fetching meals:', error);
@@ -69,6 +95,260 @@ class FoodOrderAPI {
         }
     }
 
+    /**
+     * Get the meals of several delivery areas in one request
+     * Each meal is sent once even if it is delivered to several areas.
+     * Unfiltered menus are cached per area like getMealsByArea's.
+     * @param {Array<string>} areas - Delivery areas
+     * @param {Object} filters - Same filters as getMealsByArea
+     * @returns {Promise<Object>} { meals: unique meals, byArea: { area: [meals] } }
+     */
+    static async getMealsByAreas(areas, filters = {}) {
+        try {
+            const query = new URLSearchParams({ areas: areas.join(',') });
+            Object.entries(filters).forEach(([name, value]) => {
+                if (value !== undefined && value !== null && value !== '') {
+                    query.set(name, value);
+                }
+            });
+            const filtered = Array.from(query.keys()).length > 1;
+            
+            console.log(`📡 Fetching meals for areas: ${areas.join(', ')}`);
+            
+            const response = await fetch(`${API_BASE_URL}/meals?${query}`, {
+                method: 'GET',
+                headers: API_HEADERS
+            });
+            
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}: ${await response.text()}`);
+            }
+            
+            const data = await response.json();
+            
+            if (data.status === 'error') {
+                throw new Error(data.message);
+            }
+            
+            const meals = data.meals || [];
+            const mealsById = new Map(meals.map(meal => [meal.id, meal]));
+            const byArea = {};
+            (data.areas || []).forEach(group => {
+                byArea[group.area] = group.mealIds.map(id => mealsById.get(id)).filter(Boolean);
+                if (data.watermark && !filtered) {
+                    FoodOrderAPI.writeMenuCache(group.area, { watermark: data.watermark, meals: byArea[group.area] });
+                }
+            });
+            
+            console.log(`✅ Found ${data.count || 0} meals in ${areas.length} areas`);
+            return { meals: meals, byArea: byArea };
+            
+        } catch (error) {
+            console.error('❌ Error fetching meals:', error);
+            throw error;
+        }
+    }
+
+    /**
+     * Get the menu changes of an area since a watermark
+     * @param {string} area - Delivery area
+     * @param {string} since - Watermark of the previous meals or changes response
+     * @returns {Promise<Object>} { reset, watermark, hasMore, meals, removed }
+     */
+    static async getMealChanges(area, since) {
+        const response = await fetch(
+            `${API_BASE_URL}/meals/changes?area=${encodeURIComponent(area)}&since=${encodeURIComponent(since)}`, {
+            method: 'GET',
+            headers: API_HEADERS
+        });
+        
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${await response.text()}`);
+        }
+        
+        const data = await response.json();
+        
+        if (data.status === 'error') {
+            throw new Error(data.message);
+        }
+        
+        return data;
+    }
+
+    /**
+     * Bring a cached menu up to date from the change log
+     * @returns {Promise<Array|null>} Merged meals, or null if a full reload is needed
+     */
+    static async syncMenu(area, cached) {
+        try {
+            const byId = new Map(cached.meals.map(meal => [meal.id, meal]));
+            let watermark = cached.watermark;
+            let changed = 0;
+            let data;
+            
+            do {
+                data = await FoodOrderAPI.getMealChanges(area, watermark);
+                if (data.reset) {
+                    console.log(`🔄 Cached menu for ${area} is too old; reloading`);
+                    return null;
+                }
+                data.removed.forEach(id => byId.delete(id));
+                data.meals.forEach(meal => byId.set(meal.id, meal));
+                changed += data.count;
+                watermark = data.watermark;
+            } while (data.hasMore);
+            
+            const meals = Array.from(byId.values());
+            FoodOrderAPI.writeMenuCache(area, { watermark: watermark, meals: meals });
+            console.log(`✅ ${changed} menu changes in ${area}; ${meals.length} meals`);
+            return meals;
+            
+        } catch (error) {
+            console.warn('⚠️ Menu sync failed; reloading:', error);
+            return null;
+        }
+    }
+
+    static readMenuCache(area) {
+        try {
+            const cached = JSON.parse(localStorage.getItem(`menu:${area}`));
+            return cached && cached.watermark && Array.isArray(cached.meals) ? cached : null;
+        } catch (error) {
+            return null;
+        }
+    }
+
+    static writeMenuCache(area, menu) {
+        try {
+            localStorage.setItem(`menu:${area}`, JSON.stringify(menu));
+        } catch (error) {
+            // Storage full or unavailable: the next call just loads the full menu
+            localStorage.removeItem(`menu:${area}`);
+        }
+    }
+
+    /**
+     * Search an area's meals, best matches first
+     * @param {string} area - Delivery area
+     * @param {string} query - Words to search for; the last one may be partial
+     * @param {Object} filters - Optional getMealsByArea filters
+     * @returns {Promise<Array>} Matching meal objects with a relevance score
+     */
+    static async searchMeals(area, query, filters = {}) {
+        const params = new URLSearchParams({ area: area, q: query });
+        Object.entries(filters).forEach(([name, value]) => {
+            if (value !== undefined && value !== null && value !== '') {
+                params.set(name, value);
+            }
+        });
+        
+        const response = await fetch(`${API_BASE_URL}/meals/search?${params}`, {
+            method: 'GET',
+            headers: API_HEADERS
+        });
+        
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${await response.text()}`);
+        }
+        
+        const data = await response.json();
+        
+        if (data.status === 'error') {
+            throw new Error(data.message);
+        }
+        
+        return data.meals || [];
+    }
+
+    /**
+     * Meal counts for the filter chips of an area
+     * @param {string} area - Delivery area
+     * @param {Object} filters - Filters already applied (getMealsByArea filters)
+     * @returns {Promise<Object>} { category, vegetarian, price, preparationTime, restaurant }
+     */
+    static async getMealFacets(area, filters = {}) {
+        const params = new URLSearchParams({ area: area });
+        Object.entries(filters).forEach(([name, value]) => {
+            if (value !== undefined && value !== null && value !== '') {
+                params.set(name, value);
+            }
+        });
+        
+        const response = await fetch(`${API_BASE_URL}/meals/facets?${params}`, {
+            method: 'GET',
+            headers: API_HEADERS
+        });
+        
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${await response.text()}`);
+        }
+        
+        const data = await response.json();
+        
+        if (data.status === 'error') {
+            throw new Error(data.message);
+        }
+        
+        return data.facets;
+    }
+
+    /**
+     * Get an area's restaurants with their menus embedded (one page of restaurants)
+     * @param {string} area - Delivery area
+     * @param {Object} options - { limit, offset } plus any getMealsByArea filters
+     * @returns {Promise<Object>} { restaurants, total, nextOffset }
+     */
+    static async getRestaurants(area, options = {}) {
+        const params = new URLSearchParams({ area: area });
+        Object.entries(options).forEach(([name, value]) => {
+            if (value !== undefined && value !== null && value !== '') {
+                params.set(name, value);
+            }
+        });
+        
+        const response = await fetch(`${API_BASE_URL}/restaurants?${params}`, {
+            method: 'GET',
+            headers: API_HEADERS
+        });
+        
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${await response.text()}`);
+        }
+        
+        const data = await response.json();
+        
+        if (data.status === 'error') {
+            throw new Error(data.message);
+        }
+        
+        return { restaurants: data.restaurants || [], total: data.total, nextOffset: data.nextOffset };
+    }
+
+    /**
+     * Typeahead suggestions for a partly typed query
+     * @param {string} query - What the customer has typed so far
+     * @param {string} area - Optional delivery area; all areas if omitted
+     * @returns {Promise<Array>} [{ text, count }] most frequent first
+     */
+    static async suggestMeals(query, area) {
+        const params = new URLSearchParams({ q: query });
+        if (area) {
+            params.set('area', area);
+        }
+        
+        const response = await fetch(`${API_BASE_URL}/meals/suggest?${params}`, {
+            method: 'GET',
+            headers: API_HEADERS
+        });
+        
+        if (!response.ok) {
+            return [];
+        }
+        
+        const data = await response.json();
+        return data.suggestions || [];
+    }
+
     /**
      * Register a new meal (Restaurant function)
      * @param {Object} mealData - Meal information
@@ -124,6 +404,70 @@ class FoodOrderAPI {
         }
     }
 
+    /**
+     * Register a restaurant's whole menu in one request (Restaurant function)
+     * @param {Object} restaurant - { restaurantId, restaurantName, deliveryAreas }
+     * @param {Array} meals - Meal objects; restaurant fields are inherited
+     * @returns {Promise<Object>} Per-meal results
+     */
+    static async registerMeals(restaurant, meals) {
+        try {
+            console.log(`📡 Registering menu of ${meals.length} meals for:`, restaurant.restaurantName);
+            
+            const response = await fetch(`${API_BASE_URL}/registerMeals`, {
+                method: 'POST',
+                headers: API_HEADERS,
+                body: JSON.stringify({ ...restaurant, meals: meals })
+            });
+            
+            const result = await response.json();
+            
+            // 207 means some meals were registered and some were not
+            if (!response.ok && response.status !== 207) {
+                throw new Error(result.message || `HTTP ${response.status}`);
+            }
+            
+            console.log(`✅ Registered ${result.created} of ${meals.length} meals`);
+            return result;
+            
+        } catch (error) {
+            console.error('❌ Error registering menu:', error);
+            throw error;
+        }
+    }
+
+    /**
+     * Change a registered meal (Restaurant function)
+     * @param {string} restaurantId - Restaurant the meal belongs to
+     * @param {string} mealId - Meal to change
+     * @param {Object} changes - Fields to change, e.g. { price, isAvailable, deliveryAreas }
+     * @returns {Promise<Object>} The updated meal
+     */
+    static async updateMeal(restaurantId, mealId, changes) {
+        try {
+            console.log('📡 Updating meal:', mealId);
+            
+            const response = await fetch(`${API_BASE_URL}/updateMeal`, {
+                method: 'POST',
+                headers: API_HEADERS,
+                body: JSON.stringify({ ...changes, restaurantId: restaurantId, mealId: mealId })
+            });
+            
+            const result = await response.json();
+            
+            if (!response.ok || result.status === 'error') {
+                throw new Error(result.message || `HTTP ${response.status}`);
+            }
+            
+            console.log('✅ Meal updated successfully:', mealId);
+            return result;
+            
+        } catch (error) {
+            console.error('❌ Error updating meal:', error);
+            throw error;
+        }
+    }
+
     /**
      * Submit an order (Customer function)
      * @param {Object} orderData - Order information
@@ -150,6 +494,9 @@ class FoodOrderAPI {
             }
             
             console.log('✅ Order submitted successfully:', result.orderNumber);
+            if (result.data && result.data.customerId) {
+                localStorage.setItem('customerId', result.data.customerId);
+            }
             return result;
             
         } catch (error) {
@@ -158,25 +505,93 @@ class FoodOrderAPI {
         }
     }
 
+    /**
+     * Track an order by its order number
+     * @param {string} orderNumber - e.g. ORD-20250131-3F2A9C
+     * @returns {Promise<Object|null>} The order, or null if there is no such order
+     */
+    static async getOrder(orderNumber) {
+        const response = await fetch(`${API_BASE_URL}/orders/${encodeURIComponent(orderNumber)}`, {
+            method: 'GET',
+            headers: API_HEADERS
+        });
+        
+        if (response.status === 404) {
+            return null;
+        }
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${await response.text()}`);
+        }
+        
+        const data = await response.json();
+        return data.order;
+    }
+
+    /**
+     * Get a customer's past orders, newest first
+     * @param {string} customerId - customerId from a submitOrder response (defaults to the last one stored)
+     * @param {string|null} cursor - nextCursor of the previous page
+     * @param {number} limit - Orders per page (max 50)
+     * @returns {Promise<Object>} { orders, nextCursor, hasMore }
+     */
+    static async getCustomerOrders(customerId = localStorage.getItem('customerId'), cursor = null, limit = 20) {
+        if (!customerId) {
+            return { orders: [], nextCursor: null, hasMore: false };
+        }
+        const params = new URLSearchParams({ limit });
+        if (cursor) {
+            params.set('cursor', cursor);
+        }
+        const response = await fetch(`${API_BASE_URL}/customers/${encodeURIComponent(customerId)}/orders?${params}`, {
+            method: 'GET',
+            headers: API_HEADERS
+        });
+        
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${await response.text()}`);
+        }
+        
+        const data = await response.json();
+        return { orders: data.orders, nextCursor: data.nextCursor, hasMore: data.hasMore };
+    }
+
+    /**
+     * Get a restaurant's incoming orders (for kitchen tablets)
+     * @param {string} restaurantId - Restaurant ID
+     * @param {Object} options - { status, since } where since is an ISO time or the cursor of the previous call
+     * @returns {Promise<Object>} { orders, cursor, hasMore }; poll again with since = cursor.
+     *          Polls overlap slightly, so the same order can come back: merge by orderId.
+     */
+    static async getRestaurantOrders(restaurantId, { status = null, since = null } = {}) {
+        const params = new URLSearchParams();
+        if (status) {
+            params.set('status', status);
+        }
+        if (since) {
+            params.set('since', since);
+        }
+        const response = await fetch(`${API_BASE_URL}/restaurants/${encodeURIComponent(restaurantId)}/orders?${params}`, {
+            method: 'GET',
+            headers: API_HEADERS
+        });
+        
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${await response.text()}`);
+        }
+        
+        const data = await response.json();
+        return { orders: data.orders, cursor: data.cursor, hasMore: data.hasMore };
+    }
+
     /**
      * Get recent registered meals (for restaurant dashboard)
      * @returns {Promise<Array>} Array of recent meals
      */
     static async getRecentMeals() {
         try {
-            // This would query all meals for the restaurant
-            // For now, we'll get all meals and filter client-side
-            const response = await fetch(`${API_BASE_URL}/meals?area=Central`, {
-                method: 'GET',
-                headers: API_HEADERS
-            });
-            
-            if (!response.ok) {
-                return [];
-            }
-            
-            const data = await response.json();
-            return data.meals || [];
+            // Every area in one request, each meal once
+            const { meals } = await FoodOrderAPI.getMealsByAreas(['Central', 'North', 'South', 'East', 'West']);
+            return meals;
             
         } catch (error) {
             console.error('❌ Error fetching recent meals:', error);
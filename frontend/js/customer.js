@@ -9,6 +9,9 @@ class CustomerOrderSystem {
         this.cart = [];
         this.selectedArea = '';
         this.currentMeals = [];
+        this.areaMeals = [];
+        this.filters = {};
+        this.searchTimer = null;
         
         // Initialize
         this.initialize();
@@ -47,6 +50,9 @@ class CustomerOrderSystem {
             loading: document.getElementById('loading'),
             mealsSection: document.getElementById('mealsSection'),
             mealsGrid: document.getElementById('mealsGrid'),
+            mealSearch: document.getElementById('mealSearch'),
+            mealSuggestions: document.getElementById('mealSuggestions'),
+            filterChips: document.getElementById('filterChips'),
             noMealsMessage: document.getElementById('noMealsMessage'),
             
             // Cart elements
@@ -92,6 +98,12 @@ class CustomerOrderSystem {
             if (e.key === 'Enter') this.loadMeals();
         });
         
+        // Search as the customer types, once they pause
+        this.elements.mealSearch.addEventListener('input', () => {
+            clearTimeout(this.searchTimer);
+            this.searchTimer = setTimeout(() => this.searchMeals(), 250);
+        });
+        
         // Cart toggle
         this.elements.cartToggleBtn.addEventListener('click', () => this.toggleCart());
         this.elements.closeCartBtn.addEventListener('click', () => this.toggleCart());
@@ -170,6 +182,9 @@ class CustomerOrderSystem {
         try {
             // Fetch meals from API
             this.currentMeals = await FoodOrderAPI.getMealsByArea(area);
+            this.areaMeals = this.currentMeals;
+            this.elements.mealSearch.value = '';
+            this.filters = {};
             
             // Hide loading
             this.elements.loading.style.display = 'none';
@@ -184,6 +199,7 @@ class CustomerOrderSystem {
             // Display meals
             this.displayMeals();
             this.elements.mealsSection.style.display = 'block';
+            this.loadFacets();
             
             // Show cart summary if we have items
             if (this.cart.length > 0) {
@@ -203,6 +219,98 @@ class CustomerOrderSystem {
         }
     }
 
+    async searchMeals() {
+        const query = this.elements.mealSearch.value.trim();
+        
+        if (!query) {
+            this.applyFilters();
+            return;
+        }
+        
+        try {
+            const [meals, suggestions] = await Promise.all([
+                FoodOrderAPI.searchMeals(this.selectedArea, query, this.filters),
+                FoodOrderAPI.suggestMeals(query, this.selectedArea)
+            ]);
+            
+            // Ignore results for a query the customer has already changed
+            if (query !== this.elements.mealSearch.value.trim()) {
+                return;
+            }
+            
+            this.elements.mealSuggestions.innerHTML = suggestions
+                .map(suggestion => `<option value="${suggestion.text}"></option>`)
+                .join('');
+            this.currentMeals = meals;
+            this.displayMeals();
+            
+        } catch (error) {
+            console.error('Meal search error:', error);
+        }
+    }
+
+    async loadFacets() {
+        try {
+            const facets = await FoodOrderAPI.getMealFacets(this.selectedArea, this.filters);
+            const chips = [
+                ...facets.category.map(facet => ({
+                    label: facet.value, count: facet.count, name: 'category', value: facet.value
+                })),
+                ...facets.vegetarian.filter(facet => facet.value).map(facet => ({
+                    label: 'Vegetarian', count: facet.count, name: 'vegetarian', value: 'true'
+                })),
+                ...facets.price.map(facet => ({
+                    label: facet.label, count: facet.count, name: 'maxPrice', value: String(facet.maxPrice)
+                })),
+                ...facets.preparationTime.map(facet => ({
+                    label: facet.label, count: facet.count, name: 'maxPrepTime', value: String(facet.maxPrepTime)
+                }))
+            ];
+            
+            this.elements.filterChips.innerHTML = chips
+                .filter(chip => chip.count > 0 || this.filters[chip.name] === chip.value)
+                .map(chip => `
+                    <button class="filter-chip ${this.filters[chip.name] === chip.value ? 'active' : ''}"
+                            data-name="${chip.name}" data-value="${chip.value}">
+                        ${chip.label} (${chip.count})
+                    </button>
+                `).join('');
+            
+            this.elements.filterChips.querySelectorAll('.filter-chip').forEach(chip => {
+                chip.addEventListener('click', () => this.toggleFilter(chip.dataset.name, chip.dataset.value));
+            });
+            
+        } catch (error) {
+            console.error('Facet loading error:', error);
+        }
+    }
+
+    toggleFilter(name, value) {
+        if (this.filters[name] === value) {
+            delete this.filters[name];
+        } else {
+            this.filters[name] = value;
+        }
+        
+        if (this.elements.mealSearch.value.trim()) {
+            this.searchMeals();
+        } else {
+            this.applyFilters();
+        }
+        this.loadFacets();
+    }
+
+    async applyFilters() {
+        try {
+            this.currentMeals = Object.keys(this.filters).length === 0
+                ? this.areaMeals
+                : await FoodOrderAPI.getMealsByArea(this.selectedArea, this.filters);
+            this.displayMeals();
+        } catch (error) {
+            showMessage(`Error filtering meals: ${error.message}`, 'error');
+        }
+    }
+
     displayMeals() {
         this.elements.mealsGrid.innerHTML = '';
         
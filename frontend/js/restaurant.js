@@ -60,6 +60,8 @@ class RestaurantPortal {
             isAvailable: document.getElementById('isAvailable'),
             calories: document.getElementById('calories'),
             submitMealBtn: document.getElementById('submitMealBtn'),
+            importMenuBtn: document.getElementById('importMenuBtn'),
+            menuFile: document.getElementById('menuFile'),
             
             // Success modal
             successModal: document.getElementById('successModal'),
@@ -84,6 +86,12 @@ class RestaurantPortal {
             this.elements.mealForm.addEventListener('submit', (e) => this.registerMeal(e));
         }
         
+        // Menu import: the whole file is registered in one request
+        if (this.elements.importMenuBtn && this.elements.menuFile) {
+            this.elements.importMenuBtn.addEventListener('click', () => this.elements.menuFile.click());
+            this.elements.menuFile.addEventListener('change', (e) => this.importMenu(e.target.files[0]));
+        }
+        
         // Form reset
         if (this.elements.mealForm) {
             this.elements.mealForm.addEventListener('reset', () => this.resetForm());
@@ -242,6 +250,57 @@ class RestaurantPortal {
         }
     }
 
+    async importMenu(file) {
+        if (!file) return;
+        
+        try {
+            // A JSON array of meals, or { meals: [...] }
+            const parsed = JSON.parse(await file.text());
+            const meals = Array.isArray(parsed) ? parsed : (parsed.meals || []);
+            if (meals.length === 0) {
+                showMessage('The menu file contains no meals.', 'error');
+                return;
+            }
+            
+            const deliveryAreas = this.getSelectedDeliveryAreas();
+            const restaurant = {
+                restaurantId: this.currentRestaurantId,
+                restaurantName: this.elements.restaurantName?.value.trim() || parsed.restaurantName || '',
+                deliveryAreas: deliveryAreas.length > 0 ? deliveryAreas : parsed.deliveryAreas
+            };
+            
+            const result = await FoodOrderAPI.registerMeals(restaurant, meals);
+            
+            // Add every registered meal to the local list
+            result.results
+                .filter(item => item.status === 'created')
+                .forEach(item => {
+                    const meal = meals[item.index];
+                    this.addMealToList({
+                        id: item.mealId,
+                        name: meal.name,
+                        description: meal.description || '',
+                        price: parseFloat(meal.price),
+                        category: meal.category || 'Main Course',
+                        restaurantName: restaurant.restaurantName || meal.restaurantName,
+                        preparationTime: parseInt(meal.preparationTime),
+                        isVegetarian: meal.isVegetarian || false,
+                        isAvailable: meal.isAvailable !== false,
+                        calories: meal.calories || 0
+                    });
+                });
+            this.updateMealsCount();
+            
+            showMessage(result.message, result.failed > 0 ? 'error' : 'success');
+            
+        } catch (error) {
+            showMessage(`Menu import failed: ${error.message}`, 'error');
+            console.error('Menu import error:', error);
+        } finally {
+            this.elements.menuFile.value = '';
+        }
+    }
+
     getFormData() {
         return {
             name: this.elements.mealName?.value.trim() || '',